@@ -0,0 +1,12 @@
+-- Remove unique name indexes, and the operatives table if the up migration created it
+DROP INDEX IF EXISTS detectives.idx_people_name;
+DROP INDEX IF EXISTS detectives.idx_operatives_name;
+
+DO $$
+BEGIN
+    IF obj_description(to_regclass('detectives.operatives'), 'pg_class')
+        = 'Created by migration 000006' THEN
+        DROP TABLE detectives.operatives;
+    END IF;
+END
+$$;
@@ -0,0 +1,78 @@
+-- Operatives were referenced by the loader but never had a table of their own.
+-- The comment marks it as created here, so the down migration only drops it then.
+DO $$
+BEGIN
+    IF to_regclass('detectives.operatives') IS NULL THEN
+        CREATE TABLE detectives.operatives (
+            id SERIAL PRIMARY KEY,
+            first_name VARCHAR(255),
+            last_name VARCHAR(255),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        COMMENT ON TABLE detectives.operatives IS 'Created by migration 000006';
+    END IF;
+END
+$$;
+
+-- People with the same name must be merged before enforcing uniqueness. They
+-- were entered by hand, so stop rather than pick between conflicting details.
+DO $$
+DECLARE
+    conflicts TEXT;
+BEGIN
+    SELECT string_agg(format('%s %s (ids %s)', first_name, last_name, ids), '; ')
+    INTO conflicts
+    FROM (
+        SELECT first_name, last_name, string_agg(id::text, ', ' ORDER BY id) AS ids
+        FROM detectives.people
+        WHERE first_name IS NOT NULL AND last_name IS NOT NULL
+        GROUP BY first_name, last_name
+        HAVING count(*) > 1
+        AND (
+            count(DISTINCT alias) > 1
+            OR count(DISTINCT birth_year) > 1
+            OR count(DISTINCT death_year) > 1
+            OR count(DISTINCT occupation) > 1
+        )
+    ) c;
+    IF conflicts IS NOT NULL THEN
+        RAISE EXCEPTION 'People with the same name but different details: %', conflicts
+            USING HINT = 'Merge or rename these rows by hand, then run the migration again.';
+    END IF;
+END
+$$;
+
+-- Keep the oldest row of each name, with the details and notes of the others
+WITH merged AS (
+    SELECT
+        min(id) AS id,
+        max(alias) AS alias,
+        max(birth_year) AS birth_year,
+        max(death_year) AS death_year,
+        max(occupation) AS occupation,
+        string_agg(notes, E'\n\n' ORDER BY id) AS notes
+    FROM detectives.people
+    WHERE first_name IS NOT NULL AND last_name IS NOT NULL
+    GROUP BY first_name, last_name
+    HAVING count(*) > 1
+)
+UPDATE detectives.people p
+SET alias = m.alias,
+    birth_year = m.birth_year,
+    death_year = m.death_year,
+    occupation = m.occupation,
+    notes = m.notes,
+    updated_at = CURRENT_TIMESTAMP
+FROM merged m
+WHERE p.id = m.id;
+
+DELETE FROM detectives.people p
+USING detectives.people d
+WHERE p.first_name = d.first_name
+AND p.last_name = d.last_name
+AND p.id > d.id;
+
+-- Unique names let the loader resolve people and operatives with set-based upserts
+CREATE UNIQUE INDEX idx_people_name ON detectives.people (first_name, last_name);
+CREATE UNIQUE INDEX idx_operatives_name ON detectives.operatives (first_name, last_name);
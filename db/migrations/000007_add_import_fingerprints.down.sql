@@ -0,0 +1,2 @@
+-- Remove import fingerprints
+DROP TABLE IF EXISTS detectives.import_fingerprints;
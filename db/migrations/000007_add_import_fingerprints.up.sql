@@ -0,0 +1,9 @@
+-- Content hashes of imported source rows, so re-imports can skip rows that haven't changed
+CREATE TABLE IF NOT EXISTS detectives.import_fingerprints (
+    source_file VARCHAR(255) NOT NULL,
+    kind VARCHAR(50) NOT NULL,
+    key TEXT NOT NULL,
+    fingerprint BYTEA NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (source_file, kind, key)
+);
@@ -0,0 +1,16 @@
+-- Remove activity aggregates and the triggers that track their changes
+DROP TRIGGER IF EXISTS activities_aggregate_insert ON detectives.activities;
+DROP TRIGGER IF EXISTS activities_aggregate_update ON detectives.activities;
+DROP TRIGGER IF EXISTS activities_aggregate_delete ON detectives.activities;
+DROP TRIGGER IF EXISTS activity_locations_aggregate_insert ON detectives.activity_locations;
+DROP TRIGGER IF EXISTS activity_locations_aggregate_update ON detectives.activity_locations;
+DROP TRIGGER IF EXISTS activity_locations_aggregate_delete ON detectives.activity_locations;
+DROP FUNCTION IF EXISTS detectives.record_activity_changes();
+DROP FUNCTION IF EXISTS detectives.record_activity_location_changes();
+DROP TABLE IF EXISTS detectives.activity_aggregate_changes;
+DROP VIEW IF EXISTS detectives.activity_counts_by_month;
+DROP TABLE IF EXISTS detectives.activity_counts_by_operative;
+DROP TABLE IF EXISTS detectives.activity_counts_by_location;
+DROP TABLE IF EXISTS detectives.activity_counts_by_date;
+DROP TABLE IF EXISTS detectives.activity_counts_by_hour;
+DROP INDEX IF EXISTS detectives.idx_activity_locations_location;
@@ -0,0 +1,149 @@
+-- Activity counts the dashboard and visualizations read instead of aggregating
+-- every activity on each request. The loader refreshes them after an import
+-- (see refresh_aggregates in utils/load_data.py)
+CREATE TABLE IF NOT EXISTS detectives.activity_counts_by_hour (
+    hour SMALLINT PRIMARY KEY,
+    activity_count INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS detectives.activity_counts_by_date (
+    date DATE PRIMARY KEY,
+    activity_count INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS detectives.activity_counts_by_location (
+    location_id INTEGER PRIMARY KEY REFERENCES detectives.locations (id) ON DELETE CASCADE,
+    activity_count INTEGER NOT NULL
+);
+
+-- Missing operatives and activities are counted under ''
+CREATE TABLE IF NOT EXISTS detectives.activity_counts_by_operative (
+    operative TEXT NOT NULL,
+    activity TEXT NOT NULL,
+    activity_count INTEGER NOT NULL,
+    PRIMARY KEY (operative, activity)
+);
+
+-- Lets the refresh count a location's activities without scanning every link
+CREATE INDEX IF NOT EXISTS idx_activity_locations_location
+    ON detectives.activity_locations (location_id);
+
+CREATE OR REPLACE VIEW detectives.activity_counts_by_month AS
+SELECT date_trunc('month', date)::date AS month, SUM(activity_count)::integer AS activity_count
+FROM detectives.activity_counts_by_date
+GROUP BY 1;
+
+-- Keys whose counts are out of date, recorded by the triggers below and cleared
+-- by the refresh. It has no unique constraint, so concurrent imports never wait
+-- on each other to record the same key; the refresh removes the duplicates.
+-- Rows from activities have location_id NULL; rows from activity_locations have
+-- only location_id.
+CREATE TABLE IF NOT EXISTS detectives.activity_aggregate_changes (
+    hour SMALLINT,
+    date DATE,
+    operative TEXT,
+    activity TEXT,
+    location_id INTEGER
+);
+
+-- Statement-level triggers with transition tables, so a batch of rows costs one insert
+CREATE OR REPLACE FUNCTION detectives.record_activity_changes() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' THEN
+        -- Updates that leave every aggregated column alone change no counts
+        INSERT INTO detectives.activity_aggregate_changes (hour, date, operative, activity)
+        SELECT DISTINCT EXTRACT(HOUR FROM r.time)::smallint, r.date,
+               COALESCE(r.operative, ''), COALESCE(r.activity, '')
+        FROM old_rows o
+        JOIN new_rows n ON n.id = o.id
+        CROSS JOIN LATERAL (VALUES (o.time, o.date, o.operative, o.activity),
+                                   (n.time, n.date, n.operative, n.activity))
+            AS r (time, date, operative, activity)
+        WHERE (o.time, o.date, o.operative, o.activity)
+            IS DISTINCT FROM (n.time, n.date, n.operative, n.activity);
+    ELSIF TG_OP = 'INSERT' THEN
+        INSERT INTO detectives.activity_aggregate_changes (hour, date, operative, activity)
+        SELECT DISTINCT EXTRACT(HOUR FROM time)::smallint, date,
+               COALESCE(operative, ''), COALESCE(activity, '')
+        FROM new_rows;
+    ELSE
+        INSERT INTO detectives.activity_aggregate_changes (hour, date, operative, activity)
+        SELECT DISTINCT EXTRACT(HOUR FROM time)::smallint, date,
+               COALESCE(operative, ''), COALESCE(activity, '')
+        FROM old_rows;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION detectives.record_activity_location_changes() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        INSERT INTO detectives.activity_aggregate_changes (location_id)
+        SELECT DISTINCT location_id FROM old_rows;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO detectives.activity_aggregate_changes (location_id)
+        SELECT DISTINCT location_id FROM new_rows;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- A trigger with transition tables can only fire on one kind of statement
+CREATE TRIGGER activities_aggregate_insert
+AFTER INSERT ON detectives.activities
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION detectives.record_activity_changes();
+
+CREATE TRIGGER activities_aggregate_update
+AFTER UPDATE ON detectives.activities
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION detectives.record_activity_changes();
+
+CREATE TRIGGER activities_aggregate_delete
+AFTER DELETE ON detectives.activities
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE FUNCTION detectives.record_activity_changes();
+
+CREATE TRIGGER activity_locations_aggregate_insert
+AFTER INSERT ON detectives.activity_locations
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION detectives.record_activity_location_changes();
+
+CREATE TRIGGER activity_locations_aggregate_update
+AFTER UPDATE ON detectives.activity_locations
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION detectives.record_activity_location_changes();
+
+CREATE TRIGGER activity_locations_aggregate_delete
+AFTER DELETE ON detectives.activity_locations
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE FUNCTION detectives.record_activity_location_changes();
+
+-- Fill the tables from the activities already loaded
+INSERT INTO detectives.activity_counts_by_hour (hour, activity_count)
+SELECT EXTRACT(HOUR FROM time)::smallint, COUNT(*)
+FROM detectives.activities
+WHERE time IS NOT NULL
+GROUP BY 1
+ON CONFLICT DO NOTHING;
+
+INSERT INTO detectives.activity_counts_by_date (date, activity_count)
+SELECT date, COUNT(*)
+FROM detectives.activities
+WHERE date IS NOT NULL
+GROUP BY 1
+ON CONFLICT DO NOTHING;
+
+INSERT INTO detectives.activity_counts_by_location (location_id, activity_count)
+SELECT location_id, COUNT(*)
+FROM detectives.activity_locations
+GROUP BY 1
+ON CONFLICT DO NOTHING;
+
+INSERT INTO detectives.activity_counts_by_operative (operative, activity, activity_count)
+SELECT COALESCE(operative, ''), COALESCE(activity, ''), COUNT(*)
+FROM detectives.activities
+GROUP BY 1, 2
+ON CONFLICT DO NOTHING;
@@ -0,0 +1,2 @@
+-- Remove the spatial index on location points
+DROP INDEX IF EXISTS detectives.idx_locations_point;
@@ -0,0 +1,6 @@
+-- GiST index on each location's point (x = longitude, y = latitude) for the
+-- bounding-box, radius and nearest-neighbour queries in utils/spatial.py.
+-- Queries must use the same expression and WHERE clause to be able to use it.
+CREATE INDEX IF NOT EXISTS idx_locations_point ON detectives.locations
+USING gist (point(longitude::float8, latitude::float8))
+WHERE latitude IS NOT NULL AND longitude IS NOT NULL;
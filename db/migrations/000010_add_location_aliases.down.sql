@@ -0,0 +1,2 @@
+-- Remove location aliases
+DROP TABLE IF EXISTS detectives.location_aliases;
@@ -0,0 +1,16 @@
+-- Keys of locations merged into another one by utils/dedupe_locations.py, so
+-- imports that still spell a location the old way resolve it to the location
+-- it was merged into instead of creating it again
+CREATE TABLE IF NOT EXISTS detectives.location_aliases (
+    locality TEXT,
+    street_address TEXT,
+    location_name TEXT,
+    location_id INTEGER NOT NULL REFERENCES detectives.locations (id) ON DELETE CASCADE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_location_aliases_key ON detectives.location_aliases (
+    COALESCE(locality, ''), COALESCE(street_address, ''), COALESCE(location_name, '')
+);
+
+CREATE INDEX IF NOT EXISTS idx_location_aliases_location ON detectives.location_aliases (location_id);
@@ -0,0 +1,2 @@
+-- Remove import run checkpoints
+DROP TABLE IF EXISTS detectives.import_runs;
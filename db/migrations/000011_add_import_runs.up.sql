@@ -0,0 +1,17 @@
+-- One row per import of a source file, checkpointed at every commit with the
+-- last row committed and the statistics so far, so an interrupted import can be
+-- resumed with --resume from where it stopped
+CREATE TABLE IF NOT EXISTS detectives.import_runs (
+    id SERIAL PRIMARY KEY,
+    source_file VARCHAR(255) NOT NULL,
+    file_hash VARCHAR(64) NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'running',
+    last_row INTEGER NOT NULL DEFAULT 1,
+    stats JSONB NOT NULL DEFAULT '{}',
+    started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    finished_at TIMESTAMP,
+    CONSTRAINT import_runs_status_check CHECK (status IN ('running', 'failed', 'completed'))
+);
+
+CREATE INDEX IF NOT EXISTS idx_import_runs_source_file ON detectives.import_runs (source_file, id);
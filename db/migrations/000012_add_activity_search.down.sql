@@ -0,0 +1,6 @@
+-- Remove the search indexes and column. pg_trgm is left installed, as other
+-- schemas in the database may use it.
+DROP INDEX IF EXISTS detectives.idx_activities_subject_trgm;
+DROP INDEX IF EXISTS detectives.idx_activities_operative_trgm;
+DROP INDEX IF EXISTS detectives.idx_activities_search;
+ALTER TABLE detectives.activities DROP COLUMN IF EXISTS search_vector;
@@ -0,0 +1,33 @@
+-- Full-text search over activities for the activities page (see utils/search.py).
+-- Postgres keeps the column up to date on every insert and update. Names weigh
+-- most, then the activity notes, then the information. The text search
+-- configuration must match TEXT_SEARCH_CONFIG in utils/search.py.
+ALTER TABLE detectives.activities ADD COLUMN IF NOT EXISTS search_vector tsvector
+GENERATED ALWAYS AS (
+    setweight(to_tsvector('english'::regconfig, COALESCE(subject, '')), 'A')
+    || setweight(to_tsvector('english'::regconfig, COALESCE(operative, '')), 'A')
+    || setweight(to_tsvector('english'::regconfig, COALESCE(activity_notes, '')), 'B')
+    || setweight(to_tsvector('english'::regconfig, COALESCE(information, '')), 'C')
+) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_activities_search ON detectives.activities
+USING gin (search_vector);
+
+-- Trigram indexes let substring filters on names (operative ILIKE '%siringo%')
+-- use an index. pg_trgm ships with Postgres's contrib modules, but not every
+-- install has them, so without it the filters still work by scanning the table.
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm') THEN
+        CREATE EXTENSION IF NOT EXISTS pg_trgm;
+        CREATE INDEX IF NOT EXISTS idx_activities_operative_trgm
+            ON detectives.activities USING gin (operative gin_trgm_ops);
+        CREATE INDEX IF NOT EXISTS idx_activities_subject_trgm
+            ON detectives.activities USING gin (subject gin_trgm_ops);
+    ELSE
+        RAISE NOTICE 'pg_trgm is not available; name filters will not be indexed';
+    END IF;
+EXCEPTION WHEN insufficient_privilege THEN
+    RAISE NOTICE 'Not allowed to create pg_trgm; name filters will not be indexed';
+END
+$$;
@@ -0,0 +1,5 @@
+-- Remove the location change timestamps
+DROP TRIGGER IF EXISTS locations_updated_at ON detectives.locations;
+DROP FUNCTION IF EXISTS detectives.set_updated_at();
+DROP INDEX IF EXISTS detectives.idx_locations_updated_at;
+ALTER TABLE detectives.locations DROP COLUMN IF EXISTS updated_at;
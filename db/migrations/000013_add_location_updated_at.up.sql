@@ -0,0 +1,20 @@
+-- When each location last changed, kept up to date by a trigger so that every
+-- writer (coordinates geocoded after an import, merges, edits by hand) counts.
+-- The API includes the latest one in the version behind its ETags.
+ALTER TABLE detectives.locations
+ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP;
+
+CREATE OR REPLACE FUNCTION detectives.set_updated_at() RETURNS trigger AS $$
+BEGIN
+    NEW.updated_at := CURRENT_TIMESTAMP;
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER locations_updated_at
+BEFORE UPDATE ON detectives.locations
+FOR EACH ROW
+WHEN (OLD IS DISTINCT FROM NEW)
+EXECUTE FUNCTION detectives.set_updated_at();
+
+CREATE INDEX IF NOT EXISTS idx_locations_updated_at ON detectives.locations (updated_at);
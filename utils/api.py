@@ -0,0 +1,485 @@
+#!/usr/bin/env uv run
+# /// script
+# dependencies = [
+#   "psycopg2-binary",
+#   "python-dotenv",
+#   "requests",
+# ]
+# ///
+"""
+Read-only HTTP API over the detectives schema, serving /pinkertons/activities
+in the shape the website expects. Pages are cut by activity id (?limit=, ?after=)
+rather than by offset, ?fields= picks the fields returned, and responses carry
+an ETag derived from the last data change, so unchanged data is answered with
+304 Not Modified. Hot responses are kept in memory for a minute by default
+(API_CACHE_TTL). Runs on the standard library's threading HTTP server with a
+pool of database connections.
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+import psycopg2
+from load_data import DB_CONFIG, SCHEMA_NAME
+from psycopg2.pool import ThreadedConnectionPool
+
+API_HOST = os.getenv("API_HOST", "127.0.0.1")
+API_PORT = int(os.getenv("API_PORT", "8000"))
+
+# Database connections shared by the request threads; requests beyond this wait
+API_POOL_SIZE = int(os.getenv("API_POOL_SIZE", "4"))
+
+# Seconds a response is cached, and how many responses are kept
+API_CACHE_TTL = float(os.getenv("API_CACHE_TTL", "60"))
+API_CACHE_SIZE = int(os.getenv("API_CACHE_SIZE", "256"))
+
+# Origins allowed to call the API from a browser
+API_ALLOW_ORIGIN = os.getenv("API_ALLOW_ORIGIN", "*")
+
+# Largest page a request may ask for with ?limit=
+MAX_LIMIT = 5000
+
+# Seconds between checks of whether an import changed the data
+VERSION_CHECK_SECONDS = 5
+
+# Responses smaller than this are not worth compressing
+MIN_COMPRESS_BYTES = 1024
+
+# Decimal places kept for coordinates (6 is about 10 cm)
+COORDINATE_PRECISION = 6
+
+# Fields of an activity, in the order they are returned, and how they are read
+ACTIVITY_FIELDS = {
+    "id": "a.id",
+    "source": "a.source",
+    "operative": "a.operative",
+    "date": "a.date::text",
+    "time": "a.time::text",
+    "duration": "a.duration::text",
+    "activity": "a.activity",
+    "mode": "a.mode",
+    "activity_notes": "a.activity_notes",
+    "subject": "a.subject",
+    "information": "a.information",
+    "information_type": "a.information_type",
+    "edited": "a.edited",
+    "edit_type": "a.edit_type",
+}
+
+LOCATION_COLUMNS = """
+    l.id, l.locality, l.street_address, l.location_name, l.location_type,
+    l.location_notes, l.latitude::float8, l.longitude::float8, l.visits
+"""
+
+
+class BadRequest(ValueError):
+    """
+    A request with parameters the API can't answer, reported as 400 Bad Request.
+    """
+
+
+class TTLCache:
+    """
+    Responses keyed by data version and request, each kept for ttl seconds, with
+    the least recently used dropped beyond maxsize. Safe to share between threads.
+    """
+
+    def __init__(self, ttl=API_CACHE_TTL, maxsize=API_CACHE_SIZE):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value):
+        if self.ttl <= 0 or self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+
+class ActivityStore:
+    """
+    Queries behind the API, run on pooled connections in read-only autocommit mode.
+    """
+
+    def __init__(self, pool_size=API_POOL_SIZE):
+        self._pool = ThreadedConnectionPool(1, pool_size, **DB_CONFIG)
+        # The pool raises instead of waiting when every connection is in use
+        self._slots = threading.BoundedSemaphore(pool_size)
+        self._version = None
+        self._version_checked = 0.0
+        self._version_lock = threading.Lock()
+
+    def close(self):
+        self._pool.closeall()
+
+    def _query(self, query, params=()):
+        with self._slots:
+            conn = self._pool.getconn()
+            broken = False
+            try:
+                if not conn.autocommit:
+                    conn.set_session(readonly=True, autocommit=True)
+                with conn.cursor() as cursor:
+                    cursor.execute(query, params)
+                    columns = [col.name for col in cursor.description]
+                    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+            except psycopg2.OperationalError:
+                broken = True
+                raise
+            finally:
+                self._pool.putconn(conn, close=broken or bool(conn.closed))
+
+    def version(self):
+        """
+        Version of the data: when an import last committed rows, and when
+        locations were last changed (geocoded, edited) or merged. Read from the
+        database at most every VERSION_CHECK_SECONDS.
+        """
+        with self._version_lock:
+            if time.monotonic() - self._version_checked >= VERSION_CHECK_SECONDS:
+                row = self._query(
+                    f"""
+                    SELECT (SELECT max(updated_at) FROM {SCHEMA_NAME}.import_runs)::text
+                               AS imported,
+                           (SELECT max(updated_at) FROM {SCHEMA_NAME}.locations)::text
+                               AS located,
+                           (SELECT max(created_at) FROM {SCHEMA_NAME}.location_aliases)::text
+                               AS merged
+                """
+                )[0]
+                self._version = f"{row['imported']}|{row['located']}|{row['merged']}"
+                self._version_checked = time.monotonic()
+            return self._version
+
+    def activities(self, fields, location_id=None, after=None, limit=None):
+        """
+        Return activities with the given fields, ordered by id, optionally only
+        those at location_id, with an id greater than after, and at most limit of
+        them. The "locations" field holds each activity's locations.
+        """
+        columns = [
+            ACTIVITY_FIELDS[field] for field in fields if field in ACTIVITY_FIELDS
+        ]
+        conditions = []
+        params = []
+        if location_id is not None:
+            conditions.append(
+                f"""a.id IN (
+                    SELECT activity_id FROM {SCHEMA_NAME}.activity_locations
+                    WHERE location_id = %s
+                )"""
+            )
+            params.append(location_id)
+        if after is not None:
+            conditions.append("a.id > %s")
+            params.append(after)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        activities = self._query(
+            f"""
+            SELECT {", ".join(columns)}
+            FROM {SCHEMA_NAME}.activities a
+            {where}
+            ORDER BY a.id
+            LIMIT %s
+        """,
+            params + [limit],
+        )
+
+        if "locations" in fields and activities:
+            by_activity = {activity["id"]: [] for activity in activities}
+            for location in self._query(
+                f"""
+                SELECT al.activity_id, {LOCATION_COLUMNS}
+                FROM {SCHEMA_NAME}.activity_locations al
+                JOIN {SCHEMA_NAME}.locations l ON l.id = al.location_id
+                WHERE al.activity_id = ANY(%s)
+                ORDER BY al.activity_id, l.id
+            """,
+                (list(by_activity),),
+            ):
+                for coordinate in ("latitude", "longitude"):
+                    if location[coordinate] is not None:
+                        location[coordinate] = round(
+                            location[coordinate], COORDINATE_PRECISION
+                        )
+                by_activity[location.pop("activity_id")].append(location)
+            for activity in activities:
+                activity["locations"] = by_activity[activity["id"]]
+        return activities
+
+
+def parse_activities_query(query_string):
+    """
+    Read the parameters of an activities request into a dict of fields,
+    location_id, after and limit. Raises BadRequest for unknown fields or
+    values that aren't whole numbers. Activities always have their id, which
+    pages are cut by.
+    """
+    params = parse_qs(query_string)
+
+    def integer(name, minimum):
+        if name not in params:
+            return None
+        try:
+            value = int(params[name][-1])
+        except ValueError:
+            raise BadRequest(f"{name} must be a whole number") from None
+        if value < minimum:
+            raise BadRequest(f"{name} must be at least {minimum}")
+        return value
+
+    all_fields = list(ACTIVITY_FIELDS) + ["locations"]
+    if "fields" in params:
+        requested = {
+            field.strip()
+            for value in params["fields"]
+            for field in value.split(",")
+            if field.strip()
+        }
+        unknown = requested - set(all_fields)
+        if unknown:
+            raise BadRequest(
+                f"Unknown fields: {', '.join(sorted(unknown))}. "
+                f"Fields are {', '.join(all_fields)}"
+            )
+        fields = [field for field in all_fields if field in requested or field == "id"]
+    else:
+        fields = all_fields
+
+    limit = integer("limit", 1)
+    if limit is not None and limit > MAX_LIMIT:
+        raise BadRequest(f"limit must be at most {MAX_LIMIT}")
+    return {
+        "fields": fields,
+        "location_id": integer("location_id", 1),
+        "after": integer("after", 0),
+        "limit": limit,
+    }
+
+
+class APIHandler(BaseHTTPRequestHandler):
+    """
+    Answers GET and HEAD requests for /pinkertons/activities from the server's
+    store and cache.
+    """
+
+    protocol_version = "HTTP/1.1"
+    server_version = "PinkertonsAPI"
+
+    def do_GET(self):
+        self._handle(send_body=True)
+
+    def do_HEAD(self):
+        self._handle(send_body=False)
+
+    def do_OPTIONS(self):
+        self.send_response(HTTPStatus.NO_CONTENT)
+        self._send_cors_headers()
+        self.send_header("Access-Control-Allow-Methods", "GET, HEAD, OPTIONS")
+        self.send_header("Access-Control-Allow-Headers", "If-None-Match")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _send_cors_headers(self):
+        if API_ALLOW_ORIGIN:
+            self.send_header("Access-Control-Allow-Origin", API_ALLOW_ORIGIN)
+            self.send_header("Access-Control-Expose-Headers", "ETag, Link")
+
+    def _handle(self, send_body):
+        url = urlsplit(self.path)
+        if url.path.rstrip("/") != "/pinkertons/activities":
+            self._send_error(HTTPStatus.NOT_FOUND, "Not found")
+            return
+        try:
+            query = parse_activities_query(url.query)
+        except BadRequest as e:
+            self._send_error(HTTPStatus.BAD_REQUEST, str(e))
+            return
+
+        store, cache = self.server.store, self.server.cache
+        try:
+            version = store.version()
+        except psycopg2.Error as e:
+            logging.error(f"Database error: {e}")
+            self._send_error(HTTPStatus.SERVICE_UNAVAILABLE, "Database unavailable")
+            return
+
+        # The same request against the same data gets the same ETag, so a client
+        # holding it is answered without querying anything. It is weak, as the
+        # body may be sent compressed or not
+        key = (version, json.dumps(query, sort_keys=True))
+        etag = f'W/"{hashlib.blake2b(repr(key).encode(), digest_size=12).hexdigest()}"'
+        if etag in [
+            tag.strip() for tag in self.headers.get("If-None-Match", "").split(",")
+        ]:
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self._send_cors_headers()
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        response = cache.get(key)
+        if response is None:
+            try:
+                activities = store.activities(**query)
+            except psycopg2.Error as e:
+                logging.error(f"Database error: {e}")
+                self._send_error(HTTPStatus.SERVICE_UNAVAILABLE, "Database unavailable")
+                return
+            body = json.dumps(activities, ensure_ascii=False, separators=(",", ":"))
+            body = body.encode("utf-8")
+            next_link = None
+            if query["limit"] and len(activities) == query["limit"]:
+                # Pages are cut by id, so the next one starts after this one's last
+                # id however the data changes in between
+                next_params = parse_qs(url.query)
+                next_params["after"] = [str(activities[-1]["id"])]
+                next_link = f"{url.path}?{urlencode(next_params, doseq=True)}"
+            compressed = (
+                gzip.compress(body, compresslevel=6, mtime=0)
+                if len(body) >= MIN_COMPRESS_BYTES
+                else None
+            )
+            response = (body, compressed, next_link)
+            cache.put(key, response)
+        body, compressed, next_link = response
+
+        send_gzip = compressed is not None and "gzip" in self.headers.get(
+            "Accept-Encoding", ""
+        )
+        self.send_response(HTTPStatus.OK)
+        self._send_cors_headers()
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Vary", "Accept-Encoding")
+        if next_link:
+            self.send_header("Link", f'<{next_link}>; rel="next"')
+        if send_gzip:
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(compressed if send_gzip else body)))
+        self.end_headers()
+        if send_body:
+            self.wfile.write(compressed if send_gzip else body)
+
+    def _send_error(self, status, message):
+        body = json.dumps({"error": message}).encode("utf-8")
+        self.send_response(status)
+        self._send_cors_headers()
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logging.info(f"{self.address_string()} - {format % args}")
+
+
+class APIServer(ThreadingHTTPServer):
+    """
+    Threading HTTP server holding the store and cache its handlers share.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address, store, cache):
+        super().__init__(address, APIHandler)
+        self.store = store
+        self.cache = cache
+
+    def handle_error(self, request, client_address):
+        # Clients that hang up mid-response are routine, not worth a traceback
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super().handle_error(request, client_address)
+
+
+def serve(
+    host=API_HOST, port=API_PORT, pool_size=API_POOL_SIZE, cache_ttl=API_CACHE_TTL
+):
+    """
+    Serve the API until interrupted.
+    """
+    server = APIServer((host, port), ActivityStore(pool_size), TTLCache(cache_ttl))
+    logging.info(f"Serving http://{host}:{server.server_port}/pinkertons/activities")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.store.close()
+        cache = server.cache
+        logging.info(f"Stopped; cache hits: {cache.hits}, misses: {cache.misses}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Serve activities from the database over HTTP.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  %(prog)s
+  %(prog)s --host 0.0.0.0 --port 8080 --pool-size 8
+  curl 'http://127.0.0.1:8000/pinkertons/activities?location_id=12'
+  curl 'http://127.0.0.1:8000/pinkertons/activities?fields=id,date,locations&limit=500'
+        """,
+    )
+    parser.add_argument(
+        "--host", default=API_HOST, help=f"Address to listen on (default: {API_HOST})"
+    )
+    parser.add_argument(
+        "--port", type=int, default=API_PORT, help=f"Port (default: {API_PORT})"
+    )
+    parser.add_argument(
+        "--pool-size",
+        type=int,
+        default=API_POOL_SIZE,
+        help=f"Database connections (default: {API_POOL_SIZE})",
+    )
+    parser.add_argument(
+        "--cache-ttl",
+        type=float,
+        default=API_CACHE_TTL,
+        help=f"Seconds to cache responses, 0 to disable (default: {API_CACHE_TTL:g})",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+    )
+
+    try:
+        serve(args.host, args.port, args.pool_size, args.cache_ttl)
+    except (OSError, psycopg2.Error) as e:
+        logging.error(f"Could not start the API: {e}")
+        sys.exit(1)
@@ -0,0 +1,486 @@
+#!/usr/bin/env uv run
+# /// script
+# dependencies = [
+#   "psycopg2-binary",
+#   "python-dotenv",
+#   "requests",
+# ]
+# ///
+"""
+Benchmark the import pipeline on synthetic data.
+Times the field parsers, the parse stage, crosswalk loading, location resolution,
+end-to-end loads into a local Postgres and geocoding against a stub Nominatim
+server, and writes the results to a JSON file that later runs can be compared with.
+"""
+
+import argparse
+import csv
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import psycopg2
+
+import geocoder
+import load_data
+import parsing
+from generate_data import count_label, generate, parse_count
+
+RESULTS_DIR = "benchmark_results"
+
+# Tables emptied before each end-to-end load
+LOAD_TABLES = [
+    "activity_locations",
+    "activities",
+    "locations",
+    "people",
+    "operatives",
+    "import_fingerprints",
+    "import_runs",
+    # TRUNCATE fires no row or statement triggers, so the aggregates are emptied too
+    "activity_counts_by_hour",
+    "activity_counts_by_date",
+    "activity_counts_by_location",
+    "activity_counts_by_operative",
+    "activity_aggregate_changes",
+]
+
+
+def measure(name, func, items, repeat, results, setup=None):
+    """
+    Run func repeat times (after setup, if given, which is not timed) and record
+    the timings under name. func may return extra details to store with the result.
+    """
+    runs = []
+    details = None
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        details = func()
+        runs.append(time.perf_counter() - start)
+
+    best = min(runs)
+    results[name] = {
+        "items": items,
+        "runs": [round(run, 6) for run in runs],
+        "best": round(best, 6),
+        "median": round(statistics.median(runs), 6),
+        "items_per_second": round(items / best, 1) if best > 0 else None,
+    }
+    if details:
+        results[name]["details"] = details
+    print(
+        f"{name:<32} best {best:9.4f}s  median {statistics.median(runs):9.4f}s  "
+        f"{results[name]['items_per_second'] or 0:>12,.0f} items/s"
+    )
+
+
+def clear_parse_caches():
+    parsing.duration_value.cache_clear()
+    parsing.time_value.cache_clear()
+    parsing.date_value.cache_clear()
+    parsing.coordinates_value.cache_clear()
+    load_data.split_name.cache_clear()
+
+
+def bench_parsing(csv_path, crosswalk_path, workers, repeat, results):
+    with open(csv_path, "r", encoding="utf-8-sig") as f:
+        rows = list(csv.DictReader(f))
+    crosswalk = load_data.load_crosswalk_data(str(crosswalk_path))
+
+    def parse_cells():
+        for row in rows:
+            load_data.parse_date(row["Date"], row["ID"])
+            load_data.parse_time(row["Time"], row["ID"])
+            load_data.parse_duration(row["Duration"], row["ID"])
+            load_data.parse_coordinates(row["Location Notes"])
+
+    measure(
+        "parse_helpers", parse_cells, len(rows), repeat, results, clear_parse_caches
+    )
+
+    def parse_columns():
+        load_data.parse_field_columns(rows)
+
+    measure(
+        "parse_columns",
+        parse_columns,
+        len(rows),
+        repeat,
+        results,
+        clear_parse_caches,
+    )
+
+    def parse_stage(workers):
+        def run():
+            with open(csv_path, "r", encoding="utf-8-sig") as f:
+                for _ in load_data.parse_records(f, crosswalk, workers):
+                    pass
+
+        return run
+
+    measure(
+        "parse_stage",
+        parse_stage(1),
+        len(rows),
+        repeat,
+        results,
+        clear_parse_caches,
+    )
+    if workers > 1:
+        measure(
+            f"parse_stage_{workers}_workers",
+            parse_stage(workers),
+            len(rows),
+            repeat,
+            results,
+            clear_parse_caches,
+        )
+
+    with open(crosswalk_path, "r", encoding="utf-8-sig") as f:
+        crosswalk_rows = sum(1 for _ in f) - 1
+
+    def load_crosswalk():
+        load_data.load_crosswalk_data(str(crosswalk_path))
+
+    measure(
+        "load_crosswalk_data",
+        load_crosswalk,
+        crosswalk_rows,
+        repeat,
+        results,
+    )
+    return rows, crosswalk
+
+
+def truncate_tables(conn):
+    cursor = conn.cursor()
+    cursor.execute(
+        f"TRUNCATE {', '.join(f'{load_data.SCHEMA_NAME}.{t}' for t in LOAD_TABLES)} "
+        f"RESTART IDENTITY CASCADE"
+    )
+    conn.commit()
+    cursor.close()
+
+
+def bench_database(csv_path, crosswalk_path, rows, crosswalk, args, results):
+    conn = psycopg2.connect(**load_data.DB_CONFIG)
+    truncate_tables(conn)
+
+    # Resolving and inserting locations (not links, which need the activities),
+    # rolled back after each run
+    location_rows = [
+        row
+        for row in rows
+        if row["ID"]
+        and any([row["Locality"], row["Street Address"], row["Location Name"]])
+    ]
+
+    def resolve_locations():
+        cursor = conn.cursor()
+        cache = load_data.LocationCache(cursor)
+        created = 0
+        for row in location_rows:
+            latitude, longitude = load_data.parse_coordinates(row["Location Notes"])
+            latitude, longitude, visits, _ = load_data.apply_crosswalk(
+                crosswalk, row, latitude, longitude
+            )
+            location, is_new = cache.get_or_create(
+                row["Locality"],
+                row["Street Address"],
+                row["Location Name"],
+                row["Location Type"],
+                row["Location Notes"],
+                latitude,
+                longitude,
+                visits,
+            )
+            created += is_new
+        cache.flush()
+        conn.rollback()
+        cursor.close()
+        return {"locations": created}
+
+    measure(
+        "location_resolution",
+        resolve_locations,
+        len(location_rows),
+        args.repeat,
+        results,
+    )
+
+    if args.end_to_end:
+        for mode in args.modes:
+            options = {"bulk": mode == "bulk", "workers": args.workers}
+
+            def run_load():
+                load_data.load_data(str(csv_path), str(crosswalk_path), **options)
+
+            measure(
+                f"load_data_{mode}",
+                run_load,
+                len(rows),
+                args.repeat,
+                results,
+                lambda: truncate_tables(conn),
+            )
+
+    conn.close()
+
+
+class _StubNominatim(BaseHTTPRequestHandler):
+    """
+    Answers every search with one result in Texas after an optional delay.
+    """
+
+    delay = 0.0
+    requests = 0
+
+    def do_GET(self):
+        type(self).requests += 1
+        query = parse_qs(urlparse(self.path).query).get("q", [""])[0]
+        if self.delay:
+            time.sleep(self.delay)
+        body = json.dumps(
+            [
+                {
+                    "lat": "31.7587",
+                    "lon": "-106.4869",
+                    "display_name": query,
+                    "address": {"state": "Texas"},
+                }
+            ]
+        ).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def bench_geocoder(rows, args, results):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubNominatim)
+    _StubNominatim.delay = args.stub_latency
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/search"
+
+    locations = list(
+        dict.fromkeys(
+            (
+                row["Locality"] or None,
+                row["Street Address"] or None,
+                row["Location Name"] or None,
+            )
+            for row in rows
+            if any([row["Locality"], row["Street Address"], row["Location Name"]])
+        )
+    )[: args.geocode_limit]
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        nominatim = geocoder.NominatimGeocoder(
+            url=url,
+            request_delay=0,
+            cache_path=os.path.join(cache_dir, "geocode_cache.sqlite3"),
+        )
+        geocoder.set_geocoder(
+            geocoder.ChainGeocoder([geocoder.GazetteerGeocoder(), nominatim])
+        )
+
+        def geocode_all():
+            _StubNominatim.requests = 0
+            for locality, street_address, location_name in locations:
+                geocoder.geocode_location(
+                    locality, street_address, location_name, load_data.ALLOWED_STATES
+                )
+            return {"stub_requests": _StubNominatim.requests}
+
+        def clear_all():
+            geocoder.clear_geocoding_cache(persistent=True)
+
+        measure("geocode_cold", geocode_all, len(locations), 1, results, clear_all)
+        measure(
+            "geocode_warm",
+            geocode_all,
+            len(locations),
+            args.repeat,
+            results,
+            geocoder.clear_geocoding_cache,
+        )
+        nominatim.cache.close()
+
+    geocoder.set_geocoder(None)
+    server.shutdown()
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).resolve().parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(previous_path, report):
+    """
+    Print the change in best time for every benchmark both runs have.
+    """
+    with open(previous_path, "r", encoding="utf-8") as f:
+        previous = json.load(f)
+
+    print(f"\nCompared with {previous_path} ({previous.get('git_commit')}):")
+    for name, result in report["results"].items():
+        before = previous["results"].get(name)
+        if not before or not before["best"]:
+            continue
+        change = (result["best"] - before["best"]) / before["best"] * 100
+        print(
+            f"{name:<32} {before['best']:9.4f}s -> {result['best']:9.4f}s  {change:+7.1f}%"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark parsing, loading and geocoding on synthetic data.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  %(prog)s --rows 10k
+  %(prog)s --rows 100k --database detectives_bench --end-to-end --workers 4
+  %(prog)s --rows 10k --compare benchmark_results/benchmark_10k_20250101_120000.json
+        """,
+    )
+    parser.add_argument(
+        "--rows",
+        type=parse_count,
+        default=parse_count("10k"),
+        help="Rows of synthetic data, e.g. 1k, 100k, 1M (default: 10k)",
+    )
+    parser.add_argument(
+        "--data",
+        default="data/synthetic",
+        help="Directory for generated data; existing files are reused (default: data/synthetic)",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="Runs per benchmark (default: 3)"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Parse workers for the parallel benchmarks (default: every CPU)",
+    )
+    parser.add_argument(
+        "--database",
+        help="Database for location resolution and end-to-end loads; database "
+        "benchmarks are skipped without it. Its detectives tables are emptied!",
+    )
+    parser.add_argument(
+        "--end-to-end",
+        action="store_true",
+        default=False,
+        help="Also time complete load_data runs (needs --database)",
+    )
+    parser.add_argument(
+        "--modes",
+        type=lambda value: value.split(","),
+        default=["row", "bulk"],
+        help="Load modes for --end-to-end, comma separated (default: row,bulk)",
+    )
+    parser.add_argument(
+        "--geocode-limit",
+        type=int,
+        default=500,
+        help="Distinct locations geocoded against the stub server (default: 500)",
+    )
+    parser.add_argument(
+        "--stub-latency",
+        type=float,
+        default=0.0,
+        help="Seconds the stub Nominatim server waits before answering (default: 0)",
+    )
+    parser.add_argument(
+        "--skip-geocoder",
+        action="store_true",
+        default=False,
+        help="Don't run the geocoder benchmarks",
+    )
+    parser.add_argument(
+        "--output", help="JSON results file (default: benchmark_results/...)"
+    )
+    parser.add_argument("--compare", help="Earlier JSON results file to compare with")
+    args = parser.parse_args()
+
+    if args.end_to_end and not args.database:
+        parser.error("--end-to-end needs --database, whose tables will be emptied")
+
+    # Keep parse warnings out of the timings; load_data's own logging setup is a no-op after this
+    logging.basicConfig(level=logging.ERROR, format="%(levelname)s - %(message)s")
+
+    label = count_label(args.rows)
+    csv_path = Path(args.data) / f"activities_{label}.csv"
+    crosswalk_path = Path(args.data) / f"crosswalk_{label}.csv"
+    if not csv_path.exists() or not crosswalk_path.exists():
+        print(f"Generating {label} rows of synthetic data in {args.data}")
+        csv_path, crosswalk_path = generate(args.rows, args.data)
+
+    results = {}
+    rows, crosswalk = bench_parsing(
+        csv_path, crosswalk_path, args.workers, args.repeat, results
+    )
+
+    if args.database:
+        load_data.DB_CONFIG["dbname"] = args.database
+        try:
+            bench_database(csv_path, crosswalk_path, rows, crosswalk, args, results)
+        except psycopg2.Error as e:
+            print(f"Database benchmarks failed: {e}", file=sys.stderr)
+
+    if not args.skip_geocoder:
+        bench_geocoder(rows, args, results)
+
+    report = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "rows": args.rows,
+        "args": {
+            key: value
+            for key, value in vars(args).items()
+            if key not in ("output", "compare")
+        },
+        "results": results,
+    }
+
+    output = args.output
+    if not output:
+        Path(RESULTS_DIR).mkdir(exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        output = f"{RESULTS_DIR}/benchmark_{label}_{timestamp}.json"
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        compare(args.compare, report)
@@ -0,0 +1,215 @@
+"""
+Crosswalk lookups that tolerate spelling, punctuation and abbreviation differences.
+Names are normalized (case, accents, punctuation, "St." and "Street", ...) and
+split into character trigrams kept in an inverted index per set of numbers in the
+name. A lookup that finds no exact or normalized match scores only the entries
+with the same numbers that share one of the query's rarest trigrams, so its cost
+depends on how many entries look alike, not on the size of the crosswalk.
+"""
+
+import logging
+import math
+import re
+import unicodedata
+from functools import lru_cache
+
+# Default similarity (Jaccard index of the names' trigram sets) a fuzzy match needs
+DEFAULT_THRESHOLD = 0.75
+
+# Words spelled out before comparing names
+ABBREVIATIONS = {
+    "st": "street",
+    "str": "street",
+    "ave": "avenue",
+    "av": "avenue",
+    "blvd": "boulevard",
+    "rd": "road",
+    "dr": "drive",
+    "ln": "lane",
+    "pl": "place",
+    "sq": "square",
+    "hwy": "highway",
+    "n": "north",
+    "s": "south",
+    "e": "east",
+    "w": "west",
+    "mt": "mount",
+    "ft": "fort",
+    "co": "company",
+    "bros": "brothers",
+    "hosp": "hospital",
+}
+
+WORD_RE = re.compile(r"[^\W_]+")
+
+# Distinct names and localities whose normalized form is remembered
+NORMALIZE_CACHE_SIZE = 65536
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def normalize(text):
+    """
+    Normalize a name for comparison: accents and punctuation removed, lowercase,
+    "&" as "and", and common abbreviations spelled out.
+    Returns None for a missing or empty name.
+    """
+    if not text:
+        return None
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(c for c in text if not unicodedata.combining(c)).casefold()
+    text = text.replace("&", " and ").replace("'", "").replace("’", "")
+    words = [ABBREVIATIONS.get(word, word) for word in WORD_RE.findall(text)]
+    return " ".join(words) or None
+
+
+def trigrams(text):
+    """
+    Set of character trigrams of a normalized name, padded so that short names
+    and word starts get trigrams of their own.
+    """
+    padded = f"  {text} "
+    return frozenset(padded[i : i + 3] for i in range(len(padded) - 2))
+
+
+def numbers(text):
+    """
+    Words of a normalized name that contain digits, such as street numbers.
+    """
+    return frozenset(word for word in text.split() if any(c.isdigit() for c in word))
+
+
+def similarity(grams, other_grams):
+    """
+    Jaccard index of two trigram sets, from 0 (nothing shared) to 1 (the same).
+    """
+    shared = len(grams & other_grams)
+    return shared / (len(grams) + len(other_grams) - shared)
+
+
+class CrosswalkIndex(dict):
+    """
+    Crosswalk entries keyed by (location_name, locality), with locality None for
+    name-only entries, that can also be looked up approximately with match().
+    The index is built on the first match() after entries were added.
+    """
+
+    def __init__(self, entries=(), threshold=DEFAULT_THRESHOLD):
+        super().__init__(entries)
+        self.threshold = threshold
+        self._indexed_size = None
+
+    @classmethod
+    def from_keys(cls, keys, threshold=DEFAULT_THRESHOLD):
+        """
+        Index of keys alone, for finding which rows a set of entries applies to.
+        """
+        return cls(((key, None) for key in keys), threshold)
+
+    def build(self):
+        """
+        Build the index now if entries were added since it was last built, such as
+        before forking workers that would otherwise each build their own.
+        """
+        if self._indexed_size != len(self):
+            self._build()
+
+    def _build(self):
+        # Built in locals and swapped in at the end, as threads loading files
+        # at the same time may share the index
+        normalized = {}
+        by_name = {}
+        for key in self:
+            name, locality = normalize(key[0]), normalize(key[1])
+            if name is None:
+                continue
+            normalized.setdefault((name, locality), key)
+            by_name.setdefault(name, []).append(key)
+
+        names = list(by_name)
+        name_grams = [trigrams(name) for name in names]
+        name_numbers = [numbers(name) for name in names]
+        # Names only match names with the same numbers, so each set of numbers
+        # gets postings of its own
+        postings = {}
+        for name_id, grams in enumerate(name_grams):
+            for gram in grams:
+                postings.setdefault((name_numbers[name_id], gram), []).append(name_id)
+
+        self._normalized = normalized
+        self._by_name = by_name
+        self._names = names
+        self._grams = name_grams
+        self._postings = postings
+        self._matches = {}
+        self._indexed_size = len(self)
+
+    def _candidates(self, grams, name_numbers):
+        """
+        Ids of the names with name_numbers in them that could be at least threshold
+        similar to grams. Such a name shares at least threshold * len(grams)
+        trigrams with them, so it has one of any len(grams) - that + 1 of them;
+        the rarest ones are checked.
+        """
+        keys = [(name_numbers, gram) for gram in grams]
+        needed = len(keys) - math.ceil(self.threshold * len(keys)) + 1
+        rarest = sorted(keys, key=lambda key: len(self._postings.get(key, ())))
+        candidates = set()
+        for key in rarest[:needed]:
+            candidates.update(self._postings.get(key, ()))
+        return candidates
+
+    def match(self, location_name, locality=None):
+        """
+        Find the entry for a location. Tries the exact (location_name, locality)
+        key, then the name-only key, then the same two normalized, then the most
+        similar name at or above the threshold with the same numbers in it,
+        preferring an entry in the same locality. Returns tuple of (key, entry,
+        score) or None; score is 1.0 for exact and normalized matches.
+        """
+        if not location_name:
+            return None
+        for key in ((location_name, locality), (location_name, None)):
+            if key in self:
+                return key, self[key], 1.0
+
+        self.build()
+        cache_key = (location_name, locality)
+        if cache_key in self._matches:
+            return self._matches[cache_key]
+
+        name, normalized_locality = normalize(location_name), normalize(locality)
+        result = None
+        if name is not None:
+            for normalized_key in ((name, normalized_locality), (name, None)):
+                key = self._normalized.get(normalized_key)
+                if key is not None:
+                    result = key, self[key], 1.0
+                    break
+
+        if result is None and name is not None and self.threshold < 1:
+            grams, name_numbers = trigrams(name), numbers(name)
+            best_score, best_id = 0.0, None
+            # 517 and 521 South El Paso Street are similar names, but not the same
+            # place, so only names with the same numbers are candidates
+            for name_id in sorted(self._candidates(grams, name_numbers)):
+                score = similarity(grams, self._grams[name_id])
+                if score >= self.threshold and score > best_score:
+                    best_score, best_id = score, name_id
+            if best_id is not None:
+                keys = self._by_name[self._names[best_id]]
+                key = next(
+                    (k for k in keys if normalize(k[1]) == normalized_locality),
+                    keys[0],
+                )
+                result = key, self[key], round(best_score, 3)
+                logging.debug(
+                    "Crosswalk: %s, %s matched %s, %s (score %s)",
+                    location_name,
+                    locality,
+                    key[0],
+                    key[1],
+                    result[2],
+                )
+
+        self._matches[cache_key] = result
+        return result
@@ -0,0 +1,292 @@
+#!/usr/bin/env uv run
+# /// script
+# dependencies = []
+# ///
+"""
+Byte offsets of the rows of a CSV file, kept in a sidecar file next to it
+(el_paso.csv.rowidx), so any row range can be read without reading the rows
+before it. Rows are numbered the way the loader numbers them: the header is
+row 1 and blank lines are not rows. A row is a whole CSV record, including
+newlines inside quoted fields. The sidecar is rebuilt when the CSV file's size
+or modification time changes.
+"""
+
+import argparse
+import csv
+import io
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+from array import array
+from pathlib import Path
+
+SUFFIX = ".rowidx"
+
+# Magic, CSV file size, CSV file mtime in nanoseconds, number of offsets and the
+# array typecode of the offsets that follow, padded to 8 bytes
+HEADER = struct.Struct("<8sQqQ1s7x")
+MAGIC = b"PKROWIX1"
+
+
+def sidecar_path(csv_path):
+    """
+    Path of the index of a CSV file.
+    """
+    csv_path = Path(csv_path)
+    return csv_path.with_name(csv_path.name + SUFFIX)
+
+
+def read_rows(data, encoding="utf-8", newline=""):
+    """
+    Parse a byte range of a CSV file, such as a slice of its memory map, into
+    csv.reader rows, without the blank lines. newline is as for open(); None
+    turns line breaks inside quoted fields into "\n".
+    """
+    text = io.StringIO(bytes(data).decode(encoding), newline=newline)
+    return [values for values in csv.reader(text) if values]
+
+
+class RowIndex:
+    """
+    Byte offsets of every record of a CSV file, header first, followed by the
+    file's size, so row n starts at offsets[n - 1] and ends where the next
+    row starts.
+    """
+
+    def __init__(self, csv_path, offsets, size, mtime_ns):
+        self.csv_path = Path(csv_path)
+        self.offsets = offsets
+        self.size = size
+        self.mtime_ns = mtime_ns
+
+    @classmethod
+    def build(cls, csv_path):
+        """
+        Index a CSV file by reading it once through csv.reader, so records are
+        split exactly where the loader splits them.
+        """
+        stat = os.stat(csv_path)
+        # 4-byte offsets are enough for files under 4 GB
+        offsets = array("I" if stat.st_size < 1 << 32 else "Q")
+        if stat.st_size == 0:
+            offsets.append(0)
+            return cls(csv_path, offsets, 0, stat.st_mtime_ns)
+
+        with (
+            open(csv_path, "rb") as f,
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm,
+        ):
+            # csv.reader pulls one line at a time and yields a record as soon as
+            # its last line is read, so the bytes read by then are where the
+            # next record starts. Latin-1 keeps one character per byte, and
+            # the characters that split records are all ASCII.
+            consumed = 0
+
+            def lines():
+                nonlocal consumed
+                for line in iter(mm.readline, b""):
+                    consumed += len(line)
+                    yield line.decode("latin-1")
+
+            start = 0
+            for values in csv.reader(lines()):
+                if values:
+                    offsets.append(start)
+                start = consumed
+        offsets.append(stat.st_size)
+        return cls(csv_path, offsets, stat.st_size, stat.st_mtime_ns)
+
+    @classmethod
+    def load(cls, csv_path):
+        """
+        Read the sidecar index of a CSV file. Returns None if there is none or
+        the file has changed since it was written.
+        """
+        path = sidecar_path(csv_path)
+        try:
+            stat = os.stat(csv_path)
+            with open(path, "rb") as f:
+                magic, size, mtime_ns, count, typecode = HEADER.unpack(
+                    f.read(HEADER.size)
+                )
+                if (magic, size, mtime_ns) != (MAGIC, stat.st_size, stat.st_mtime_ns):
+                    return None
+                offsets = array(typecode.decode("ascii"))
+                offsets.frombytes(f.read(count * offsets.itemsize))
+        except (OSError, struct.error, ValueError):
+            return None
+        if len(offsets) != count:
+            return None
+        if sys.byteorder == "big":
+            offsets.byteswap()
+        return cls(csv_path, offsets, size, mtime_ns)
+
+    @classmethod
+    def open(cls, csv_path):
+        """
+        Load the index of a CSV file, or build it and save it as its sidecar if
+        it is missing or out of date. A sidecar that can't be written is skipped.
+        """
+        index = cls.load(csv_path)
+        if index is None:
+            index = cls.build(csv_path)
+            try:
+                index.save()
+            except OSError as e:
+                logging.debug("Could not write the row index of %s: %s", csv_path, e)
+        return index
+
+    def save(self):
+        """
+        Write the index to its sidecar file, replacing it atomically.
+        """
+        offsets = self.offsets
+        if sys.byteorder == "big":
+            offsets = array(offsets.typecode, offsets)
+            offsets.byteswap()
+        path = sidecar_path(self.csv_path)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(
+                HEADER.pack(
+                    MAGIC,
+                    self.size,
+                    self.mtime_ns,
+                    len(offsets),
+                    offsets.typecode.encode("ascii"),
+                )
+            )
+            f.write(offsets.tobytes())
+        os.replace(tmp_path, path)
+
+    @property
+    def rows(self):
+        """
+        Number of rows after the header.
+        """
+        return max(len(self.offsets) - 2, 0)
+
+    def offset(self, row_num):
+        """
+        Byte offset at which row row_num starts, or the file's size for rows
+        past the last one.
+        """
+        if row_num < 1:
+            raise ValueError(f"Row numbers start at 1, not {row_num}")
+        return self.offsets[min(row_num, len(self.offsets)) - 1]
+
+    def chunks(self, chunk_size, start_row=2):
+        """
+        Yield (row number, start, end) byte ranges of up to chunk_size rows from
+        row start_row on.
+        """
+        last_row = self.rows + 1
+        for row_num in range(max(start_row, 2), last_row + 1, chunk_size):
+            end_row = min(row_num + chunk_size, last_row + 1)
+            yield row_num, self.offset(row_num), self.offset(end_row)
+
+    def shards(self, count, start_row=2):
+        """
+        Split the rows from start_row on into at most count ranges of about the
+        same number of bytes. Returns list of (row number, rows, start, end).
+        """
+        first_row = max(start_row, 2)
+        last_row = self.rows + 1
+        if first_row > last_row:
+            return []
+        start, end = self.offset(first_row), self.offset(last_row + 1)
+        shards = []
+        row_num = first_row
+        for shard in range(1, count + 1):
+            if row_num > last_row:
+                break
+            # First row starting at or after this shard's share of the bytes
+            target = start + (end - start) * shard // count
+            lo, hi = row_num, last_row + 1
+            while lo < hi:
+                middle = (lo + hi) // 2
+                if self.offset(middle) < target:
+                    lo = middle + 1
+                else:
+                    hi = middle
+            next_row = max(lo, row_num + 1) if shard < count else last_row + 1
+            shards.append(
+                (
+                    row_num,
+                    next_row - row_num,
+                    self.offset(row_num),
+                    self.offset(next_row),
+                )
+            )
+            row_num = next_row
+        return shards
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Build CSV row indexes, read rows by number, or split files into shards.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  %(prog)s build data/el_paso.csv data/smeltertown.csv
+  %(prog)s rows data/el_paso.csv 120 125
+  %(prog)s shards data/el_paso.csv 4
+        """,
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = commands.add_parser("build", help="Build or refresh row indexes")
+    build_parser.add_argument("csv_files", nargs="+")
+
+    rows_parser = commands.add_parser(
+        "rows", help="Print the header and a range of rows as CSV"
+    )
+    rows_parser.add_argument("csv_file")
+    rows_parser.add_argument("first_row", type=int)
+    rows_parser.add_argument(
+        "last_row", type=int, nargs="?", help="Last row to print (default: first_row)"
+    )
+
+    shards_parser = commands.add_parser(
+        "shards", help="Split the rows into byte ranges of about the same size"
+    )
+    shards_parser.add_argument("csv_file")
+    shards_parser.add_argument("count", type=int)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s - %(message)s")
+
+    try:
+        if args.command == "build":
+            for csv_file in args.csv_files:
+                index = RowIndex.open(csv_file)
+                logging.info(
+                    f"{csv_file}: {index.rows} rows, index {sidecar_path(csv_file)}"
+                )
+        elif args.command == "rows":
+            index = RowIndex.open(args.csv_file)
+            last_row = args.last_row or args.first_row
+            if not 2 <= args.first_row <= last_row:
+                parser.error("rows are numbered from 2, and last_row >= first_row")
+            with open(args.csv_file, "rb") as f:
+                header = f.read(index.offset(2))
+                f.seek(index.offset(args.first_row))
+                body = f.read(index.offset(last_row + 1) - index.offset(args.first_row))
+            sys.stdout.buffer.write(header + body)
+        else:
+            index = RowIndex.open(args.csv_file)
+            print(
+                json.dumps(
+                    [
+                        {"first_row": row_num, "rows": rows, "start": start, "end": end}
+                        for row_num, rows, start, end in index.shards(args.count)
+                    ],
+                    indent=2,
+                )
+            )
+    except OSError as e:
+        logging.error(f"Could not read {e.filename}: {e.strerror}")
+        sys.exit(1)
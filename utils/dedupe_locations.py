@@ -0,0 +1,580 @@
+#!/usr/bin/env uv run
+# /// script
+# dependencies = [
+#   "psycopg2-binary",
+#   "python-dotenv",
+#   "requests",
+# ]
+# ///
+"""
+Find and merge locations that are the same place written differently, such as
+"606 West Missouri" and "606 W. Missouri St". Addresses and names are normalized
+and locations are only compared with others in the same block (same locality and
+house number, or sharing a rare word), so a pass over 100k locations takes seconds.
+Merges can be proposed to a CSV for review and applied from it: each duplicate's
+activity links move to the location it is merged into, and its key is kept as an
+alias so later imports resolve it to that location too.
+"""
+
+import argparse
+import csv
+import logging
+import sys
+import time
+from collections import Counter
+from itertools import combinations
+
+import psycopg2
+from psycopg2.extras import execute_values
+from crosswalk_index import normalize, numbers, similarity, trigrams
+from load_data import DB_CONFIG, SCHEMA_NAME, refresh_aggregates
+from spatial import distance_m
+
+# Name similarity (Jaccard index of trigrams) two locations need to be merged
+DEFAULT_THRESHOLD = 0.8
+
+# Locations with coordinates farther apart than this are never merged
+MAX_DISTANCE_M = 250
+
+# Rare words of a name or address used as blocking keys
+BLOCKING_WORDS = 2
+
+# Blocks larger than this are skipped rather than compared pair by pair
+MAX_BLOCK_SIZE = 500
+
+# Street types left out of address keys, so "Missouri" and "Missouri Street" agree
+STREET_TYPES = {
+    "street",
+    "avenue",
+    "road",
+    "boulevard",
+    "drive",
+    "lane",
+    "place",
+    "square",
+}
+
+# Names and addresses starting with one of these words stand for a place that
+# wasn't identified ("unspecified", "Unknown", "neighborhood tavern"), so they
+# are treated as missing and can't be the reason two locations are merged
+PLACEHOLDER_WORDS = {
+    "unspecified",
+    "unknown",
+    "unnamed",
+    "unidentified",
+    "none",
+    "neighborhood",
+    "various",
+}
+
+# Columns of the proposals CSV
+PROPOSAL_COLUMNS = [
+    "cluster",
+    "location_id",
+    "merge_into",
+    "score",
+    "locality",
+    "street_address",
+    "location_name",
+    "location_type",
+    "activities",
+]
+
+SOUNDEX_CODES = {
+    **dict.fromkeys("bfpv", "1"),
+    **dict.fromkeys("cgjkqsxz", "2"),
+    **dict.fromkeys("dt", "3"),
+    "l": "4",
+    **dict.fromkeys("mn", "5"),
+    "r": "6",
+}
+
+
+def soundex(word):
+    """
+    American Soundex code of a word ("missouri" -> "M260"), so blocking keys
+    survive common misspellings. Words starting with a digit are returned as is.
+    """
+    if not word or not word[0].isalpha():
+        return word
+    code = word[0].upper()
+    previous = SOUNDEX_CODES.get(word[0], "")
+    for letter in word[1:]:
+        digit = SOUNDEX_CODES.get(letter, "")
+        if digit and digit != previous:
+            code += digit
+            if len(code) == 4:
+                break
+        if letter not in "hw":
+            previous = digit
+    return code.ljust(4, "0")
+
+
+def known(text):
+    """
+    Normalized name or address, or None if it is missing or a placeholder.
+    """
+    normalized = normalize(text)
+    if normalized is None or normalized.split()[0] in PLACEHOLDER_WORDS:
+        return None
+    return normalized
+
+
+def address_key(street_address):
+    """
+    Normalized address without street types, or None.
+    """
+    normalized = known(street_address)
+    if normalized is None:
+        return None
+    words = [word for word in normalized.split() if word not in STREET_TYPES]
+    return " ".join(words) or normalized
+
+
+def fetch_locations(cursor):
+    """
+    Return every location as a dict with its number of activity links, ordered by id.
+    """
+    cursor.execute(
+        f"""
+        SELECT l.id, l.locality, l.street_address, l.location_name, l.location_type,
+               l.latitude::float8, l.longitude::float8, COUNT(al.activity_id) AS activities
+        FROM {SCHEMA_NAME}.locations l
+        LEFT JOIN {SCHEMA_NAME}.activity_locations al ON al.location_id = l.id
+        GROUP BY l.id
+        ORDER BY l.id
+    """
+    )
+    columns = [col.name for col in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def prepare(locations):
+    """
+    Add the normalized forms compared by same_place() to each location.
+    Placeholder names and addresses count as missing.
+    """
+    for location in locations:
+        location["norm_locality"] = normalize(location["locality"])
+        location["norm_address"] = address_key(location["street_address"])
+        location["norm_name"] = known(location["location_name"])
+        location["name_grams"] = (
+            trigrams(location["norm_name"]) if location["norm_name"] else None
+        )
+        location["name_numbers"] = (
+            numbers(location["norm_name"]) if location["norm_name"] else None
+        )
+
+
+def blocks(locations):
+    """
+    Group location indexes by blocking key. Numbered addresses are blocked by
+    locality, house number and street, and names and unnumbered addresses by
+    locality and the Soundex code of each of their rarest words, so that only
+    locations that could be the same place are compared.
+    """
+    frequency = Counter()
+    for location in locations:
+        for text in (location["norm_name"], location["norm_address"]):
+            if text:
+                frequency.update(set(text.split()))
+
+    def rare_words(text):
+        words = sorted(set(text.split()), key=lambda word: (frequency[word], word))
+        return words[:BLOCKING_WORDS]
+
+    grouped = {}
+    for index, location in enumerate(locations):
+        locality = location["norm_locality"]
+        keys = set()
+        address = location["norm_address"]
+        if address:
+            words = address.split()
+            if words[0][0].isdigit():
+                street = rare_words(" ".join(words[1:])) if len(words) > 1 else [""]
+                keys.add(("number", locality, words[0], soundex(street[0])))
+            else:
+                keys.update(("word", locality, soundex(w)) for w in rare_words(address))
+        if location["norm_name"]:
+            keys.update(
+                ("word", locality, soundex(w))
+                for w in rare_words(location["norm_name"])
+            )
+        for key in keys:
+            grouped.setdefault(key, []).append(index)
+    return grouped
+
+
+def name_score(a, b, threshold):
+    """
+    Similarity of two locations' names: 1 if their normalized names are equal,
+    their trigram similarity if it is at least threshold and they have the same
+    numbers in them, otherwise None.
+    """
+    if a["norm_name"] == b["norm_name"]:
+        return 1.0
+    if a["name_numbers"] != b["name_numbers"]:
+        return None
+    score = similarity(a["name_grams"], b["name_grams"])
+    return score if score >= threshold else None
+
+
+def conflicting(a, b, threshold):
+    """
+    Whether two locations can't be the same place: different localities, different
+    addresses or names where both have one, or coordinates too far apart.
+    """
+    if a["norm_locality"] != b["norm_locality"]:
+        return True
+    if (
+        a["norm_address"]
+        and b["norm_address"]
+        and a["norm_address"] != b["norm_address"]
+    ):
+        return True
+    if a["norm_name"] and b["norm_name"] and name_score(a, b, threshold) is None:
+        return True
+    return (
+        a["latitude"] is not None
+        and b["latitude"] is not None
+        and distance_m(a["latitude"], a["longitude"], b["latitude"], b["longitude"])
+        > MAX_DISTANCE_M
+    )
+
+
+def same_place(a, b, threshold):
+    """
+    Score how likely two locations are the same place: the similarity of their
+    names, 1 if they only share an address, or None if they are different places
+    or nothing says they are the same. Besides not conflicting, they need
+    matching names, or equal addresses where one of them has no name.
+    """
+    if conflicting(a, b, threshold):
+        return None
+    if a["norm_name"] and b["norm_name"]:
+        return name_score(a, b, threshold)
+    if a["norm_address"] and b["norm_address"]:
+        return 1.0
+    return None
+
+
+def find_duplicates(locations, threshold=DEFAULT_THRESHOLD):
+    """
+    Cluster locations that are the same place. Returns the clusters of two or
+    more locations as lists of (location, score) pairs, where score is the best
+    score of the location against another member. The location to keep (the one
+    with coordinates, an address and a name, then the most activities and the
+    lowest id) comes first.
+    Two clusters are only joined if none of their members conflict, so a location
+    without an address can't join two locations with different addresses.
+    """
+    prepare(locations)
+    parent = list(range(len(locations)))
+    members = {}
+    scores = {}
+
+    def find(index):
+        while parent[index] != index:
+            parent[index] = parent[parent[index]]
+            index = parent[index]
+        return index
+
+    compared = 0
+    for key, block in blocks(locations).items():
+        if len(block) > MAX_BLOCK_SIZE:
+            logging.warning(
+                f"Skipped block {key} of {len(block)} locations; "
+                f"larger than {MAX_BLOCK_SIZE}"
+            )
+            continue
+        for i, j in combinations(block, 2):
+            # Pairs met again in another block, or already clustered, are skipped
+            root_i, root_j = find(i), find(j)
+            if root_i == root_j:
+                continue
+            compared += 1
+            score = same_place(locations[i], locations[j], threshold)
+            if score is None:
+                continue
+            cluster_i = members.get(root_i, [root_i])
+            cluster_j = members.get(root_j, [root_j])
+            if any(
+                conflicting(locations[a], locations[b], threshold)
+                for a in cluster_i
+                for b in cluster_j
+            ):
+                continue
+            scores[i] = max(scores.get(i, 0), score)
+            scores[j] = max(scores.get(j, 0), score)
+            parent[root_i] = root_j
+            members[root_j] = cluster_i + cluster_j
+            members.pop(root_i, None)
+    logging.info(f"Compared {compared} pairs of {len(locations)} locations")
+
+    clusters = []
+    for cluster in members.values():
+        clusters.append(
+            sorted(
+                ((locations[index], scores[index]) for index in cluster),
+                key=lambda item: (
+                    item[0]["latitude"] is None,
+                    item[0]["norm_address"] is None,
+                    item[0]["norm_name"] is None,
+                    -item[0]["activities"],
+                    item[0]["id"],
+                ),
+            )
+        )
+    clusters.sort(key=lambda cluster: cluster[0][0]["id"])
+    return clusters
+
+
+def write_proposals(clusters, path):
+    """
+    Write clusters to a CSV for review: one row per location, with the id of the
+    location it will be merged into, or an empty merge_into for the one kept.
+    Deleting a row keeps that location out of the merge.
+    """
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, PROPOSAL_COLUMNS, extrasaction="ignore")
+        writer.writeheader()
+        for number, cluster in enumerate(clusters, 1):
+            survivor = cluster[0][0]
+            for location, score in cluster:
+                writer.writerow(
+                    {
+                        **location,
+                        "cluster": number,
+                        "location_id": location["id"],
+                        "merge_into": "" if location is survivor else survivor["id"],
+                        "score": round(score, 3),
+                    }
+                )
+
+
+def read_proposals(path):
+    """
+    Read reviewed merges from a proposals CSV. Returns a dict of location id to the
+    id of the location it is merged into.
+    """
+    merges = {}
+    with open(path, "r", encoding="utf-8-sig") as f:
+        for row in csv.DictReader(f):
+            if row["merge_into"].strip():
+                merges[int(row["location_id"])] = int(row["merge_into"])
+    return merges
+
+
+def apply_merges(conn, merges):
+    """
+    Merge each location in merges into the location it maps to, in one transaction:
+    the location it is merged into gets coordinates, type and notes it was missing
+    and the highest visits, activity links are moved to it, the merged location's
+    key (and any aliases) become aliases of it, and the merged location is deleted.
+    Returns the number of locations merged.
+    """
+    # Follow chains, so merging A into B and B into C merges both into C
+    resolved = {}
+    for location_id in merges:
+        target = merges[location_id]
+        seen = {location_id}
+        while target in merges and target not in seen:
+            seen.add(target)
+            target = merges[target]
+        if target != location_id:
+            resolved[location_id] = target
+    if not resolved:
+        return 0
+
+    cursor = conn.cursor()
+    cursor.execute(
+        """
+        CREATE TEMP TABLE location_merges (
+            location_id INTEGER PRIMARY KEY,
+            merge_into INTEGER NOT NULL
+        ) ON COMMIT DROP
+    """
+    )
+    execute_values(
+        cursor,
+        "INSERT INTO location_merges (location_id, merge_into) VALUES %s",
+        list(resolved.items()),
+    )
+    # Drop merges whose locations no longer exist
+    cursor.execute(
+        f"""
+        DELETE FROM location_merges m
+        WHERE NOT EXISTS (SELECT 1 FROM {SCHEMA_NAME}.locations l WHERE l.id = m.location_id)
+        OR NOT EXISTS (SELECT 1 FROM {SCHEMA_NAME}.locations l WHERE l.id = m.merge_into)
+    """
+    )
+    if cursor.rowcount:
+        logging.warning(
+            f"Skipped {cursor.rowcount} merges of locations that no longer exist"
+        )
+
+    cursor.execute(
+        f"""
+        UPDATE {SCHEMA_NAME}.locations l
+        SET latitude = CASE WHEN l.latitude IS NULL AND l.longitude IS NULL
+                            THEN d.latitude ELSE l.latitude END,
+            longitude = CASE WHEN l.latitude IS NULL AND l.longitude IS NULL
+                             THEN d.longitude ELSE l.longitude END,
+            location_type = COALESCE(l.location_type, d.location_type),
+            location_notes = COALESCE(l.location_notes, d.location_notes),
+            visits = GREATEST(l.visits, d.visits)
+        FROM (
+            SELECT m.merge_into,
+                   (array_agg(x.latitude ORDER BY x.id) FILTER (
+                       WHERE x.latitude IS NOT NULL AND x.longitude IS NOT NULL))[1] AS latitude,
+                   (array_agg(x.longitude ORDER BY x.id) FILTER (
+                       WHERE x.latitude IS NOT NULL AND x.longitude IS NOT NULL))[1] AS longitude,
+                   (array_agg(x.location_type ORDER BY x.id) FILTER (
+                       WHERE x.location_type IS NOT NULL))[1] AS location_type,
+                   (array_agg(x.location_notes ORDER BY x.id) FILTER (
+                       WHERE x.location_notes IS NOT NULL))[1] AS location_notes,
+                   MAX(x.visits) AS visits
+            FROM location_merges m
+            JOIN {SCHEMA_NAME}.locations x ON x.id = m.location_id
+            GROUP BY m.merge_into
+        ) d
+        WHERE l.id = d.merge_into
+    """
+    )
+    cursor.execute(
+        f"""
+        INSERT INTO {SCHEMA_NAME}.activity_locations (activity_id, location_id)
+        SELECT DISTINCT al.activity_id, m.merge_into
+        FROM {SCHEMA_NAME}.activity_locations al
+        JOIN location_merges m ON m.location_id = al.location_id
+        ON CONFLICT DO NOTHING
+    """
+    )
+    cursor.execute(
+        f"""
+        UPDATE {SCHEMA_NAME}.location_aliases a
+        SET location_id = m.merge_into
+        FROM location_merges m
+        WHERE a.location_id = m.location_id
+    """
+    )
+    cursor.execute(
+        f"""
+        INSERT INTO {SCHEMA_NAME}.location_aliases (locality, street_address, location_name, location_id)
+        SELECT l.locality, l.street_address, l.location_name, m.merge_into
+        FROM location_merges m
+        JOIN {SCHEMA_NAME}.locations l ON l.id = m.location_id
+        ON CONFLICT DO NOTHING
+    """
+    )
+    # Deleting the locations also deletes their old activity links
+    cursor.execute(
+        f"""
+        DELETE FROM {SCHEMA_NAME}.locations
+        WHERE id IN (SELECT location_id FROM location_merges)
+    """
+    )
+    merged = cursor.rowcount
+    cursor.close()
+
+    # Commits the merges together with the activity counts they change
+    refresh_aggregates(conn)
+    return merged
+
+
+def dedupe_locations(
+    threshold=DEFAULT_THRESHOLD, output=None, apply=False, merges_file=None
+):
+    """
+    Find duplicate locations and log them, write them to output as a proposals CSV
+    if given, and merge them if apply is set. With merges_file, the merges in that
+    reviewed proposals CSV are applied instead.
+    Returns the number of locations merged.
+    """
+    conn = psycopg2.connect(**DB_CONFIG)
+    try:
+        if merges_file:
+            merges = read_proposals(merges_file)
+            logging.info(f"Read {len(merges)} merges from {merges_file}")
+        else:
+            cursor = conn.cursor()
+            locations = fetch_locations(cursor)
+            cursor.close()
+            start = time.perf_counter()
+            clusters = find_duplicates(locations, threshold)
+            duplicates = sum(len(cluster) - 1 for cluster in clusters)
+            logging.info(
+                f"Found {len(clusters)} groups of duplicate locations "
+                f"({duplicates} to merge) in {time.perf_counter() - start:.2f}s"
+            )
+            for cluster in clusters:
+                survivor = cluster[0][0]
+                for location, score in cluster[1:]:
+                    logging.info(
+                        f"Location {location['id']} {location['locality']} | "
+                        f"{location['street_address']} | {location['location_name']} "
+                        f"-> {survivor['id']} {survivor['locality']} | "
+                        f"{survivor['street_address']} | {survivor['location_name']} "
+                        f"(score {score:.2f})"
+                    )
+            if output:
+                write_proposals(clusters, output)
+                logging.info(f"Wrote proposed merges to {output}")
+            merges = {
+                location["id"]: cluster[0][0]["id"]
+                for cluster in clusters
+                for location, _ in cluster[1:]
+            }
+
+        if not (apply or merges_file):
+            return 0
+        merged = apply_merges(conn, merges)
+        logging.info(f"Merged {merged} locations")
+        return merged
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Find and merge duplicate locations.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  %(prog)s
+  %(prog)s --output merges.csv
+  %(prog)s --apply
+  %(prog)s --apply-file merges.csv
+        """,
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help=f"Similarity from 0 to 1 two names need to be the same place (default: {DEFAULT_THRESHOLD})",
+    )
+    parser.add_argument(
+        "--output", help="Write the proposed merges to this CSV for review"
+    )
+    parser.add_argument(
+        "--apply",
+        action="store_true",
+        default=False,
+        help="Merge the duplicates found (default: only report them)",
+    )
+    parser.add_argument(
+        "--apply-file",
+        help="Merge the locations in this reviewed proposals CSV instead of searching",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s - %(message)s")
+
+    try:
+        dedupe_locations(args.threshold, args.output, args.apply, args.apply_file)
+    except psycopg2.Error as e:
+        logging.error(f"Database error: {e}")
+        sys.exit(1)
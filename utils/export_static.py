@@ -0,0 +1,346 @@
+#!/usr/bin/env uv run
+# /// script
+# dependencies = [
+#   "psycopg2-binary",
+#   "python-dotenv",
+#   "requests",
+# ]
+# ///
+"""
+Export precomputed JSON for the website's map, activities and visualization pages.
+Writes a GeoJSON of locations with their activity counts, one shard of activities
+per location, a compact activities index and the activity count tables into the
+Hugo static tree. File names carry a hash of their content, so they can be cached
+forever, and a manifest.json points at the current ones. Files are also written
+gzip-compressed, and brotli-compressed if the brotli package is installed.
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import psycopg2
+from load_data import DB_CONFIG, SCHEMA_NAME
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; only .gz files are written without it
+    brotli = None
+
+# Hugo copies static/ into the site as is, so these are served from /data/
+DEFAULT_OUTPUT_DIR = (
+    Path(__file__).resolve().parent.parent / "detectives-website" / "static" / "data"
+)
+
+# Bytes of the content hash put in file names (hex-encoded, so twice as many characters)
+HASH_BYTES = 8
+
+# Files smaller than this are not worth compressing
+MIN_COMPRESS_BYTES = 1024
+
+# Decimal places kept for coordinates (6 is about 10 cm)
+COORDINATE_PRECISION = 6
+
+# Activity fields in the order they appear in the activities index
+INDEX_COLUMNS = [
+    "id",
+    "date",
+    "time",
+    "operative",
+    "subject",
+    "activity",
+    "mode",
+    "activity_notes",
+    "location_ids",
+]
+
+# Hashed files this script writes, for pruning ones the manifest no longer names
+ARTIFACT_RE = re.compile(
+    rf"\.[0-9a-f]{{{HASH_BYTES * 2}}}\.(json|geojson)(\.gz|\.br)?$"
+)
+
+
+def fetch_locations(cursor):
+    """
+    Return every location as a dict keyed by id, in the shape the API returns them.
+    """
+    cursor.execute(
+        f"""
+        SELECT id, locality, street_address, location_name, location_type, location_notes,
+               latitude::float8, longitude::float8, visits
+        FROM {SCHEMA_NAME}.locations
+        ORDER BY id
+    """
+    )
+    locations = {}
+    for row in cursor.fetchall():
+        location = dict(zip([col.name for col in cursor.description], row))
+        for coordinate in ("latitude", "longitude"):
+            if location[coordinate] is not None:
+                location[coordinate] = round(location[coordinate], COORDINATE_PRECISION)
+        locations[location["id"]] = location
+    return locations
+
+
+def fetch_activities(cursor):
+    """
+    Return every activity as a dict with the ids of its locations, ordered by id.
+    Dates, times and durations are rendered as text by Postgres.
+    """
+    cursor.execute(
+        f"""
+        SELECT a.id, a.source, a.operative, a.date::text, a.time::text,
+               a.duration::text, a.activity, a.mode, a.activity_notes, a.subject,
+               a.information, a.information_type, a.edited, a.edit_type,
+               COALESCE(
+                   array_agg(al.location_id ORDER BY al.location_id)
+                       FILTER (WHERE al.location_id IS NOT NULL),
+                   '{{}}'
+               ) AS location_ids
+        FROM {SCHEMA_NAME}.activities a
+        LEFT JOIN {SCHEMA_NAME}.activity_locations al ON al.activity_id = a.id
+        GROUP BY a.id
+        ORDER BY a.id
+    """
+    )
+    columns = [col.name for col in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def fetch_aggregates(cursor):
+    """
+    Return the activity count tables as lists of rows, keyed by what they count by.
+    """
+    tables = {
+        "hour": ("activity_counts_by_hour", "hour"),
+        "date": ("activity_counts_by_date", "date::text"),
+        "month": ("activity_counts_by_month", "month::text"),
+        "location": ("activity_counts_by_location", "location_id"),
+        "operative": ("activity_counts_by_operative", "operative, activity"),
+    }
+    aggregates = {}
+    for key, (table, columns) in tables.items():
+        cursor.execute(
+            f"""
+            SELECT {columns}, activity_count FROM {SCHEMA_NAME}.{table}
+            ORDER BY {columns}
+        """
+        )
+        aggregates[key] = [list(row) for row in cursor.fetchall()]
+    return aggregates
+
+
+def write_artifact(output_dir, name, data, written):
+    """
+    Write data as compact JSON to output_dir under name with a content hash
+    inserted before the extension ("locations.geojson" -> "locations.<hash>.geojson"),
+    plus compressed copies. Files that already exist have the same content and are
+    left alone. Adds every file written or kept to the written set and returns the
+    name relative to output_dir.
+    """
+    body = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    digest = hashlib.blake2b(body, digest_size=HASH_BYTES).hexdigest()
+    stem, extension = name.rsplit(".", 1)
+    hashed_name = f"{stem}.{digest}.{extension}"
+
+    variants = {hashed_name: lambda: body}
+    if len(body) >= MIN_COMPRESS_BYTES:
+        variants[f"{hashed_name}.gz"] = lambda: gzip.compress(
+            body, compresslevel=9, mtime=0
+        )
+        if brotli:
+            variants[f"{hashed_name}.br"] = lambda: brotli.compress(body, quality=11)
+
+    for variant, encode in variants.items():
+        path = output_dir / variant
+        written.add(path)
+        if path.exists():
+            continue
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(encode())
+
+    return hashed_name
+
+
+def prune(output_dir, keep):
+    """
+    Delete hashed files in output_dir that are not in keep. Returns the number deleted.
+    """
+    deleted = 0
+    for path in output_dir.rglob("*"):
+        if path.is_file() and ARTIFACT_RE.search(path.name) and path not in keep:
+            path.unlink()
+            deleted += 1
+    return deleted
+
+
+def export_static(output_dir=DEFAULT_OUTPUT_DIR, keep_stale=False):
+    """
+    Export the locations GeoJSON, per-location activity shards and the activities
+    index from the database into output_dir, then point manifest.json at them.
+    Returns the manifest.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    conn = psycopg2.connect(**DB_CONFIG)
+    try:
+        cursor = conn.cursor()
+        locations = fetch_locations(cursor)
+        activities = fetch_activities(cursor)
+        aggregates = fetch_aggregates(cursor)
+        cursor.close()
+    finally:
+        conn.close()
+    logging.info(
+        f"Read {len(activities)} activities and {len(locations)} locations from the database"
+    )
+
+    # Shards hold full activities, with their locations, as the API returns them
+    shards = {}
+    for activity in activities:
+        full_activity = dict(activity)
+        full_activity["locations"] = [
+            locations[location_id] for location_id in full_activity.pop("location_ids")
+        ]
+        for location_id in activity["location_ids"]:
+            shards.setdefault(location_id, []).append(full_activity)
+
+    written = set()
+    shard_files = {
+        location_id: write_artifact(
+            output_dir, f"locations/{location_id}.json", shard, written
+        )
+        for location_id, shard in shards.items()
+    }
+
+    features = []
+    for location_id, shard in shards.items():
+        location = locations[location_id]
+        if location["latitude"] is None or location["longitude"] is None:
+            continue
+        activity_types = {}
+        for activity in shard:
+            if activity["activity"]:
+                activity_types[activity["activity"]] = (
+                    activity_types.get(activity["activity"], 0) + 1
+                )
+        features.append(
+            {
+                "type": "Feature",
+                "id": location_id,
+                "geometry": {
+                    "type": "Point",
+                    "coordinates": [location["longitude"], location["latitude"]],
+                },
+                "properties": {
+                    "id": location_id,
+                    "locality": location["locality"],
+                    "street_address": location["street_address"],
+                    "location_name": location["location_name"],
+                    "location_type": location["location_type"],
+                    "visits": location["visits"],
+                    "activity_count": len(shard),
+                    "activity_types": activity_types,
+                    "shard": shard_files[location_id],
+                },
+            }
+        )
+    locations_file = write_artifact(
+        output_dir,
+        "locations.geojson",
+        {"type": "FeatureCollection", "features": features},
+        written,
+    )
+
+    # The index lists activities as rows of INDEX_COLUMNS and their locations once
+    index = {
+        "columns": INDEX_COLUMNS,
+        "rows": [[activity[col] for col in INDEX_COLUMNS] for activity in activities],
+        "locations": {
+            location_id: {
+                key: locations[location_id][key]
+                for key in ("locality", "location_name", "location_type", "visits")
+            }
+            for location_id in shards
+        },
+    }
+    activities_file = write_artifact(output_dir, "activities.json", index, written)
+    aggregates_file = write_artifact(output_dir, "aggregates.json", aggregates, written)
+
+    manifest = {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "activities": activities_file,
+        "locations": locations_file,
+        "aggregates": aggregates_file,
+        "location_activities": {
+            str(location_id): shard_file
+            for location_id, shard_file in sorted(shard_files.items())
+        },
+        "counts": {
+            "activities": len(activities),
+            "locations": len(features),
+            "shards": len(shard_files),
+        },
+    }
+    # Written last and replaced atomically, so the manifest never names a missing file
+    manifest_path = output_dir / "manifest.json"
+    tmp_path = output_dir / "manifest.json.tmp"
+    tmp_path.write_text(
+        json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8"
+    )
+    os.replace(tmp_path, manifest_path)
+
+    logging.info(
+        f"Wrote {len(features)} mapped locations, {len(shard_files)} location shards "
+        f"and an index of {len(activities)} activities to {output_dir}"
+    )
+    if not brotli:
+        logging.info("brotli is not installed; only gzip copies were written")
+
+    if not keep_stale:
+        deleted = prune(output_dir, written)
+        if deleted:
+            logging.info(f"Deleted {deleted} files from earlier exports")
+
+    return manifest
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Export precomputed map and activities data for the website.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  %(prog)s
+  %(prog)s --output /tmp/pinkertons-data
+  %(prog)s --keep-stale
+        """,
+    )
+    parser.add_argument(
+        "--output",
+        default=DEFAULT_OUTPUT_DIR,
+        help="Directory to write the files to (default: detectives-website/static/data)",
+    )
+    parser.add_argument(
+        "--keep-stale",
+        action="store_true",
+        default=False,
+        help="Keep files from earlier exports instead of deleting them",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s - %(message)s")
+
+    try:
+        export_static(args.output, args.keep_stale)
+    except psycopg2.Error as e:
+        logging.error(f"Database error: {e}")
+        sys.exit(1)
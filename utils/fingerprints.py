@@ -0,0 +1,200 @@
+"""
+Content fingerprints of imported rows for incremental loads.
+Each activity row and crosswalk entry is hashed and the hashes are kept in the
+import_fingerprints table per source file, so a re-import only has to apply
+rows that were added, changed or removed since the last run. Whole files are
+hashed too, so an interrupted import is only resumed on the same file.
+"""
+
+import hashlib
+import json
+import logging
+import os
+
+from dotenv import load_dotenv
+from psycopg2.extras import execute_values
+
+load_dotenv()
+
+SCHEMA_NAME = os.getenv("DB_SCHEMA", "detectives")
+
+# Bump when the loader's parsing changes so every row is reloaded once
+FINGERPRINT_VERSION = b"1"
+
+
+def row_fingerprint(row):
+    """
+    Hash a CSV row (as read by csv.DictReader). Columns are hashed by name, so
+    reordering the columns of the export doesn't change the fingerprint.
+    """
+    digest = hashlib.blake2b(FINGERPRINT_VERSION, digest_size=16)
+    for column in sorted(k for k in row if k is not None):
+        value = row[column] or ""
+        digest.update(column.encode())
+        digest.update(b"\x1f")
+        digest.update(value.replace("\r\n", "\n").encode())
+        digest.update(b"\x1e")
+    return digest.digest()
+
+
+def file_fingerprint(path, block_size=1 << 20):
+    """
+    Hash a file's bytes. Returns the hex digest.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        while block := f.read(block_size):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def crosswalk_key(key):
+    """
+    Text form of a crosswalk (location_name, locality) key.
+    """
+    return json.dumps(list(key), ensure_ascii=False)
+
+
+def crosswalk_fingerprint(entry):
+    """
+    Hash a crosswalk entry as returned by load_crosswalk_data.
+    """
+    payload = json.dumps(entry, sort_keys=True).encode()
+    return hashlib.blake2b(FINGERPRINT_VERSION + payload, digest_size=16).digest()
+
+
+def diff_crosswalk(stored, crosswalk):
+    """
+    Compare crosswalk entries with their stored fingerprints.
+    Returns tuple of (fingerprints, dirty, counts): the current fingerprints keyed
+    by crosswalk_key, the (location_name, locality) keys that were added, changed
+    or removed, and how many of each there were.
+    """
+    fingerprints = {}
+    dirty = set()
+    counts = {"added": 0, "changed": 0, "removed": 0}
+
+    for key, entry in crosswalk.items():
+        text_key = crosswalk_key(key)
+        fingerprint = crosswalk_fingerprint(entry)
+        fingerprints[text_key] = fingerprint
+        previous = stored.get(text_key)
+        if previous is None:
+            counts["added"] += 1
+            dirty.add(key)
+        elif previous != fingerprint:
+            counts["changed"] += 1
+            dirty.add(key)
+
+    for text_key in stored:
+        if text_key not in fingerprints:
+            counts["removed"] += 1
+            dirty.add(tuple(json.loads(text_key)))
+
+    return fingerprints, frozenset(dirty), counts
+
+
+class RowDiff:
+    """
+    Classifies rows against the fingerprints of the previous import.
+    dirty_crosswalk is a CrosswalkIndex of the crosswalk keys that changed; rows
+    any of them would match are changed too.
+    Plain data only, so it can be handed to parse worker processes.
+    """
+
+    def __init__(self, known, dirty_crosswalk=None):
+        self.known = known
+        self.dirty_crosswalk = dirty_crosswalk
+
+    def check(self, activity_id, row):
+        """
+        Returns tuple of (fingerprint, status); status is "new", "changed" or
+        "unchanged". A row whose crosswalk entry changed counts as changed.
+        """
+        fingerprint = row_fingerprint(row)
+        previous = self.known.get(activity_id)
+        if previous is None:
+            return fingerprint, "new"
+        if previous != fingerprint:
+            return fingerprint, "changed"
+
+        if self.dirty_crosswalk and self.dirty_crosswalk.match(
+            row["Location Name"] or None, row["Locality"] or None
+        ):
+            return fingerprint, "changed"
+
+        return fingerprint, "unchanged"
+
+
+class FingerprintStore:
+    """
+    Reads and writes the import_fingerprints rows of one source file.
+    Added fingerprints are buffered and written by flush(), inside the caller's
+    transaction, so they only persist together with the rows they describe.
+    """
+
+    def __init__(self, cursor, source_file):
+        self.cursor = cursor
+        self.source_file = source_file
+        self.pending = {}
+
+    def load(self, kind):
+        """
+        Return the stored fingerprints of one kind as a dict keyed by key.
+        """
+        self.cursor.execute(
+            f"""
+            SELECT key, fingerprint FROM {SCHEMA_NAME}.import_fingerprints
+            WHERE source_file = %s AND kind = %s
+        """,
+            (self.source_file, kind),
+        )
+        return {key: bytes(fingerprint) for key, fingerprint in self.cursor.fetchall()}
+
+    def add(self, kind, key, fingerprint):
+        self.pending[(kind, str(key))] = fingerprint
+
+    def flush(self):
+        """
+        Write buffered fingerprints. Returns the number written.
+        """
+        if not self.pending:
+            return 0
+
+        execute_values(
+            self.cursor,
+            f"""
+            INSERT INTO {SCHEMA_NAME}.import_fingerprints (source_file, kind, key, fingerprint)
+            VALUES %s
+            ON CONFLICT (source_file, kind, key) DO UPDATE SET
+                fingerprint = EXCLUDED.fingerprint,
+                updated_at = CURRENT_TIMESTAMP
+        """,
+            [
+                (self.source_file, kind, key, fingerprint)
+                for (kind, key), fingerprint in self.pending.items()
+            ],
+            page_size=1000,
+        )
+        count = len(self.pending)
+        self.pending = {}
+        return count
+
+    def rollback(self):
+        self.pending = {}
+
+    def delete(self, kind, keys):
+        """
+        Forget the fingerprints of the given keys.
+        """
+        keys = [str(key) for key in keys]
+        if not keys:
+            return
+        self.cursor.execute(
+            f"""
+            DELETE FROM {SCHEMA_NAME}.import_fingerprints
+            WHERE source_file = %s AND kind = %s AND key = ANY(%s)
+        """,
+            (self.source_file, kind, keys),
+        )
+        logging.debug(f"Fingerprints: forgot {len(keys)} {kind} entries")
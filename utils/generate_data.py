@@ -0,0 +1,453 @@
+#!/usr/bin/env uv run
+"""
+Generate synthetic Pinkerton activity and crosswalk CSV files for benchmarking.
+Files have the same columns as data/el_paso.csv and data/crosswalk.csv, and
+values repeat the way they do in the transcriptions: a few operatives, localities
+and locations account for most rows, most durations and modes are empty, and
+dates come in runs.
+"""
+
+import argparse
+import csv
+import itertools
+import logging
+import random
+from datetime import date, timedelta
+from pathlib import Path
+
+ACTIVITY_HEADER = [
+    "ID",
+    "Source",
+    "Operative",
+    "Date",
+    "Time",
+    "Duration",
+    "Activity",
+    "Mode",
+    "Activity Notes",
+    "Subject",
+    "Locality",
+    "Street Address",
+    "Location Name",
+    "Location Type",
+    "Location Notes",
+    "Information",
+    "Information Type",
+    "Edited",
+    "Edit Type",
+]
+
+CROSSWALK_HEADER = [
+    "Location Name",
+    "Locality",
+    "Type",
+    "Street Address",
+    "Longitude",
+    "Latitude",
+    "",
+    "Visits (can be multiple per day)",
+]
+
+# (locality, latitude, longitude), most frequent first
+LOCALITIES = [
+    ("El Paso", 31.7587, -106.4869),
+    ("Smeltertown_Lower", 31.7730, -106.5270),
+    ("Smeltertown_Upper", 31.7790, -106.5300),
+    ("Ciudad Juárez", 31.6904, -106.4245),
+    ("Las Cruces", 32.3199, -106.7637),
+    ("Ysleta", 31.6890, -106.3230),
+    ("Anthony", 31.9993, -106.6056),
+    ("Canutillo", 31.9118, -106.6017),
+    ("Fabens", 31.5023, -106.1586),
+    ("Deming", 32.2687, -107.7586),
+    ("Lordsburg", 32.3504, -108.7087),
+    ("Clint", 31.5923, -106.2244),
+    ("San Elizario", 31.5851, -106.2725),
+    ("Alamogordo", 32.8995, -105.9603),
+    ("Tucson", 32.2226, -110.9747),
+    ("Douglas", 31.3445, -109.5453),
+    ("Bisbee", 31.4482, -109.9284),
+    ("Marfa", 30.3094, -104.0206),
+    ("Van Horn", 31.0399, -104.8307),
+    ("Sierra Blanca", 31.1743, -105.3572),
+]
+
+STREETS = [
+    "El Paso Street",
+    "Missouri Street",
+    "Oregon Street",
+    "Stanton Street",
+    "Overland Street",
+    "Santa Fe Street",
+    "Kansas Street",
+    "Yandell Street",
+    "Alameda Avenue",
+    "Mesa Street",
+    "Texas Street",
+    "Magoffin Avenue",
+    "Paisano Drive",
+    "Highway 80",
+]
+DIRECTIONS = ["", "North ", "South ", "East ", "West "]
+
+LOCATION_TYPES = [
+    "Bar",
+    "Apartment House",
+    "Highway",
+    "Hotel",
+    "Cafe",
+    "Residence",
+    "Street",
+    "Store",
+    "Taxi Stand",
+    "Pool Hall",
+    "Union Hall",
+    "Smelter",
+    "Church",
+    "Garage",
+    "Dance Hall",
+]
+
+FIRST_NAMES = [
+    "Luis",
+    "Eddie",
+    "Refugio",
+    "Jose",
+    "Agustin",
+    "Benito",
+    "Candelario",
+    "Daniel",
+    "David",
+    "Eduardo",
+    "Maria",
+    "Juana",
+    "Pancho",
+    "Ramon",
+    "Manuel",
+    "Guadalupe",
+    "Felipe",
+    "Rosa",
+    "Carmen",
+    "Pedro",
+]
+LAST_NAMES = [
+    "Natera",
+    "Cadena",
+    "Hernandez",
+    "Lopez",
+    "Crezco",
+    "Sanchez",
+    "Rodriguez",
+    "Mares",
+    "Castaneda",
+    "Martinez",
+    "Garcia",
+    "Elliott",
+    "Harte",
+    "Gonzalez",
+    "Flores",
+    "Torres",
+    "Ramirez",
+    "Rivera",
+    "Morales",
+    "Ortiz",
+]
+
+ACTIVITIES = ["Surveillance", "Shadowing", "Roping", "Search", "Meeting", "Report"]
+DURATIONS = [
+    "2h",
+    "1h30m",
+    "14h ",
+    "1h",
+    "3h",
+    "45m",
+    "[10h total]",
+    "5h45m",
+    "30m",
+    "8h",
+    "2h15m",
+    "12h",
+]
+TEXT_TIMES = ["Evening", "Afternoon", "Morning"]
+NOTE_PHRASES = [
+    "No contacts",
+    "No automobiles",
+    "making new acquaintances among workers",
+    "walked to catch bus to smelter",
+    "visited several bars",
+    "talked with union members",
+    "remained at home",
+    "went downtown",
+]
+LOCATION_NOTE_PHRASES = [
+    "Name from City Directory, p714 / Ancestry, 316",
+    "City Directory, 679",
+    "in vicinity of Pueblo Courts",
+    "approximate location",
+]
+
+FIRST_DATE = date(1939, 6, 1)
+LAST_DATE = date(1941, 12, 31)
+
+
+def parse_count(value):
+    """
+    Parse a row count like '5000', '10k' or '1M'.
+    """
+    value = value.strip().lower()
+    multiplier = 1
+    if value.endswith("k"):
+        multiplier, value = 1_000, value[:-1]
+    elif value.endswith("m"):
+        multiplier, value = 1_000_000, value[:-1]
+    return int(float(value) * multiplier)
+
+
+def count_label(count):
+    """
+    Short label for a row count, used in file names (1000 -> '1k').
+    """
+    if count % 1_000_000 == 0:
+        return f"{count // 1_000_000}M"
+    if count % 1_000 == 0:
+        return f"{count // 1_000}k"
+    return str(count)
+
+
+class WeightedPool:
+    """
+    A list of values drawn with Zipf-like weights: the value at rank r is picked
+    with probability proportional to 1 / r**skew.
+    """
+
+    def __init__(self, values, skew=1.1):
+        self.values = list(values)
+        self.cum_weights = list(
+            itertools.accumulate(
+                1 / (rank**skew) for rank in range(1, len(self.values) + 1)
+            )
+        )
+
+    def pick(self, rng):
+        return rng.choices(self.values, cum_weights=self.cum_weights)[0]
+
+
+def _person(rng):
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+
+
+def _build_locations(rng, count):
+    """
+    Build the pool of distinct locations rows point at.
+    Each is a dict with the location columns plus the coordinates used for the crosswalk.
+    """
+    localities = WeightedPool(LOCALITIES, skew=1.3)
+    seen = set()
+    locations = []
+    attempts = 0
+    while len(locations) < count and attempts < count * 20:
+        attempts += 1
+        locality, base_lat, base_lon = localities.pick(rng)
+        street = ""
+        if rng.random() < 0.55:
+            street = f"{rng.randint(100, 1999)} {rng.choice(DIRECTIONS)}{rng.choice(STREETS)}"
+        location_type = rng.choice(LOCATION_TYPES)
+        name = ""
+        if rng.random() < 0.87:
+            name = rng.choice(
+                [
+                    f"{rng.choice(LAST_NAMES)}'s {location_type}",
+                    f"Hotel {rng.choice(LAST_NAMES)}",
+                    f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} Residence",
+                    street or f"{rng.choice(STREETS)}",
+                ]
+            )
+            if len(locations) > 500:
+                # Keep names distinct enough at large scales
+                name = f"{name} #{rng.randint(1, count)}"
+        key = (locality, street, name)
+        if key in seen or not any(key):
+            continue
+        seen.add(key)
+
+        latitude = round(base_lat + rng.uniform(-0.03, 0.03), 6)
+        longitude = round(base_lon + rng.uniform(-0.03, 0.03), 6)
+        notes = ""
+        roll = rng.random()
+        if roll < 0.08:
+            notes = f"{latitude}, {longitude}"
+        elif roll < 0.17:
+            notes = rng.choice(LOCATION_NOTE_PHRASES)
+
+        locations.append(
+            {
+                "locality": locality if rng.random() > 0.05 else "",
+                "street": street,
+                "name": name,
+                "type": location_type if rng.random() > 0.1 else "",
+                "notes": notes,
+                "latitude": latitude,
+                "longitude": longitude,
+            }
+        )
+    return locations
+
+
+def generate(rows, output_dir, seed=1939, crosswalk_share=0.5):
+    """
+    Write activities_<n>.csv and crosswalk_<n>.csv into output_dir.
+    Returns tuple of (activities path, crosswalk path).
+    """
+    rng = random.Random(seed)
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    label = count_label(rows)
+    activities_path = output_dir / f"activities_{label}.csv"
+    crosswalk_path = output_dir / f"crosswalk_{label}.csv"
+
+    locations = _build_locations(rng, max(50, min(rows // 4, 200_000)))
+    location_pool = WeightedPool(locations, skew=1.05)
+
+    operative_count = 12 + rows // 20_000
+    operative_pool = WeightedPool(
+        [f"#{n}" for n in rng.sample(range(1, operative_count * 5), operative_count)],
+        skew=1.4,
+    )
+    subject_pool = WeightedPool(
+        [_person(rng) for _ in range(max(40, min(rows // 15, 5000)))], skew=1.2
+    )
+    duration_pool = WeightedPool(DURATIONS, skew=0.8)
+    activity_pool = WeightedPool(ACTIVITIES, skew=1.2)
+
+    # Dates come in runs: most rows fall on a limited set of busy days
+    days = [
+        FIRST_DATE + timedelta(days=n) for n in range((LAST_DATE - FIRST_DATE).days + 1)
+    ]
+    rng.shuffle(days)
+    date_pool = WeightedPool(days[: max(30, min(len(days), rows // 10))], skew=0.9)
+
+    with open(activities_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(ACTIVITY_HEADER)
+        for activity_id in range(1, rows + 1):
+            operative = operative_pool.pick(rng)
+            if rng.random() < 0.2:
+                operative = f"{operative} & {operative_pool.pick(rng)}"
+
+            day = date_pool.pick(rng).isoformat()
+            if rng.random() < 0.2:
+                day = f"{day} 0:00:00"
+
+            roll = rng.random()
+            if roll < 0.35:
+                time_value = ""
+            elif roll < 0.4:
+                time_value = rng.choice(TEXT_TIMES)
+            else:
+                time_value = (
+                    f"{rng.randint(5, 23)}:{rng.choice(['00', '15', '30', '45'])}"
+                )
+
+            subject = ""
+            if rng.random() < 0.3:
+                subject = subject_pool.pick(rng)
+                if rng.random() < 0.15:
+                    subject += rng.choice([", ", " & "]) + subject_pool.pick(rng)
+
+            location = (
+                location_pool.pick(rng)
+                if rng.random() > 0.07
+                else {"locality": "", "street": "", "name": "", "type": "", "notes": ""}
+            )
+
+            edited = ""
+            edit_type = ""
+            if rng.random() < 0.02:
+                edited = rng.choice(["Yes", "No"])
+                edit_type = "Cut + addition" if edited == "Yes" else ""
+
+            writer.writerow(
+                [
+                    activity_id,
+                    "",
+                    operative,
+                    day,
+                    time_value,
+                    duration_pool.pick(rng) if rng.random() < 0.25 else "",
+                    activity_pool.pick(rng),
+                    rng.choice(["In car", "On foot"]) if rng.random() < 0.13 else "",
+                    f"{rng.choice(NOTE_PHRASES)} ({activity_id % 97})"
+                    if rng.random() < 0.93
+                    else "",
+                    subject,
+                    location["locality"],
+                    location["street"],
+                    location["name"],
+                    location["type"],
+                    location["notes"],
+                    rng.choice(["Yes", "No"]) if rng.random() < 0.05 else "",
+                    "",
+                    edited,
+                    edit_type,
+                ]
+            )
+
+    with open(crosswalk_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(CROSSWALK_HEADER)
+        for location in locations:
+            if not location["name"] or rng.random() > crosswalk_share:
+                continue
+            writer.writerow(
+                [
+                    location["name"],
+                    location["locality"],
+                    location["type"],
+                    location["street"],
+                    location["longitude"],
+                    location["latitude"],
+                    "",
+                    max(1, int(rng.paretovariate(1.5))),
+                ]
+            )
+
+    logging.info(
+        f"Wrote {rows} activities to {activities_path} and crosswalk to {crosswalk_path}"
+    )
+    return activities_path, crosswalk_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Generate synthetic activity and crosswalk CSV files.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  %(prog)s --rows 10k
+  %(prog)s --rows 1M --output /tmp/pinkertons --seed 7
+        """,
+    )
+    parser.add_argument(
+        "--rows",
+        type=parse_count,
+        default=parse_count("10k"),
+        help="Number of activity rows, e.g. 1000, 50k, 1M (default: 10k)",
+    )
+    parser.add_argument(
+        "--output",
+        default="data/synthetic",
+        help="Directory the files are written to (default: data/synthetic)",
+    )
+    parser.add_argument(
+        "--seed", type=int, default=1939, help="Random seed (default: 1939)"
+    )
+    parser.add_argument(
+        "--crosswalk-share",
+        type=float,
+        default=0.5,
+        help="Share of named locations listed in the crosswalk (default: 0.5)",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s - %(message)s")
+    generate(args.rows, args.output, args.seed, args.crosswalk_share)
@@ -0,0 +1,371 @@
+#!/usr/bin/env uv run
+# /// script
+# dependencies = [
+#   "python-dotenv",
+# ]
+# ///
+"""
+Persistent on-disk cache for geocoding results.
+Stores hits and misses in a local SQLite file, keyed on (query, allowed_states),
+so repeated imports don't pay the Nominatim rate limit again for queries that
+were already looked up. A warmed cache can be exported to a JSON lines file and
+imported on another machine.
+"""
+
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from typing import Optional, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Cache file location; set to an empty string to disable the persistent cache
+GEOCODE_CACHE_PATH = os.getenv("GEOCODE_CACHE_PATH", "geocode_cache.sqlite3")
+
+# How long found and not-found results stay valid, in days
+GEOCODE_CACHE_TTL_DAYS = float(os.getenv("GEOCODE_CACHE_TTL_DAYS", "365"))
+GEOCODE_CACHE_NEGATIVE_TTL_DAYS = float(
+    os.getenv("GEOCODE_CACHE_NEGATIVE_TTL_DAYS", "30")
+)
+
+# Maximum number of entries kept; least recently used entries are evicted first
+GEOCODE_CACHE_MAX_ENTRIES = int(os.getenv("GEOCODE_CACHE_MAX_ENTRIES", "100000"))
+
+# Check the size bound after this many writes rather than on every write
+EVICTION_CHECK_INTERVAL = 100
+
+SECONDS_PER_DAY = 86400
+
+
+def _states_key(allowed_states: Optional[Tuple[str, ...]]) -> str:
+    """
+    Normalize allowed states into the string stored in the cache key.
+    """
+    return ",".join(allowed_states) if allowed_states else ""
+
+
+class GeocodeCache:
+    """
+    SQLite-backed cache of geocoding results.
+    Safe to share between threads; all access goes through one connection
+    guarded by a lock.
+    """
+
+    def __init__(
+        self,
+        path: str = GEOCODE_CACHE_PATH,
+        ttl_days: float = GEOCODE_CACHE_TTL_DAYS,
+        negative_ttl_days: float = GEOCODE_CACHE_NEGATIVE_TTL_DAYS,
+        max_entries: int = GEOCODE_CACHE_MAX_ENTRIES,
+    ):
+        self.path = path
+        self.ttl = ttl_days * SECONDS_PER_DAY
+        self.negative_ttl = negative_ttl_days * SECONDS_PER_DAY
+        self.max_entries = max_entries
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # Every hit updates accessed_at; in WAL mode NORMAL only syncs at
+        # checkpoints, so a power loss can at worst drop recent cache entries
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS geocode_cache (
+                query TEXT NOT NULL,
+                allowed_states TEXT NOT NULL,
+                found INTEGER NOT NULL,
+                latitude REAL,
+                longitude REAL,
+                response TEXT,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                PRIMARY KEY (query, allowed_states)
+            )
+        """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_geocode_cache_accessed ON geocode_cache (accessed_at)"
+        )
+        self._conn.commit()
+
+    def get(
+        self, query: str, allowed_states: Optional[Tuple[str, ...]] = None
+    ) -> Tuple[bool, Optional[Tuple[float, float]]]:
+        """
+        Look up a cached result.
+
+        Returns:
+            Tuple of (hit, coordinates). hit is False if the query is not cached
+            or its entry has expired; coordinates is None for a cached miss.
+        """
+        key = (query, _states_key(allowed_states))
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                """
+                SELECT found, latitude, longitude, created_at FROM geocode_cache
+                WHERE query = ? AND allowed_states = ?
+            """,
+                key,
+            ).fetchone()
+            if row is None:
+                return False, None
+
+            found, latitude, longitude, created_at = row
+            ttl = self.ttl if found else self.negative_ttl
+            if now - created_at > ttl:
+                return False, None
+
+            self._conn.execute(
+                "UPDATE geocode_cache SET accessed_at = ? WHERE query = ? AND allowed_states = ?",
+                (now, *key),
+            )
+            self._conn.commit()
+
+        if found:
+            return True, (latitude, longitude)
+        return True, None
+
+    def put(
+        self,
+        query: str,
+        allowed_states: Optional[Tuple[str, ...]],
+        coords: Optional[Tuple[float, float]],
+        response=None,
+    ):
+        """
+        Store a hit (coords) or a miss (coords is None) along with the raw response.
+        """
+        now = time.time()
+        latitude, longitude = coords if coords else (None, None)
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO geocode_cache
+                    (query, allowed_states, found, latitude, longitude, response, created_at, accessed_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+                (
+                    query,
+                    _states_key(allowed_states),
+                    1 if coords else 0,
+                    latitude,
+                    longitude,
+                    json.dumps(response) if response is not None else None,
+                    now,
+                    now,
+                ),
+            )
+            self._conn.commit()
+
+            self._writes += 1
+            if self._writes % EVICTION_CHECK_INTERVAL == 0:
+                self._evict()
+
+    def _evict(self):
+        """
+        Delete least recently used entries beyond max_entries. Caller holds the lock.
+        """
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM geocode_cache").fetchone()
+        excess = count - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                """
+                DELETE FROM geocode_cache WHERE rowid IN (
+                    SELECT rowid FROM geocode_cache ORDER BY accessed_at LIMIT ?
+                )
+            """,
+                (excess,),
+            )
+            self._conn.commit()
+            logging.info(f"Geocode cache: evicted {excess} least recently used entries")
+
+    def prune(self) -> int:
+        """
+        Delete expired entries and enforce the size bound.
+        Returns the number of expired entries deleted.
+        """
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                """
+                DELETE FROM geocode_cache
+                WHERE (found = 1 AND created_at < ?) OR (found = 0 AND created_at < ?)
+            """,
+                (now - self.ttl, now - self.negative_ttl),
+            )
+            self._conn.commit()
+            self._evict()
+        return cursor.rowcount
+
+    def clear(self):
+        """
+        Delete every entry.
+        """
+        with self._lock:
+            self._conn.execute("DELETE FROM geocode_cache")
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        """
+        Return entry counts for found and not-found results.
+        """
+        with self._lock:
+            found, missing = self._conn.execute(
+                "SELECT COALESCE(SUM(found), 0), COALESCE(SUM(1 - found), 0) FROM geocode_cache"
+            ).fetchone()
+        return {"entries": found + missing, "found": found, "not_found": missing}
+
+    def export(self, fileobj) -> int:
+        """
+        Write every entry as one JSON object per line. Returns the number written.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT query, allowed_states, found, latitude, longitude, response, created_at, accessed_at
+                FROM geocode_cache ORDER BY query, allowed_states
+            """
+            ).fetchall()
+        for row in rows:
+            entry = dict(
+                zip(
+                    [
+                        "query",
+                        "allowed_states",
+                        "found",
+                        "latitude",
+                        "longitude",
+                        "response",
+                        "created_at",
+                        "accessed_at",
+                    ],
+                    row,
+                )
+            )
+            entry["found"] = bool(entry["found"])
+            entry["response"] = (
+                json.loads(entry["response"]) if entry["response"] else None
+            )
+            fileobj.write(json.dumps(entry) + "\n")
+        return len(rows)
+
+    def import_(self, fileobj) -> int:
+        """
+        Load entries written by export(). An imported entry only replaces an
+        existing one if it is newer. Returns the number of lines read.
+        """
+        count = 0
+        with self._lock:
+            for line in fileobj:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                self._conn.execute(
+                    """
+                    INSERT INTO geocode_cache
+                        (query, allowed_states, found, latitude, longitude, response, created_at, accessed_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (query, allowed_states) DO UPDATE SET
+                        found = excluded.found,
+                        latitude = excluded.latitude,
+                        longitude = excluded.longitude,
+                        response = excluded.response,
+                        created_at = excluded.created_at,
+                        accessed_at = excluded.accessed_at
+                    WHERE excluded.created_at > geocode_cache.created_at
+                """,
+                    (
+                        entry["query"],
+                        entry.get("allowed_states") or "",
+                        1 if entry["found"] else 0,
+                        entry.get("latitude"),
+                        entry.get("longitude"),
+                        json.dumps(entry["response"])
+                        if entry.get("response") is not None
+                        else None,
+                        entry["created_at"],
+                        entry.get("accessed_at", entry["created_at"]),
+                    ),
+                )
+                count += 1
+            self._conn.commit()
+            self._evict()
+        return count
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Manage the persistent geocoding cache.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  %(prog)s stats
+  %(prog)s export geocode_cache.jsonl
+  %(prog)s import geocode_cache.jsonl
+  %(prog)s prune
+        """,
+    )
+    parser.add_argument(
+        "command",
+        choices=["stats", "export", "import", "prune", "clear"],
+        help="Action to perform on the cache",
+    )
+    parser.add_argument(
+        "file",
+        nargs="?",
+        help="JSON lines file for export/import (default: stdout/stdin)",
+    )
+    parser.add_argument(
+        "--cache",
+        default=GEOCODE_CACHE_PATH,
+        help=f"Path to the cache file (default: {GEOCODE_CACHE_PATH})",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s - %(message)s")
+
+    if not args.cache:
+        parser.error("GEOCODE_CACHE_PATH is empty; pass --cache to choose a file")
+
+    cache = GeocodeCache(args.cache)
+
+    if args.command == "stats":
+        stats = cache.stats()
+        print(f"Entries: {stats['entries']}")
+        print(f"Found: {stats['found']}")
+        print(f"Not found: {stats['not_found']}")
+    elif args.command == "export":
+        if args.file:
+            with open(args.file, "w", encoding="utf-8") as f:
+                count = cache.export(f)
+        else:
+            count = cache.export(sys.stdout)
+        logging.info(f"Exported {count} entries")
+    elif args.command == "import":
+        if args.file:
+            with open(args.file, "r", encoding="utf-8") as f:
+                count = cache.import_(f)
+        else:
+            count = cache.import_(sys.stdin)
+        logging.info(f"Imported {count} entries")
+    elif args.command == "prune":
+        count = cache.prune()
+        logging.info(f"Pruned {count} expired entries")
+    elif args.command == "clear":
+        cache.clear()
+        logging.info("Geocode cache cleared")
+
+    cache.close()
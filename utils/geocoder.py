@@ -1,43 +1,363 @@
 #!/usr/bin/env uv run
 # /// script
 # dependencies = [
+#   "python-dotenv",
 #   "requests",
 # ]
 # ///
 """
 Geocoding utilities for location lookup.
-Uses OpenStreetMap Nominatim API for geocoding.
+Looks localities up in an offline gazetteer first and falls back to the
+OpenStreetMap Nominatim API; backends are pluggable and tried in order.
 """
 
+import csv
+import os
+import re
 import time
 import logging
+import queue
+import threading
+import unicodedata
 import requests
-from typing import Optional, Tuple
+from pathlib import Path
+from typing import List, Optional, Tuple
 from functools import lru_cache
+from dotenv import load_dotenv
+from geocode_cache import GeocodeCache, GEOCODE_CACHE_PATH
+from metrics import increment, observe, timer
+
+load_dotenv()
 
 # Nominatim API configuration
-NOMINATIM_URL = "https://nominatim.openstreetmap.org/search"
+# Point NOMINATIM_URL at a local Nominatim instance to avoid the public rate limit
+NOMINATIM_URL = os.getenv("NOMINATIM_URL", "https://nominatim.openstreetmap.org/search")
 USER_AGENT = "Pinkerton-Detectives-Project/1.0"
-REQUEST_DELAY = 1.0  # Nominatim requires max 1 request per second
+REQUEST_DELAY = float(
+    os.getenv("NOMINATIM_REQUEST_DELAY", "1.0")
+)  # Nominatim requires max 1 request per second
+
+# Offline gazetteer of well-known localities, consulted before Nominatim
+GAZETTEER_PATH = os.getenv(
+    "GAZETTEER_PATH",
+    str(Path(__file__).resolve().parent.parent / "data" / "gazetteer.csv"),
+)
+
+# Ordered, comma-separated list of backends tried by the default geocoder
+GEOCODER_BACKENDS = os.getenv("GEOCODER_BACKENDS", "gazetteer,nominatim")
+
+# Default geocoder, built from GEOCODER_BACKENDS on first use
+_geocoder = None
+
+
+def _select_result(
+    query: str, results: list, allowed_states: Optional[Tuple[str, ...]] = None
+) -> Optional[Tuple[float, float]]:
+    """
+    Pick the first usable result from a Nominatim response.
+
+    Args:
+        query: Search query string the results belong to
+        results: Parsed JSON results from Nominatim
+        allowed_states: Tuple of allowed state codes (e.g., ('TX', 'AZ', 'NM'))
+
+    Returns:
+        Tuple of (latitude, longitude) or None if no result qualifies
+    """
+    if results and len(results) > 0:
+        # If states are specified, filter results by state
+        if allowed_states:
+            for result in results:
+                address = result.get("address", {})
+                state = address.get("state")
+
+                # Check if state matches allowed states (case-insensitive)
+                # Handle both abbreviations (TX) and full names (Texas)
+                state_abbrevs = {
+                    "texas": "TX",
+                    "tx": "TX",
+                    "arizona": "AZ",
+                    "az": "AZ",
+                    "new mexico": "NM",
+                    "nm": "NM",
+                }
+
+                if state:
+                    normalized_state = state_abbrevs.get(state.lower(), state.upper())
+                    if normalized_state in allowed_states:
+                        lat = float(result["lat"])
+                        lon = float(result["lon"])
+
+                        if -90 <= lat <= 90 and -180 <= lon <= 180:
+                            logging.info(
+                                "Geocoded '%s' -> (%s, %s) in %s",
+                                query,
+                                lat,
+                                lon,
+                                state,
+                                extra={"event": "geocode_result"},
+                            )
+                            return (lat, lon)
+
+            logging.warning(
+                "No results in allowed states %s for '%s'",
+                allowed_states,
+                query,
+                extra={"event": "geocode_outside_allowed_states"},
+            )
+            return None
+        else:
+            # No state restriction
+            lat = float(results[0]["lat"])
+            lon = float(results[0]["lon"])
+
+            # Validate coordinate ranges
+            if -90 <= lat <= 90 and -180 <= lon <= 180:
+                logging.info(
+                    "Geocoded '%s' -> (%s, %s)",
+                    query,
+                    lat,
+                    lon,
+                    extra={"event": "geocode_result"},
+                )
+                return (lat, lon)
+            else:
+                logging.warning(
+                    "Invalid coordinates for '%s': (%s, %s)", query, lat, lon
+                )
+    else:
+        logging.debug("No results found for '%s'", query)
+
+    return None
 
-# Last request timestamp for rate limiting
-_last_request_time = 0
+
+def normalize_place(text: str) -> str:
+    """
+    Normalize a place name for lookup: strip accents and punctuation,
+    lowercase and collapse whitespace ("Ciudad Juárez" -> "ciudad juarez").
+    """
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    text = re.sub(r"[^\w\s]", " ", text.lower())
+    return " ".join(text.split())
+
+
+class GeocoderBackend:
+    """
+    Interface for geocoding backends.
+    """
+
+    name = "backend"
+
+    def geocode(
+        self, query: str, allowed_states: Optional[Tuple[str, ...]] = None
+    ) -> Optional[Tuple[float, float]]:
+        """
+        Geocode a single query string.
+
+        Args:
+            query: Search query string
+            allowed_states: Tuple of allowed state codes (e.g., ('TX', 'AZ', 'NM'))
+
+        Returns:
+            Tuple of (latitude, longitude) or None if not found
+        """
+        raise NotImplementedError
 
 
-def _rate_limit():
+class GazetteerGeocoder(GeocoderBackend):
     """
-    Enforce rate limiting for Nominatim API (1 request per second).
+    Offline geocoder for well-known localities, loaded from a local CSV file
+    with name, state, latitude, longitude and optional "|"-separated aliases.
+    Lookups are dictionary hits on the exact query or its normalized form, so
+    street-level queries simply miss and fall through to the next backend.
     """
-    global _last_request_time
-    current_time = time.time()
-    time_since_last = current_time - _last_request_time
 
-    if time_since_last < REQUEST_DELAY:
-        sleep_time = REQUEST_DELAY - time_since_last
-        logging.debug(f"Rate limiting: sleeping for {sleep_time:.2f}s")
-        time.sleep(sleep_time)
+    name = "gazetteer"
+
+    def __init__(self, path: str = GAZETTEER_PATH):
+        self.path = path
+        self.exact = {}
+        self.normalized = {}
+
+        with open(path, "r", encoding="utf-8-sig") as f:
+            for row in csv.DictReader(f):
+                state = row["state"].strip().upper()
+                entry = (state, float(row["latitude"]), float(row["longitude"]))
+                names = [row["name"]] + [
+                    alias for alias in (row.get("aliases") or "").split("|") if alias
+                ]
+                for name in names:
+                    name = name.strip()
+                    for key in (name, f"{name}, {state}"):
+                        self.exact.setdefault(key.lower(), []).append(entry)
+                    for key in (name, f"{name} {state}"):
+                        self.normalized.setdefault(normalize_place(key), []).append(
+                            entry
+                        )
+
+        logging.info(f"Loaded {len(self.exact)} gazetteer names from {path}")
+
+    def geocode(
+        self, query: str, allowed_states: Optional[Tuple[str, ...]] = None
+    ) -> Optional[Tuple[float, float]]:
+        entries = self.exact.get(query.strip().lower()) or self.normalized.get(
+            normalize_place(query)
+        )
+        for state, lat, lon in entries or ():
+            if not allowed_states or state in allowed_states:
+                logging.info(
+                    "Geocoded '%s' -> (%s, %s) from gazetteer",
+                    query,
+                    lat,
+                    lon,
+                    extra={"event": "geocode_result"},
+                )
+                increment("geocode.gazetteer.hits")
+                return (lat, lon)
+        increment("geocode.gazetteer.misses")
+        return None
+
 
-    _last_request_time = time.time()
+class NominatimGeocoder(GeocoderBackend):
+    """
+    Geocoder backed by a Nominatim search endpoint (public or self-hosted).
+    Requests share a pooled HTTP session, are rate limited, and go through the
+    persistent geocoding cache so repeated queries - including ones that found
+    nothing - skip the API call. Failed requests are not cached.
+    """
+
+    name = "nominatim"
+
+    def __init__(
+        self,
+        url: str = NOMINATIM_URL,
+        request_delay: float = REQUEST_DELAY,
+        cache_path: Optional[str] = GEOCODE_CACHE_PATH,
+    ):
+        self.url = url
+        self.request_delay = request_delay
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = USER_AGENT
+        self.cache = GeocodeCache(cache_path) if cache_path else None
+        if self.cache:
+            logging.info(f"Using geocoding cache: {cache_path}")
+        self._last_request_time = 0
+
+    def _rate_limit(self):
+        """
+        Enforce rate limiting for Nominatim API (1 request per second by default).
+        """
+        current_time = time.time()
+        time_since_last = current_time - self._last_request_time
+
+        if time_since_last < self.request_delay:
+            sleep_time = self.request_delay - time_since_last
+            logging.debug("Rate limiting: sleeping for %.2fs", sleep_time)
+            time.sleep(sleep_time)
+            observe("geocode.rate_limit_sleep", sleep_time)
+
+        self._last_request_time = time.time()
+
+    def geocode(
+        self, query: str, allowed_states: Optional[Tuple[str, ...]] = None
+    ) -> Optional[Tuple[float, float]]:
+        if self.cache:
+            hit, coords = self.cache.get(query, allowed_states)
+            if hit:
+                logging.debug("Geocoding cache hit for '%s': %s", query, coords)
+                increment("geocode.persistent_cache.hits")
+                return coords
+            increment("geocode.persistent_cache.misses")
+
+        self._rate_limit()
+
+        params = {
+            "q": query,
+            "format": "json",
+            "limit": 5,  # Get more results to filter by state
+            "addressdetails": 1,
+            "countrycodes": "us",  # Limit to USA
+        }
+
+        try:
+            logging.debug("Geocoding query: '%s'", query)
+            with timer("geocode.http"):
+                response = self.session.get(self.url, params=params, timeout=10)
+            response.raise_for_status()
+
+            results = response.json()
+            coords = _select_result(query, results, allowed_states)
+            if self.cache:
+                self.cache.put(query, allowed_states, coords, results)
+            return coords
+
+        except requests.exceptions.RequestException as e:
+            logging.error(f"Geocoding request failed for '{query}': {e}")
+            increment("geocode.http.errors")
+        except (ValueError, KeyError) as e:
+            logging.error(f"Failed to parse geocoding response for '{query}': {e}")
+            increment("geocode.http.errors")
+
+        return None
+
+
+class ChainGeocoder(GeocoderBackend):
+    """
+    Tries each backend in order and returns the first result found.
+    """
+
+    name = "chain"
+
+    def __init__(self, backends: List[GeocoderBackend]):
+        self.backends = backends
+
+    def geocode(
+        self, query: str, allowed_states: Optional[Tuple[str, ...]] = None
+    ) -> Optional[Tuple[float, float]]:
+        for backend in self.backends:
+            coords = backend.geocode(query, allowed_states)
+            if coords:
+                return coords
+        return None
+
+
+def build_geocoder(backends: str = GEOCODER_BACKENDS) -> GeocoderBackend:
+    """
+    Build a geocoder from a comma-separated list of backend names
+    ("gazetteer", "nominatim"), tried in the order given.
+    """
+    chain = []
+    for name in (n.strip() for n in backends.split(",")):
+        if name == "gazetteer":
+            if os.path.exists(GAZETTEER_PATH):
+                chain.append(GazetteerGeocoder(GAZETTEER_PATH))
+            else:
+                logging.warning(f"Gazetteer file not found: {GAZETTEER_PATH}")
+        elif name == "nominatim":
+            chain.append(NominatimGeocoder())
+        elif name:
+            raise ValueError(f"Unknown geocoder backend: '{name}'")
+    return chain[0] if len(chain) == 1 else ChainGeocoder(chain)
+
+
+def get_geocoder() -> GeocoderBackend:
+    """
+    Return the default geocoder, building it from GEOCODER_BACKENDS on first use.
+    """
+    global _geocoder
+    if _geocoder is None:
+        _geocoder = build_geocoder()
+    return _geocoder
+
+
+def set_geocoder(geocoder: Optional[GeocoderBackend]):
+    """
+    Replace the default geocoder (None rebuilds it from GEOCODER_BACKENDS on next use).
+    """
+    global _geocoder
+    _geocoder = geocoder
+    _geocode_query.cache_clear()
 
 
 @lru_cache(maxsize=1000)
@@ -45,8 +365,8 @@ def _geocode_query(
     query: str, allowed_states: Optional[Tuple[str, ...]] = None
 ) -> Optional[Tuple[float, float]]:
     """
-    Geocode a single query string using Nominatim.
-    Results are cached to avoid repeated API calls.
+    Geocode a single query string using the default geocoder.
+    Results are cached in memory to avoid repeated lookups within a run.
 
     Args:
         query: Search query string
@@ -55,85 +375,23 @@ def _geocode_query(
     Returns:
         Tuple of (latitude, longitude) or None if not found
     """
-    _rate_limit()
-
-    params = {
-        "q": query,
-        "format": "json",
-        "limit": 5,  # Get more results to filter by state
-        "addressdetails": 1,
-        "countrycodes": "us",  # Limit to USA
-    }
-
-    headers = {"User-Agent": USER_AGENT}
-
-    try:
-        logging.debug(f"Geocoding query: '{query}'")
-        response = requests.get(
-            NOMINATIM_URL, params=params, headers=headers, timeout=10
-        )
-        response.raise_for_status()
-
-        results = response.json()
-
-        if results and len(results) > 0:
-            # If states are specified, filter results by state
-            if allowed_states:
-                for result in results:
-                    address = result.get("address", {})
-                    state = address.get("state")
-
-                    # Check if state matches allowed states (case-insensitive)
-                    # Handle both abbreviations (TX) and full names (Texas)
-                    state_abbrevs = {
-                        "texas": "TX",
-                        "tx": "TX",
-                        "arizona": "AZ",
-                        "az": "AZ",
-                        "new mexico": "NM",
-                        "nm": "NM",
-                    }
-
-                    if state:
-                        normalized_state = state_abbrevs.get(
-                            state.lower(), state.upper()
-                        )
-                        if normalized_state in allowed_states:
-                            lat = float(result["lat"])
-                            lon = float(result["lon"])
+    with timer("geocode.query"):
+        return get_geocoder().geocode(query, allowed_states)
 
-                            if -90 <= lat <= 90 and -180 <= lon <= 180:
-                                logging.info(
-                                    f"Geocoded '{query}' -> ({lat}, {lon}) in {state}"
-                                )
-                                return (lat, lon)
 
-                logging.warning(
-                    f"No results in allowed states {allowed_states} for '{query}'"
-                )
-                return None
-            else:
-                # No state restriction
-                lat = float(results[0]["lat"])
-                lon = float(results[0]["lon"])
-
-                # Validate coordinate ranges
-                if -90 <= lat <= 90 and -180 <= lon <= 180:
-                    logging.info(f"Geocoded '{query}' -> ({lat}, {lon})")
-                    return (lat, lon)
-                else:
-                    logging.warning(
-                        f"Invalid coordinates for '{query}': ({lat}, {lon})"
-                    )
-        else:
-            logging.debug(f"No results found for '{query}'")
-
-    except requests.exceptions.RequestException as e:
-        logging.error(f"Geocoding request failed for '{query}': {e}")
-    except (ValueError, KeyError) as e:
-        logging.error(f"Failed to parse geocoding response for '{query}': {e}")
-
-    return None
+def _lookup(
+    query: str, allowed_states: Optional[Tuple[str, ...]] = None
+) -> Optional[Tuple[float, float]]:
+    """
+    Geocode a query through the in-memory cache, counting cache hits and misses.
+    """
+    misses = _geocode_query.cache_info().misses
+    result = _geocode_query(query, allowed_states)
+    if _geocode_query.cache_info().misses == misses:
+        increment("geocode.memory_cache.hits")
+    else:
+        increment("geocode.memory_cache.misses")
+    return result
 
 
 def geocode_location(
@@ -163,49 +421,153 @@ def geocode_location(
     # Strategy 1: Try full address (most precise)
     if street_address and locality:
         query = f"{street_address}, {locality}"
-        result = _geocode_query(query, allowed_states)
+        result = _lookup(query, allowed_states)
         if result:
-            logging.info(f"Geocoded with full address: {query}")
+            logging.info(
+                "Geocoded with full address: %s",
+                query,
+                extra={"event": "geocode_strategy"},
+            )
             return result
 
     # Strategy 2: Try location name + locality
     if location_name and locality:
         query = f"{location_name}, {locality}"
-        result = _geocode_query(query, allowed_states)
+        result = _lookup(query, allowed_states)
         if result:
-            logging.info(f"Geocoded with location name: {query}")
+            logging.info(
+                "Geocoded with location name: %s",
+                query,
+                extra={"event": "geocode_strategy"},
+            )
             return result
 
     # Strategy 3: Fall back to just locality
     if locality:
         # Clean up locality string - handle common patterns
         query = locality.strip()
-        result = _geocode_query(query, allowed_states)
+        result = _lookup(query, allowed_states)
         if result:
-            logging.info(f"Geocoded with locality: {query}")
+            logging.info(
+                "Geocoded with locality: %s", query, extra={"event": "geocode_strategy"}
+            )
             return result
 
     # Strategy 4: Try street address alone if locality lookup failed
     if street_address:
         query = street_address.strip()
-        result = _geocode_query(query, allowed_states)
+        result = _lookup(query, allowed_states)
         if result:
-            logging.info(f"Geocoded with street address only: {query}")
+            logging.info(
+                "Geocoded with street address only: %s",
+                query,
+                extra={"event": "geocode_strategy"},
+            )
             return result
 
     logging.warning(
-        f"Could not geocode location: locality={locality}, "
-        f"street={street_address}, name={location_name}"
+        "Could not geocode location: locality=%s, street=%s, name=%s",
+        locality,
+        street_address,
+        location_name,
+        extra={"event": "geocode_failed"},
     )
     return None
 
 
-def clear_geocoding_cache():
+class GeocodingPipeline:
+    """
+    Background worker that geocodes locations off the import's critical path.
+    Each location is submitted once, looked up in submission order on a single
+    thread (which keeps to the Nominatim rate limit), and its coordinates are
+    collected until the caller is ready to write them back.
+    """
+
+    def __init__(self, allowed_states: Optional[Tuple[str, ...]] = None):
+        self.allowed_states = allowed_states
+        self.submitted = 0
+        self.failed = 0
+        self._seen = set()
+        self._results = []
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(
+            target=self._run, name="geocoding-pipeline", daemon=True
+        )
+        self._thread.start()
+
+    def submit(
+        self,
+        location_id: int,
+        locality: Optional[str] = None,
+        street_address: Optional[str] = None,
+        location_name: Optional[str] = None,
+    ):
+        """
+        Queue a location for geocoding. Locations already submitted are ignored.
+        """
+        if location_id in self._seen:
+            return
+        self._seen.add(location_id)
+        self.submitted += 1
+        self._queue.put((location_id, locality, street_address, location_name))
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            location_id, locality, street_address, location_name = item
+            try:
+                with timer("geocode.location"):
+                    coords = geocode_location(
+                        locality=locality,
+                        street_address=street_address,
+                        location_name=location_name,
+                        allowed_states=self.allowed_states,
+                    )
+            except Exception as e:
+                logging.error(f"Location {location_id}: Geocoding failed: {e}")
+                coords = None
+
+            with self._lock:
+                if coords:
+                    self._results.append((location_id, coords[0], coords[1]))
+                else:
+                    self.failed += 1
+
+    def drain(self) -> List[Tuple[int, float, float]]:
+        """
+        Return and clear the (location_id, latitude, longitude) results collected so far.
+        """
+        with self._lock:
+            results, self._results = self._results, []
+        return results
+
+    def close(self) -> List[Tuple[int, float, float]]:
+        """
+        Wait for every submitted location to be geocoded and return the remaining results.
+        """
+        pending = self._queue.qsize()
+        if pending:
+            logging.info(f"Waiting for {pending} locations to finish geocoding...")
+        self._queue.put(None)
+        with timer("geocode.close_wait"):
+            self._thread.join()
+        return self.drain()
+
+
+def clear_geocoding_cache(persistent: bool = False):
     """
-    Clear the geocoding cache.
+    Clear the in-memory geocoding cache, and the persistent cache if requested.
     Useful for testing or if you want to force fresh lookups.
     """
     _geocode_query.cache_clear()
+    if persistent:
+        backends = getattr(get_geocoder(), "backends", [get_geocoder()])
+        for backend in backends:
+            if getattr(backend, "cache", None):
+                backend.cache.clear()
     logging.info("Geocoding cache cleared")
 
 
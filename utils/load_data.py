@@ -12,16 +12,45 @@ Supports optional crosswalk file for enriching location data with coordinates an
 """
 
 import csv
+import io
 import psycopg2
-from datetime import datetime, time as dt_time
+from psycopg2.extras import execute_batch, execute_values
+from psycopg2.pool import ThreadedConnectionPool
+from datetime import datetime
+from functools import lru_cache
 import re
 import sys
 import os
 import logging
 import argparse
+import atexit
+import itertools
+import json
+import mmap
+import queue
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
 from dotenv import load_dotenv
-from geocoder import geocode_location
+from geocoder import GeocodingPipeline
+from crosswalk_index import DEFAULT_THRESHOLD, CrosswalkIndex
+from csv_index import RowIndex, read_rows
+import metrics
+from metrics import increment, timer
+from fingerprints import FingerprintStore, RowDiff, diff_crosswalk, file_fingerprint
+from parsing import (
+    coordinates_value,
+    date_value,
+    duration_value,
+    parse_coordinate_column,
+    parse_dates,
+    parse_durations,
+    parse_times,
+    time_value,
+)
 
 # Load environment variables from .env file
 load_dotenv()
@@ -47,12 +76,156 @@ ALLOWED_STATES = (
     else None
 )
 
+# Rows per COPY batch in bulk mode
+BULK_BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", "5000"))
+
+# Rows per transaction when loading row by row
+COMMIT_SIZE = int(os.getenv("COMMIT_SIZE", "1000"))
+
+# Activity upserts sent to the server in one round trip when loading row by row
+PIPELINE_DEPTH = int(os.getenv("PIPELINE_DEPTH", "100"))
+
+# Subjects and operatives are separated by a comma or an ampersand
+NAME_SEPARATOR_RE = re.compile(r",|&")
+
+# Rows handed to a parse worker at a time when parsing with --workers
+PARSE_CHUNK_SIZE = int(os.getenv("PARSE_CHUNK_SIZE", "2000"))
+
+# Columns every activity CSV needs; "Activity" (or the older "Roping") is optional
+REQUIRED_COLUMNS = [
+    "ID",
+    "Source",
+    "Operative",
+    "Date",
+    "Time",
+    "Duration",
+    "Mode",
+    "Activity Notes",
+    "Subject",
+    "Information",
+    "Information Type",
+    "Edited",
+    "Edit Type",
+    "Locality",
+    "Street Address",
+    "Location Name",
+    "Location Type",
+    "Location Notes",
+]
+
+# Values of yes/no columns that parse_boolean understands, lowercased
+BOOLEAN_VALUES = {"yes", "no", "query"}
+
+# Levels of validation issues, from rows that can't be loaded to values worth a look
+VALIDATION_LEVELS = ("error", "warning", "notice")
+
+# Issues logged per column when validating; the report has all of them
+VALIDATION_EXAMPLES = 3
+
+# Similarity (0 to 1) a location name needs to match a crosswalk entry it isn't
+# spelled exactly like; 1 accepts only exact and normalized matches
+CROSSWALK_MATCH_THRESHOLD = float(
+    os.getenv("CROSSWALK_MATCH_THRESHOLD", str(DEFAULT_THRESHOLD))
+)
+
+# Level of the import log (DEBUG, INFO, WARNING or ERROR)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+
+# Messages logged of each kind of per-row event, such as a missing mode or a new
+# location; the rest are only counted, unless the log level is DEBUG
+LOG_SAMPLE_SIZE = int(os.getenv("LOG_SAMPLE_SIZE", "10"))
+
+# Prometheus textfile the import metrics are also written to (optional)
+METRICS_TEXTFILE = os.getenv("METRICS_TEXTFILE") or None
+
+# Activity columns, in the order they are staged and inserted
+ACTIVITY_COLUMNS = [
+    "id",
+    "source",
+    "operative",
+    "date",
+    "time",
+    "duration",
+    "activity",
+    "mode",
+    "activity_notes",
+    "subject",
+    "information",
+    "information_type",
+    "edited",
+    "edit_type",
+]
+
+# Columns of the staging_locations temp table filled by COPY
+STAGING_LOCATION_COLUMNS = [
+    "row_num",
+    "activity_id",
+    "locality",
+    "street_address",
+    "location_name",
+    "location_type",
+    "location_notes",
+    "latitude",
+    "longitude",
+    "visits",
+]
+
+
+# File being loaded by the current thread, shown in log lines when several
+# files are loaded in one import
+_current_file = threading.local()
+
+
+class _SourceFilter(logging.Filter):
+    """
+    Tag log records with the file the logging thread is loading, if any.
+    """
+
+    def filter(self, record):
+        name = getattr(_current_file, "name", None)
+        record.source = f"[{name}] " if name else ""
+        return True
+
+
+class _SampleFilter(logging.Filter):
+    """
+    Let through the first sample_size records of each per-row event, logged with
+    extra={"event": name}, and count the rest without logging them unless the log
+    level is DEBUG. Every event is also counted in the metrics as "log.<name>".
+    """
+
+    def __init__(self, sample_size=LOG_SAMPLE_SIZE):
+        super().__init__()
+        self.sample_size = sample_size
+        self.counts = Counter()
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        event = getattr(record, "event", None)
+        if event is None:
+            return True
+        with self._lock:
+            self.counts[event] += 1
+            count = self.counts[event]
+        increment(f"log.{event}")
+        # Not isEnabledFor(), which is always False while a record is being handled
+        return (
+            count <= self.sample_size
+            or logging.getLogger().getEffectiveLevel() <= logging.DEBUG
+        )
+
+
+# Records on their way to the log writer thread started by setup_logging
+_log_queue = queue.Queue()
+_log_sampler = _SampleFilter()
+
 
-def setup_logging():
+def setup_logging(level=LOG_LEVEL):
     """
-    Setup logging to both file and console.
-    Log file name includes timestamp.
+    Setup logging to both file and console, written by a background thread so
+    loading never waits on them. Log file name includes timestamp.
     """
+    _log_sampler.counts.clear()
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     log_file = f"import_{timestamp}.log"
 
@@ -61,48 +234,67 @@ def setup_logging():
     log_dir.mkdir(exist_ok=True)
     log_path = log_dir / log_file
 
-    # Configure logging
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s - %(levelname)s - %(message)s",
-        handlers=[logging.FileHandler(log_path), logging.StreamHandler(sys.stdout)],
-    )
+    root = logging.getLogger()
+    if root.handlers:
+        # Already set up, by an earlier import in this process or by the caller
+        return log_path
+
+    # The format shows no source file, thread or process, so records skip
+    # looking them up
+    logging._srcfile = None
+    logging.logThreads = False
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
+
+    formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(source)s%(message)s")
+    handlers = [logging.FileHandler(log_path), logging.StreamHandler(sys.stdout)]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    # Filters run in the thread that logs, which the source tag depends on
+    queue_handler = QueueHandler(_log_queue)
+    queue_handler.addFilter(_SourceFilter())
+    queue_handler.addFilter(_log_sampler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    listener = QueueListener(_log_queue, *handlers)
+    listener.start()
+    atexit.register(listener.stop)
 
     return log_path
 
 
-def parse_duration(duration_str, row_id=None):
+def flush_logging():
     """
-    Parse duration strings like '5h45m', '10h', '2h', '[10h total]' into PostgreSQL interval format.
-    Returns None if empty or cannot parse.
+    Wait until the log writer thread has written everything logged so far.
     """
-    if not duration_str or duration_str.strip() == "":
-        return None
-
-    original = duration_str
-
-    # Remove brackets and 'total' text
-    duration_str = re.sub(r"[\[\]]", "", duration_str)
-    duration_str = duration_str.replace("total", "").strip()
-
-    # Match patterns like '5h45m', '10h', '45m'
-    hours = 0
-    minutes = 0
+    _log_queue.join()
 
-    hour_match = re.search(r"(\d+)h", duration_str)
-    if hour_match:
-        hours = int(hour_match.group(1))
 
-    minute_match = re.search(r"(\d+)m", duration_str)
-    if minute_match:
-        minutes = int(minute_match.group(1))
+def log_sampled_events():
+    """
+    Log how many records of each per-row event were counted but not logged.
+    """
+    if logging.getLogger().isEnabledFor(logging.DEBUG):
+        return
+    for event, count in sorted(_log_sampler.counts.items()):
+        if count > _log_sampler.sample_size:
+            logging.info(
+                f"Logged {_log_sampler.sample_size} of {count} {event} messages "
+                f"(--log-level DEBUG logs every one)"
+            )
 
-    if hours == 0 and minutes == 0:
-        logging.warning(f"Row {row_id}: Could not parse duration '{original}'")
-        return None
 
-    result = f"{hours} hours {minutes} minutes"
-    logging.debug(f"Row {row_id}: Parsed duration '{original}' -> '{result}'")
+def parse_duration(duration_str, row_id=None):
+    """
+    Parse duration strings like '5h45m', '10h', '2h', '[10h total]' into PostgreSQL interval format.
+    Returns None if empty or cannot parse.
+    """
+    result, error = duration_value(duration_str)
+    if error:
+        logging.warning(
+            "Row %s: %s", row_id, error, extra={"event": "invalid_duration"}
+        )
     return result
 
 
@@ -111,35 +303,10 @@ def parse_time(time_str, row_id=None):
     Parse time strings like '12:00', '7:00', 'Evening' into time objects.
     Returns None if empty or cannot parse.
     """
-    if not time_str or time_str.strip() == "":
-        return None
-
-    time_str = time_str.strip()
-    original = time_str
-
-    # Handle special cases
-    if time_str.lower() in ["evening", "afternoon", "morning"]:
-        logging.debug(f"Row {row_id}: Skipping text time value '{time_str}'")
-        return None
-
-    # Parse HH:MM format
-    try:
-        parts = time_str.split(":")
-        if len(parts) == 2:
-            hour = int(parts[0])
-            minute = int(parts[1])
-
-            if hour > 23 or minute > 59:
-                logging.warning(
-                    f"Row {row_id}: Invalid time value '{original}' (hour > 23 or minute > 59)"
-                )
-                return None
-
-            return dt_time(hour, minute)
-    except (ValueError, IndexError) as e:
-        logging.warning(f"Row {row_id}: Could not parse time '{original}': {e}")
-
-    return None
+    result, error = time_value(time_str)
+    if error:
+        logging.warning("Row %s: %s", row_id, error, extra={"event": "invalid_time"})
+    return result
 
 
 def parse_date(date_str, row_id=None):
@@ -147,14 +314,10 @@ def parse_date(date_str, row_id=None):
     Parse date strings in YYYY-MM-DD format.
     Returns None if empty or cannot parse.
     """
-    if not date_str or date_str.strip() == "":
-        return None
-
-    try:
-        return datetime.strptime(date_str.strip(), "%Y-%m-%d").date()
-    except ValueError as e:
-        logging.warning(f"Row {row_id}: Could not parse date '{date_str}': {e}")
-        return None
+    result, error = date_value(date_str)
+    if error:
+        logging.warning("Row %s: %s", row_id, error, extra={"event": "invalid_date"})
+    return result
 
 
 def parse_coordinates(location_notes):
@@ -163,29 +326,10 @@ def parse_coordinates(location_notes):
     Looks for patterns like: "31.75942197504869, -106.49579584576844"
     Returns tuple of (latitude, longitude) or (None, None) if not found.
     """
-    if not location_notes or location_notes.strip() == "":
-        return None, None
-
-    # Match decimal coordinates pattern (handles negative values)
-    # Pattern: optional text, then lat, comma, optional space, lon
-    pattern = r"(-?\d+\.\d+)\s*,\s*(-?\d+\.\d+)"
-    match = re.search(pattern, location_notes)
-
-    if match:
-        try:
-            lat = float(match.group(1))
-            lon = float(match.group(2))
-
-            # Validate coordinate ranges
-            if -90 <= lat <= 90 and -180 <= lon <= 180:
-                logging.debug(f"Parsed coordinates: ({lat}, {lon})")
-                return lat, lon
-            else:
-                logging.warning(f"Coordinates out of valid range: ({lat}, {lon})")
-        except ValueError as e:
-            logging.warning(f"Could not parse coordinates from '{location_notes}': {e}")
-
-    return None, None
+    coordinates, error = coordinates_value(location_notes)
+    if error:
+        logging.warning("%s", error, extra={"event": "invalid_coordinates"})
+    return coordinates
 
 
 def parse_boolean(value):
@@ -214,7 +358,9 @@ def parse_subjects(subjects_str):
     # Subjects are in the "Subject" field, separated by a comma or by an ampersand
     if not subjects_str or subjects_str.strip() == "":
         return []
-    return [name.strip() for name in re.split(r",|&", subjects_str) if name.strip()]
+    return [
+        name.strip() for name in NAME_SEPARATOR_RE.split(subjects_str) if name.strip()
+    ]
 
 
 def parse_operatives(operative_str):
@@ -227,15 +373,20 @@ def parse_operatives(operative_str):
     # Operatives are in the "Operative" field, separated by a comma or by an ampersand
     if not operative_str or operative_str.strip() == "":
         return []
-    return [name.strip() for name in re.split(r",|&", operative_str) if name.strip()]
+    return [
+        name.strip() for name in NAME_SEPARATOR_RE.split(operative_str) if name.strip()
+    ]
 
 
-def load_crosswalk_data(crosswalk_file):
+@timer("import.crosswalk")
+def load_crosswalk_data(crosswalk_file, threshold=CROSSWALK_MATCH_THRESHOLD):
     """
     Load location crosswalk data from CSV file.
-    Returns a dictionary keyed by (location_name, locality) with coordinate and visit data.
+    Returns a CrosswalkIndex keyed by (location_name, locality) with coordinate and
+    visit data, which matches names that differ slightly from an entry's if their
+    similarity is at least threshold.
     """
-    crosswalk = {}
+    crosswalk = CrosswalkIndex(threshold=threshold)
 
     if not crosswalk_file or not os.path.exists(crosswalk_file):
         logging.info("No crosswalk file provided or file not found")
@@ -287,7 +438,12 @@ def load_crosswalk_data(crosswalk_file):
                     "street_address": street_address,
                 }
                 logging.debug(
-                    f"Crosswalk: {location_name}, {locality} -> lat={latitude}, lon={longitude}, visits={visits}"
+                    "Crosswalk: %s, %s -> lat=%s, lon=%s, visits=%s",
+                    location_name,
+                    locality,
+                    latitude,
+                    longitude,
+                    visits,
                 )
 
             # Also store by location name only for fallback matching
@@ -305,517 +461,2497 @@ def load_crosswalk_data(crosswalk_file):
     return crosswalk
 
 
-def get_or_create_location(
-    cursor,
-    locality,
-    street_address,
-    location_name,
-    location_type,
-    location_notes,
-    latitude=None,
-    longitude=None,
-    visits=None,
-    enable_geocoding=False,
-):
+def parse_field_columns(rows):
     """
-    Get existing location ID or create new location and return its ID.
-    If coordinates are not provided and geocoding is enabled, attempts to
-    geocode the location using a hierarchical approach.
-    Optionally tracks visit count if provided.
+    Parse the date, time, duration and coordinate columns of a list of CSV rows
+    in one pass each. Returns a dict of ParsedColumn keyed by field.
     """
-    # Check if location exists
-    cursor.execute(
-        f"""
-        SELECT id, latitude, longitude FROM {SCHEMA_NAME}.locations
-        WHERE locality IS NOT DISTINCT FROM %s
-        AND street_address IS NOT DISTINCT FROM %s
-        AND location_name IS NOT DISTINCT FROM %s
-    """,
-        (locality or None, street_address or None, location_name or None),
-    )
+    return {
+        "date": parse_dates([row["Date"] for row in rows]),
+        "time": parse_times([row["Time"] for row in rows]),
+        "duration": parse_durations([row["Duration"] for row in rows]),
+        "coordinates": parse_coordinate_column([row["Location Notes"] for row in rows]),
+    }
 
-    result = cursor.fetchone()
-    if result:
-        location_id = result[0]
-        existing_lat = result[1]
-        existing_lon = result[2]
 
-        # Update coordinates if provided and not already set
-        updates = []
-        params = []
-        if latitude is not None and longitude is not None:
-            if existing_lat is None and existing_lon is None:
-                updates.append("latitude = %s, longitude = %s")
-                params.extend([latitude, longitude])
+def column_value(columns, field, index, row_id=None):
+    """
+    Look up a row's value in parsed columns, logging the error if it had one.
+    """
+    column = columns[field]
+    if column.mask[index]:
+        event = {"event": f"invalid_{field}"}
+        if field == "coordinates":
+            logging.warning("%s", column.errors[index], extra=event)
+        else:
+            logging.warning("Row %s: %s", row_id, column.errors[index], extra=event)
+    return column.values[index]
 
-        # Update visits if provided
-        if visits is not None:
-            updates.append("visits = %s")
-            params.append(visits)
 
-        if updates:
-            params.append(location_id)
-            cursor.execute(
-                f"""
-                UPDATE {SCHEMA_NAME}.locations
-                SET {", ".join(updates)}
-                WHERE id = %s
-            """,
-                params,
-            )
-            if latitude is not None and longitude is not None and existing_lat is None:
-                logging.info(
-                    f"Location {location_id}: Added coordinates ({latitude}, {longitude})"
-                )
-            if visits is not None:
-                logging.info(f"Location {location_id}: Set visits to {visits}")
-        # If coordinates still missing and geocoding is enabled, try to geocode
-        elif existing_lat is None and existing_lon is None and enable_geocoding:
-            coords = geocode_location(
-                locality=locality,
-                street_address=street_address,
-                location_name=location_name,
-                allowed_states=ALLOWED_STATES,
-            )
-            if coords:
-                latitude, longitude = coords
-                cursor.execute(
-                    f"""
-                    UPDATE {SCHEMA_NAME}.locations
-                    SET latitude = %s, longitude = %s
-                    WHERE id = %s
-                """,
-                    (latitude, longitude, location_id),
-                )
-                logging.info(
-                    f"Location {location_id}: Geocoded to ({latitude}, {longitude})"
+def parse_activity_row(row, activity_id, columns=None, index=None):
+    """
+    Build the activity record for a CSV row, ready to insert into activities.
+    If the row's fields were already parsed with parse_field_columns, pass the
+    columns and the row's index in them.
+    """
+    if columns is None:
+        date = parse_date(row["Date"], activity_id)
+        time = parse_time(row["Time"], activity_id)
+        duration = parse_duration(row["Duration"], activity_id)
+    else:
+        date = column_value(columns, "date", index, activity_id)
+        time = column_value(columns, "time", index, activity_id)
+        duration = column_value(columns, "duration", index, activity_id)
+
+    return {
+        "id": activity_id,
+        "source": row["Source"] or None,
+        "operative": row["Operative"] or None,
+        "date": date,
+        "time": time,
+        "duration": duration,
+        "activity": row.get("Activity")
+        or row.get("Roping")
+        or None,  # Support both "Activity" and legacy "Roping" column names
+        "mode": row["Mode"] or None,
+        "activity_notes": row["Activity Notes"] or None,
+        "subject": row["Subject"] or None,
+        "information": row["Information"] or None,
+        "information_type": row["Information Type"] or None,
+        "edited": parse_boolean(row["Edited"]),
+        "edit_type": row["Edit Type"] or None,
+    }
+
+
+def apply_crosswalk(crosswalk, row, latitude, longitude, activity_id=None):
+    """
+    Enrich a row's location with crosswalk coordinates and visits.
+    Coordinates already parsed from the location notes take precedence.
+    Returns tuple of (latitude, longitude, visits, enriched).
+    """
+    visits = None
+    enriched = False
+
+    if not crosswalk:
+        return latitude, longitude, visits, enriched
+
+    location_name = row["Location Name"] or None
+    locality = row["Locality"] or None
+
+    # Exact match first (location_name + locality), then location_name only,
+    # then the closest spelling
+    match = crosswalk.match(location_name, locality)
+
+    # Use crosswalk data if found
+    if match:
+        _, crosswalk_data, _ = match
+        # Only use crosswalk coordinates if we don't have them from location notes
+        if latitude is None and longitude is None:
+            latitude = crosswalk_data.get("latitude")
+            longitude = crosswalk_data.get("longitude")
+            if latitude and longitude:
+                enriched = True
+                logging.debug(
+                    "Activity %s: Using crosswalk coordinates for %s, %s",
+                    activity_id,
+                    location_name,
+                    locality,
                 )
 
-        logging.debug(
-            f"Location found: {locality} / {location_name} (ID: {location_id})"
-        )
-        return location_id
-
-    # If creating new location and no coordinates provided, try geocoding
-    if latitude is None and longitude is None and enable_geocoding:
-        coords = geocode_location(
-            locality=locality,
-            street_address=street_address,
-            location_name=location_name,
-            allowed_states=ALLOWED_STATES,
-        )
-        if coords:
-            latitude, longitude = coords
-            logging.info(
-                f"Geocoded new location: {locality} -> ({latitude}, {longitude})"
+        visits = crosswalk_data.get("visits")
+        if visits:
+            enriched = True
+            logging.debug(
+                "Activity %s: Using crosswalk visits=%s for %s, %s",
+                activity_id,
+                visits,
+                location_name,
+                locality,
             )
 
-    # Create new location
-    cursor.execute(
-        f"""
-        INSERT INTO {SCHEMA_NAME}.locations (locality, street_address, location_name, location_type, location_notes, latitude, longitude, visits)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-        RETURNING id
-    """,
-        (
-            locality or None,
-            street_address or None,
-            location_name or None,
-            location_type or None,
-            location_notes or None,
-            latitude,
-            longitude,
-            visits,
-        ),
-    )
-
-    location_id = cursor.fetchone()[0]
-    coord_str = f" at ({latitude}, {longitude})" if latitude and longitude else ""
-    logging.info(
-        f"New location created: {locality} / {location_name} (ID: {location_id}){coord_str}"
-    )
-    return location_id
+    return latitude, longitude, visits, enriched
 
 
-def get_or_create_subjects(cursor, people_list):
+def parse_row(row, row_num, crosswalk, diff=None, columns=None, index=None):
     """
-    Get existing people IDs or create new people and return their IDs. Names come as
-    First Name Last Name and need to be parsed into first_name and last_name fields.
+    Parse and validate one CSV row into a record ready to write.
+    The record has "skipped" or "error" set if the row can't be loaded; otherwise
+    it carries the parsed activity, its location (or None), subjects and operatives.
+    With a RowDiff, the record also gets the row's fingerprint and status, and rows
+    that haven't changed since the last import are not parsed any further.
+    columns and index are passed on to parse_activity_row.
     """
-    people_ids = []
-
-    for full_name in people_list:
-        name_parts = full_name.split()
-        if len(name_parts) < 2:
-            logging.warning(f"Invalid name format: '{full_name}'")
-            continue
+    record = {"row_num": row_num, "skipped": False, "error": False, "status": None}
 
-        first_name = " ".join(name_parts[:-1])
-        last_name = name_parts[-1]
+    # Skip if ID is empty
+    if not row["ID"] or row["ID"].strip() == "":
+        logging.debug("Row %s: Skipping row with empty ID", row_num)
+        record["skipped"] = True
+        return record
 
-        # Check if person exists
-        cursor.execute(
-            f"""
-            SELECT id FROM {SCHEMA_NAME}.people 
-            WHERE first_name = %s AND last_name = %s
-        """,
-            (first_name, last_name),
+    try:
+        activity_id = int(row["ID"])
+    except ValueError as e:
+        logging.error("Row %s: Invalid ID '%s': %s", row_num, row["ID"], e)
+        record["error"] = True
+        return record
+
+    record["activity_id"] = activity_id
+    if diff:
+        record["fingerprint"], record["status"] = diff.check(activity_id, row)
+        if record["status"] == "unchanged":
+            return record
+
+    activity_data = parse_activity_row(row, activity_id, columns, index)
+
+    # Validate required fields
+    if not activity_data["mode"]:
+        logging.warning(
+            "Activity %s: Missing mode (activity type)",
+            activity_id,
+            extra={"event": "missing_mode"},
         )
 
-        result = cursor.fetchone()
-        if result:
-            person_id = result[0]
-            logging.debug(f"Person found: {full_name} (ID: {person_id})")
+    record["activity"] = activity_data
+    record["subjects"] = parse_subjects(row["Subject"])
+    record["operatives"] = parse_operatives(row["Operative"])
+    record["location"] = None
+    record["enriched"] = False
+
+    # Handle location data if present
+    if any([row["Locality"], row["Street Address"], row["Location Name"]]):
+        # Parse coordinates from location notes if present
+        if columns is None:
+            latitude, longitude = parse_coordinates(row["Location Notes"])
         else:
-            # Create new person
-            cursor.execute(
-                f"""
-                INSERT INTO {SCHEMA_NAME}.people (first_name, last_name)
-                VALUES (%s, %s)
-                RETURNING id
-            """,
-                (first_name, last_name),
-            )
-            person_id = cursor.fetchone()[0]
-            logging.info(f"New person created: {full_name} (ID: {person_id})")
+            latitude, longitude = column_value(columns, "coordinates", index)
 
-        people_ids.append(person_id)
+        record["location"], record["enriched"] = row_location(
+            row, crosswalk, latitude, longitude, activity_id
+        )
 
-    return people_ids
+    return record
 
 
-def get_or_create_operatives(cursor, operative_list):
+def row_location(row, crosswalk, latitude, longitude, activity_id=None):
     """
-    Get existing operative IDs or create new operatives and return their IDs. Names come as
-    First Name Last Name and need to be parsed into first_name and last_name fields.
+    Build a row's location from its columns, the coordinates parsed from its
+    location notes, and the crosswalk.
+    Returns tuple of (location, enriched).
     """
-    operative_ids = []
-
-    for full_name in operative_list:
-        name_parts = full_name.split()
-        if len(name_parts) < 2:
-            logging.warning(f"Invalid name format: '{full_name}'")
-            continue
+    # Check crosswalk for enriched location data
+    latitude, longitude, visits, enriched = apply_crosswalk(
+        crosswalk, row, latitude, longitude, activity_id
+    )
+    location = {
+        "locality": row["Locality"] or None,
+        "street_address": row["Street Address"] or None,
+        "location_name": row["Location Name"] or None,
+        "location_type": row["Location Type"] or None,
+        "location_notes": row["Location Notes"] or None,
+        "latitude": latitude,
+        "longitude": longitude,
+        "visits": visits,
+    }
+    return location, enriched
 
-        first_name = " ".join(name_parts[:-1])
-        last_name = name_parts[-1]
 
-        # Check if operative exists
-        cursor.execute(
-            f"""
-            SELECT id FROM {SCHEMA_NAME}.operatives 
-            WHERE first_name = %s AND last_name = %s
-        """,
-            (first_name, last_name),
-        )
+def count_record(record, stats):
+    """
+    Update stats for a parsed record. Returns True if the record should be written.
+    """
+    if record["skipped"]:
+        stats["rows_skipped"] += 1
+        return False
+    if record["error"]:
+        stats["errors"] += 1
+        return False
+    if record["status"] == "unchanged":
+        stats["rows_unchanged"] += 1
+        return False
 
-        result = cursor.fetchone()
-        if result:
-            operative_id = result[0]
-            logging.debug(f"Operative found: {full_name} (ID: {operative_id})")
-        else:
-            # Create new operative
-            cursor.execute(
-                f"""
-                INSERT INTO {SCHEMA_NAME}.operatives (first_name, last_name)
-                VALUES (%s, %s)
-                RETURNING id
-            """,
-                (first_name, last_name),
-            )
-            operative_id = cursor.fetchone()[0]
-            logging.info(f"New operative created: {full_name} (ID: {operative_id})")
+    stats["activities_processed"] += 1
+    if record["status"]:
+        stats[f"rows_{record['status']}"] += 1
+    if record["enriched"]:
+        stats["locations_enriched_from_crosswalk"] += 1
+    return True
 
-        operative_ids.append(operative_id)
 
-    return operative_ids
+def _row_dict(header, values):
+    """
+    Map a csv.reader row onto the header the way csv.DictReader does.
+    """
+    if len(values) < len(header):
+        values = values + [None] * (len(header) - len(values))
+    return dict(zip(header, values))
 
 
-def load_data(csv_file, crosswalk_file=None, enable_geocoding=False):
+class _LogBuffer(logging.Handler):
     """
-    Load data from CSV file into Postgres database.
-    Optionally uses a crosswalk file to enrich location data with coordinates and visits.
-    Geocoding is disabled by default and can be enabled with enable_geocoding parameter.
+    Collects log records in a parse worker so the main process can emit them in order.
     """
-    log_path = setup_logging()
-    logging.info(f"Starting data import from {csv_file}")
-    logging.info(f"Log file: {log_path}")
-    logging.info(
-        f"Database: {DB_CONFIG['dbname']}@{DB_CONFIG['host']}:{DB_CONFIG['port']}"
-    )
-    logging.info(f"Geocoding enabled: {enable_geocoding}")
-    if enable_geocoding and ALLOWED_STATES:
-        logging.info(f"Geocoding restricted to states: {', '.join(ALLOWED_STATES)}")
 
-    # Load crosswalk data if provided
-    crosswalk = load_crosswalk_data(crosswalk_file)
+    def __init__(self):
+        super().__init__()
+        self.records = []
 
-    conn = None
-    stats = {
-        "activities_processed": 0,
-        "activities_inserted": 0,
-        "locations_created": 0,
-        "locations_geocoded": 0,
-        "locations_enriched_from_crosswalk": 0,
-        "activity_locations_created": 0,
-        "rows_skipped": 0,
-        "errors": 0,
-        "warnings": 0,
-    }
+    def emit(self, record):
+        # Format now so the record pickles without its arguments
+        record.msg = record.getMessage()
+        record.args = None
+        record.exc_info = None
+        self.records.append(record)
 
-    try:
-        # Connect to database
-        conn = psycopg2.connect(**DB_CONFIG)
-        cursor = conn.cursor()
 
-        logging.info("Connected to database successfully")
+# Per-process state of a parse worker, set by _init_parse_worker
+_parse_worker = {}
 
-        # Read CSV file
-        with open(csv_file, "r", encoding="utf-8-sig") as f:
-            reader = csv.DictReader(f)
 
-            row_num = 1  # Start at 1 for header
-            for row in reader:
-                row_num += 1
+def _init_parse_worker(header, crosswalk, diff, log_level, csv_file=None):
+    """
+    Set up a parse worker process: route its logging into a buffer and keep the
+    header, crosswalk and row diff around for every chunk. With csv_file, chunks
+    may be byte ranges of the file, which the worker reads itself from a memory map.
+    """
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    log_buffer = _LogBuffer()
+    root.addHandler(log_buffer)
+    root.setLevel(log_level)
+
+    _parse_worker["header"] = header
+    _parse_worker["crosswalk"] = crosswalk
+    _parse_worker["diff"] = diff
+    _parse_worker["log"] = log_buffer
+    if csv_file is not None:
+        with open(csv_file, "rb") as f:
+            _parse_worker["file"] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _chunk_rows(rows):
+    """
+    Rows of a chunk sent to a worker, which are either csv.reader rows or the
+    (start, end) byte range of them in the worker's file.
+    """
+    if isinstance(rows, tuple):
+        start, end = rows
+        # Decoded with universal newlines, as the loader opens files
+        return read_rows(_parse_worker["file"][start:end], newline=None)
+    return rows
 
-                # Skip if ID is empty
-                if not row["ID"] or row["ID"].strip() == "":
-                    logging.debug(f"Row {row_num}: Skipping row with empty ID")
-                    stats["rows_skipped"] += 1
-                    continue
 
-                try:
-                    activity_id = int(row["ID"])
-                except ValueError as e:
-                    logging.error(f"Row {row_num}: Invalid ID '{row['ID']}': {e}")
-                    stats["errors"] += 1
-                    continue
+def parse_chunk_rows(header, rows, start_row_num, crosswalk, diff=None):
+    """
+    Parse a chunk of csv.reader rows into records.
+    The date, time, duration and coordinate columns of the whole chunk are parsed
+    first, so building each record is mostly lookups.
+    """
+    rows = [_row_dict(header, values) for values in rows]
+    columns = parse_field_columns(rows)
+    return [
+        parse_row(row, start_row_num + index, crosswalk, diff, columns, index)
+        for index, row in enumerate(rows)
+    ]
 
-                stats["activities_processed"] += 1
-
-                # Parse activity data
-                activity_data = {
-                    "id": activity_id,
-                    "source": row["Source"] or None,
-                    "operative": row["Operative"] or None,
-                    "date": parse_date(row["Date"], activity_id),
-                    "time": parse_time(row["Time"], activity_id),
-                    "duration": parse_duration(row["Duration"], activity_id),
-                    "activity": row.get("Activity")
-                    or row.get("Roping")
-                    or None,  # Support both "Activity" and legacy "Roping" column names
-                    "mode": row["Mode"] or None,
-                    "activity_notes": row["Activity Notes"] or None,
-                    "subject": row["Subject"] or None,
-                    "information": row["Information"] or None,
-                    "information_type": row["Information Type"] or None,
-                    "edited": parse_boolean(row["Edited"]),
-                    "edit_type": row["Edit Type"] or None,
-                }
 
-                # Validate required fields
-                if not activity_data["mode"]:
-                    logging.warning(
-                        f"Activity {activity_id}: Missing mode (activity type)"
-                    )
+def _parse_chunk(chunk):
+    """
+    Parse one chunk of rows in a worker process.
+    Returns tuple of (records, log records).
+    """
+    start_row_num, rows = chunk
+    log_buffer = _parse_worker["log"]
+
+    log_buffer.records = []
+    records = parse_chunk_rows(
+        _parse_worker["header"],
+        _chunk_rows(rows),
+        start_row_num,
+        _parse_worker["crosswalk"],
+        _parse_worker["diff"],
+    )
+    return records, log_buffer.records
 
-                try:
-                    # Insert or update activity
-                    cursor.execute(
-                        f"""
-                        INSERT INTO {SCHEMA_NAME}.activities (
-                            id, source, operative, date, time, duration, activity, mode,
-                            activity_notes, subject, information, information_type, edited, edit_type
-                        ) VALUES (
-                            %(id)s, %(source)s, %(operative)s, %(date)s, %(time)s, %(duration)s,
-                            %(activity)s, %(mode)s, %(activity_notes)s, %(subject)s, %(information)s,
-                            %(information_type)s, %(edited)s, %(edit_type)s
-                        )
-                        ON CONFLICT (id) DO UPDATE SET
-                            source = EXCLUDED.source,
-                            operative = EXCLUDED.operative,
-                            date = EXCLUDED.date,
-                            time = EXCLUDED.time,
-                            duration = EXCLUDED.duration,
-                            activity = EXCLUDED.activity,
-                            mode = EXCLUDED.mode,
-                            activity_notes = EXCLUDED.activity_notes,
-                            subject = EXCLUDED.subject,
-                            information = EXCLUDED.information,
-                            information_type = EXCLUDED.information_type,
-                            edited = EXCLUDED.edited,
-                            edit_type = EXCLUDED.edit_type
-                    """,
-                        activity_data,
-                    )
 
-                    if cursor.rowcount > 0:
-                        stats["activities_inserted"] += 1
-                        logging.debug(
-                            f"Activity {activity_id}: Inserted or updated successfully"
-                        )
+def csv_chunks(f, chunk_size=PARSE_CHUNK_SIZE, start_row=2, index=None):
+    """
+    Read an open CSV file as its header and a generator of (row number, rows)
+    chunks of up to chunk_size csv.reader rows, starting at row start_row.
+    With the file's RowIndex, reading starts at row start_row's byte offset.
+    Returns (None, None) for an empty file.
+    """
+    reader = csv.reader(f)
+    header = next(reader, None)
+    if header is None:
+        return None, None
 
-                except psycopg2.Error as e:
-                    logging.error(
-                        f"Activity {activity_id}: Database error during insert: {e}"
-                    )
-                    stats["errors"] += 1
-                    conn.rollback()
-                    continue
+    row_num = max(start_row, 2)
+    if index is not None and row_num > 2:
+        f.seek(index.offset(row_num))
+        reader = csv.reader(f)
+        skip = 0
+    else:
+        # Rows before start_row are read past without being parsed
+        skip = row_num - 2
 
-                # Handle location data if present
-                if any([row["Locality"], row["Street Address"], row["Location Name"]]):
-                    try:
-                        # Parse coordinates from location notes if present
-                        latitude, longitude = parse_coordinates(row["Location Notes"])
-                        visits = None
+    # Blank lines are skipped like csv.DictReader does; the header is row 1
+    rows = (values for values in reader if values)
 
-                        # Check crosswalk for enriched location data
-                        if crosswalk:
-                            location_name = row["Location Name"] or None
-                            locality = row["Locality"] or None
-
-                            # Try exact match first (location_name + locality)
-                            crosswalk_key = (location_name, locality)
-                            crosswalk_data = crosswalk.get(crosswalk_key)
-
-                            # Fallback to location_name only
-                            if not crosswalk_data and location_name:
-                                crosswalk_key = (location_name, None)
-                                crosswalk_data = crosswalk.get(crosswalk_key)
-
-                            # Use crosswalk data if found
-                            if crosswalk_data:
-                                enriched = False
-                                # Only use crosswalk coordinates if we don't have them from location notes
-                                if latitude is None and longitude is None:
-                                    latitude = crosswalk_data.get("latitude")
-                                    longitude = crosswalk_data.get("longitude")
-                                    if latitude and longitude:
-                                        enriched = True
-                                        logging.debug(
-                                            f"Activity {activity_id}: Using crosswalk coordinates "
-                                            f"for {location_name}, {locality}"
-                                        )
-
-                                visits = crosswalk_data.get("visits")
-                                if visits:
-                                    enriched = True
-                                    logging.debug(
-                                        f"Activity {activity_id}: Using crosswalk visits={visits} "
-                                        f"for {location_name}, {locality}"
-                                    )
-
-                                if enriched:
-                                    stats["locations_enriched_from_crosswalk"] += 1
-
-                        # Track if we're creating a new location without coords (will be geocoded)
-                        needs_geocoding = (
-                            latitude is None and longitude is None and enable_geocoding
-                        )
-
-                        location_id = get_or_create_location(
-                            cursor,
-                            row["Locality"],
-                            row["Street Address"],
-                            row["Location Name"],
-                            row["Location Type"],
-                            row["Location Notes"],
-                            latitude,
-                            longitude,
-                            visits,
-                            enable_geocoding,
-                        )
-
-                        # Track geocoding stats
-                        if needs_geocoding:
-                            # Check if location was successfully geocoded
-                            cursor.execute(
-                                f"""
-                                SELECT latitude, longitude FROM {SCHEMA_NAME}.locations
-                                WHERE id = %s
-                            """,
-                                (location_id,),
-                            )
-                            loc_coords = cursor.fetchone()
-                            if loc_coords and loc_coords[0] is not None:
-                                stats["locations_geocoded"] += 1
-
-                        # Link activity to location
-                        cursor.execute(
-                            f"""
-                            INSERT INTO {SCHEMA_NAME}.activity_locations (activity_id, location_id)
-                            VALUES (%s, %s)
-                            ON CONFLICT DO NOTHING
-                        """,
-                            (activity_id, location_id),
-                        )
-
-                        if cursor.rowcount > 0:
-                            stats["activity_locations_created"] += 1
-
-                    except psycopg2.Error as e:
-                        logging.error(
-                            f"Activity {activity_id}: Error creating location: {e}"
-                        )
-                        stats["errors"] += 1
-                        conn.rollback()
-                        continue
-
-                # Commit every 100 rows
-                if stats["activities_processed"] % 100 == 0:
-                    conn.commit()
-                    logging.info(
-                        f"Progress: Processed {stats['activities_processed']} activities..."
-                    )
+    def chunks():
+        deque(itertools.islice(rows, skip), maxlen=0)
+        chunk_row_num = row_num
+        while True:
+            chunk = list(itertools.islice(rows, chunk_size))
+            if not chunk:
+                return
+            yield chunk_row_num, chunk
+            chunk_row_num += len(chunk)
 
-        # Final commit
-        conn.commit()
+    return header, chunks()
 
-        # Log summary
-        logging.info("=" * 60)
-        logging.info("Import completed successfully!")
-        logging.info("=" * 60)
-        logging.info(f"Activities processed: {stats['activities_processed']}")
-        logging.info(f"Activities inserted: {stats['activities_inserted']}")
-        logging.info(
-            f"Activity-location links created: {stats['activity_locations_created']}"
-        )
-        logging.info(f"Rows skipped (empty ID): {stats['rows_skipped']}")
-        logging.info(f"Errors encountered: {stats['errors']}")
-        if crosswalk:
-            logging.info(
-                f"Locations enriched from crosswalk: {stats['locations_enriched_from_crosswalk']}"
-            )
-        if enable_geocoding:
-            logging.info(f"Locations geocoded: {stats['locations_geocoded']}")
 
-        # Get unique locations count
-        cursor.execute(f"SELECT COUNT(DISTINCT id) FROM {SCHEMA_NAME}.locations")
-        unique_locations = cursor.fetchone()[0]
-        logging.info(f"Unique locations in database: {unique_locations}")
+def _submit_in_order(executor, function, chunks, workers):
+    """
+    Submit function for every chunk to a process pool and yield the futures in
+    chunk order, keeping a couple of chunks per worker in flight so memory stays bounded.
+    """
+    pending = deque()
+    for chunk in chunks:
+        pending.append(executor.submit(function, chunk))
+        if len(pending) >= workers * 2:
+            yield pending.popleft()
+    while pending:
+        yield pending.popleft()
+
+
+def parse_records(
+    f,
+    crosswalk,
+    workers=1,
+    diff=None,
+    chunk_size=PARSE_CHUNK_SIZE,
+    start_row=2,
+    index=None,
+):
+    """
+    Parse an open CSV file into records, yielded in file order, a chunk of
+    chunk_size rows at a time, from row start_row on. With workers > 1, chunks
+    are parsed in a process pool while earlier records are being written; log
+    messages from the workers are replayed here with each chunk, so the log
+    reads the same as a single-process run.
+    With the file's RowIndex, reading starts at start_row's byte offset, and
+    workers are sent byte ranges of the file to read themselves instead of rows.
+    """
+    header, chunks = csv_chunks(f, chunk_size, start_row, index)
+    if header is None:
+        return
+
+    if workers <= 1:
+        for start_row_num, chunk in chunks:
+            with timer("parse.chunk"):
+                records = parse_chunk_rows(
+                    header, chunk, start_row_num, crosswalk, diff
+                )
+            yield from records
+        return
+
+    csv_file = None
+    if index is not None:
+        csv_file = index.csv_path
+        chunks = (
+            (row_num, (start, end))
+            for row_num, start, end in index.chunks(chunk_size, start_row)
+        )
 
-        # Get count of locations with coordinates
-        cursor.execute(
-            f"""
-            SELECT COUNT(*) FROM {SCHEMA_NAME}.locations
-            WHERE latitude IS NOT NULL AND longitude IS NOT NULL
-        """
+    # Built once here rather than in every worker
+    crosswalk.build()
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_parse_worker,
+        initargs=(header, crosswalk, diff, logging.getLogger().level, csv_file),
+    ) as executor:
+        for future in _submit_in_order(executor, _parse_chunk, chunks, workers):
+            with timer("parse.wait"):
+                records, log_records = future.result()
+            for log_record in log_records:
+                logging.getLogger(log_record.name).handle(log_record)
+            yield from records
+
+
+def validate_chunk_rows(header, rows, start_row_num, crosswalk):
+    """
+    Check a chunk of csv.reader rows the way loading them would, without a
+    database: IDs, every parsed field, names and crosswalk matches.
+    Returns tuple of (activity ids, None for rows that won't load; number of
+    rows skipped for an empty ID; Counter of issues by (column, level); the
+    rows with issues in row order, each a dict of its row number, id and issues).
+    """
+    width = len(header)
+    index = {name: i for i, name in enumerate(header)}
+    issue_counts = Counter()
+    rows_with_issues = {}
+
+    def report(offset, activity_id, column, level, value, message):
+        row_num = start_row_num + offset
+        row = rows_with_issues.get(row_num)
+        if row is None:
+            row = rows_with_issues[row_num] = {
+                "row": row_num,
+                "id": activity_id,
+                "issues": [],
+            }
+        row["issues"].append(
+            {"column": column, "level": level, "value": value, "message": message}
         )
-        locations_with_coords = cursor.fetchone()[0]
-        logging.info(f"Locations with coordinates: {locations_with_coords}")
+        issue_counts[column or "(row)", level] += 1
+
+    padded = [
+        values + [None] * (width - len(values)) if len(values) < width else values
+        for values in rows
+    ]
+
+    def column(name):
+        i = index[name]
+        return [values[i] for values in padded]
+
+    activity_ids = []
+    skipped = 0
+    for offset, value in enumerate(column("ID")):
+        activity_id = None
+        if not value or value.strip() == "":
+            skipped += 1
+        else:
+            try:
+                activity_id = int(value)
+            except ValueError:
+                report(offset, None, "ID", "error", value, f"Invalid ID '{value}'")
+        activity_ids.append(activity_id)
+
+    for offset, values in enumerate(rows):
+        if len(values) != width:
+            report(
+                offset,
+                activity_ids[offset],
+                None,
+                "warning",
+                None,
+                f"Row has {len(values)} fields, the header has {width}",
+            )
 
-        cursor.close()
+    localities = column("Locality")
+    addresses = column("Street Address")
+    location_names = column("Location Name")
+    has_location = [
+        any(values) for values in zip(localities, addresses, location_names)
+    ]
+
+    # Coordinates in the notes are only read for rows with a location
+    for name, parse, rows_parsed in (
+        ("Date", parse_dates, activity_ids),
+        ("Time", parse_times, activity_ids),
+        ("Duration", parse_durations, activity_ids),
+        ("Location Notes", parse_coordinate_column, has_location),
+    ):
+        values = column(name)
+        for offset, message in parse(values).errors.items():
+            if activity_ids[offset] is not None and rows_parsed[offset]:
+                report(
+                    offset,
+                    activity_ids[offset],
+                    name,
+                    "warning",
+                    values[offset],
+                    message,
+                )
 
-        print(f"\nImport complete! See {log_path} for details.")
+    modes = column("Mode")
+    edited = column("Edited")
+    names = {"Operative": column("Operative"), "Subject": column("Subject")}
+    crosswalk_notices = {}
+    for offset, activity_id in enumerate(activity_ids):
+        if activity_id is None:
+            continue
+        if not modes[offset]:
+            report(
+                offset,
+                activity_id,
+                "Mode",
+                "warning",
+                None,
+                "Missing mode (activity type)",
+            )
+        value = edited[offset]
+        if value and value.strip() and value.strip().lower() not in BOOLEAN_VALUES:
+            report(
+                offset,
+                activity_id,
+                "Edited",
+                "warning",
+                value,
+                f"Edited value '{value}' is not Yes, No or Query",
+            )
+        for name, values in names.items():
+            for full_name in invalid_names(values[offset]):
+                report(
+                    offset,
+                    activity_id,
+                    name,
+                    "warning",
+                    values[offset],
+                    f"Invalid name format: '{full_name}'",
+                )
+        if crosswalk and location_names[offset]:
+            key = location_names[offset], localities[offset] or None
+            if key not in crosswalk_notices:
+                match = crosswalk.match(*key)
+                if match is None:
+                    crosswalk_notices[key] = f"No crosswalk entry for '{key[0]}'"
+                elif match[2] < 1:
+                    crosswalk_notices[key] = (
+                        f"Matched crosswalk entry '{match[0][0]}' "
+                        f"(similarity {match[2]})"
+                    )
+                else:
+                    crosswalk_notices[key] = None
+            if crosswalk_notices[key]:
+                report(
+                    offset,
+                    activity_id,
+                    "Location Name",
+                    "notice",
+                    key[0],
+                    crosswalk_notices[key],
+                )
+
+    return (
+        activity_ids,
+        skipped,
+        issue_counts,
+        [rows_with_issues[row_num] for row_num in sorted(rows_with_issues)],
+    )
+
+
+def _validate_chunk(chunk):
+    """
+    Validate one chunk of rows in a worker process.
+    """
+    start_row_num, rows = chunk
+    return validate_chunk_rows(
+        _parse_worker["header"],
+        _chunk_rows(rows),
+        start_row_num,
+        _parse_worker["crosswalk"],
+    )
+
+
+def validate_file(csv_file, crosswalk, workers=1, chunk_size=PARSE_CHUNK_SIZE):
+    """
+    Validate one CSV file, in a process pool if workers > 1.
+    Returns the file's part of the validation report: row counts, missing
+    columns, issue counts by level and by column, and the issues of every row
+    that has any, in row order.
+    """
+    report = {
+        "file": str(csv_file),
+        "rows": 0,
+        "rows_skipped": 0,
+        "missing_columns": [],
+        "issues": dict.fromkeys(VALIDATION_LEVELS, 0),
+        "columns": {},
+        "rows_with_issues": [],
+    }
+    with open(csv_file, "r", encoding="utf-8-sig") as f:
+        header, chunks = csv_chunks(f, chunk_size)
+        if header is None:
+            return report
+        report["missing_columns"] = [c for c in REQUIRED_COLUMNS if c not in header]
+        if report["missing_columns"]:
+            report["issues"]["error"] += 1
+            return report
+
+        if workers <= 1:
+            results = [
+                validate_chunk_rows(header, rows, start_row_num, crosswalk)
+                for start_row_num, rows in chunks
+            ]
+        else:
+            # Workers read their own rows, found through the file's row index
+            index = RowIndex.open(csv_file)
+            chunks = (
+                (row_num, (start, end))
+                for row_num, start, end in index.chunks(chunk_size)
+            )
+            # Built once here rather than in every worker
+            crosswalk.build()
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_parse_worker,
+                initargs=(
+                    header,
+                    crosswalk,
+                    None,
+                    logging.getLogger().level,
+                    csv_file,
+                ),
+            ) as executor:
+                results = [
+                    future.result()
+                    for future in _submit_in_order(
+                        executor, _validate_chunk, chunks, workers
+                    )
+                ]
+
+    seen = {}
+    row_num = 2
+    for activity_ids, skipped, issue_counts, rows in results:
+        report["rows"] += len(activity_ids)
+        report["rows_skipped"] += skipped
+
+        duplicates = []
+        for offset, activity_id in enumerate(activity_ids):
+            if activity_id is None:
+                continue
+            first_row_num = seen.setdefault(activity_id, row_num + offset)
+            if first_row_num != row_num + offset:
+                duplicates.append((row_num + offset, activity_id, first_row_num))
+        if duplicates:
+            by_row_num = {row["row"]: row for row in rows}
+            for duplicate_row_num, activity_id, first_row_num in duplicates:
+                row = by_row_num.get(duplicate_row_num)
+                if row is None:
+                    row = by_row_num[duplicate_row_num] = {
+                        "row": duplicate_row_num,
+                        "id": activity_id,
+                        "issues": [],
+                    }
+                row["issues"].append(
+                    {
+                        "column": "ID",
+                        "level": "warning",
+                        "value": str(activity_id),
+                        "message": f"Duplicate ID {activity_id}, also on row {first_row_num}",
+                    }
+                )
+                issue_counts["ID", "warning"] += 1
+            rows = [by_row_num[n] for n in sorted(by_row_num)]
+        row_num += len(activity_ids)
+
+        for (column, level), count in issue_counts.items():
+            report["issues"][level] += count
+            counts = report["columns"].setdefault(
+                column, dict.fromkeys(VALIDATION_LEVELS, 0)
+            )
+            counts[level] += count
+        report["rows_with_issues"].extend(rows)
+
+    return report
+
+
+def validate_data(
+    csv_files,
+    crosswalk_file=None,
+    workers=1,
+    report_file=None,
+    crosswalk_threshold=CROSSWALK_MATCH_THRESHOLD,
+    log_level=LOG_LEVEL,
+):
+    """
+    Check CSV files without loading them or connecting to the database: every
+    row goes through the same parsers and crosswalk matching as a load, and what
+    a load would reject, drop or guess is collected into a JSON report written
+    to report_file (by default next to the log file). Issues are errors (rows or
+    files that can't be loaded), warnings (values that would be dropped) and
+    notices (values worth checking, like fuzzy crosswalk matches).
+    Returns the report.
+    """
+    if isinstance(csv_files, (str, Path)):
+        csv_files = [csv_files]
+
+    log_path = setup_logging(log_level)
+    logging.info(f"Validating {', '.join(map(str, csv_files))}")
+    if workers > 1:
+        logging.info(f"Validating with {workers} worker processes")
+
+    start = time.perf_counter()
+    crosswalk = load_crosswalk_data(crosswalk_file, crosswalk_threshold)
+    report = {
+        "rows": 0,
+        "issues": dict.fromkeys(VALIDATION_LEVELS, 0),
+        "files": [],
+    }
+    for csv_file in csv_files:
+        file_report = validate_file(csv_file, crosswalk, workers)
+        report["files"].append(file_report)
+        report["rows"] += file_report["rows"]
+        for level, count in file_report["issues"].items():
+            report["issues"][level] += count
+
+        issues = ", ".join(
+            f"{n} {level}s" for level, n in file_report["issues"].items()
+        )
+        logging.info(
+            f"{csv_file}: {file_report['rows']} rows, {issues} "
+            f"in {len(file_report['rows_with_issues'])} rows"
+        )
+        if file_report["missing_columns"]:
+            logging.error(
+                f"{csv_file}: missing columns {', '.join(file_report['missing_columns'])}"
+            )
+        examples = {}
+        for row in file_report["rows_with_issues"]:
+            for issue in row["issues"]:
+                column = issue["column"] or "(row)"
+                if len(examples.setdefault(column, [])) < VALIDATION_EXAMPLES:
+                    examples[column].append(f"row {row['row']}: {issue['message']}")
+        for column, counts in sorted(file_report["columns"].items()):
+            counted = ", ".join(f"{n} {level}s" for level, n in counts.items() if n)
+            logging.info(f"  {column}: {counted}")
+            for example in examples[column]:
+                logging.info(f"    {example}")
+    report["elapsed_seconds"] = round(time.perf_counter() - start, 3)
+
+    report_path = (
+        Path(report_file) if report_file else log_path.with_suffix(".validation.json")
+    )
+    # Compact, since a file with a systematic problem has an issue on every row
+    report_path.write_text(
+        json.dumps(report, ensure_ascii=False, separators=(",", ":"), default=str),
+        encoding="utf-8",
+    )
+    logging.info(
+        f"Validated {report['rows']} rows in {report['elapsed_seconds']}s: "
+        + ", ".join(f"{n} {level}s" for level, n in report["issues"].items())
+    )
+    logging.info(f"Validation report: {report_path}")
+    return report
+
+
+class LocationCache:
+    """
+    In-memory identity map of locations keyed by (locality, street_address, location_name).
+    The locations table is read once when the cache is created; after that, locations are
+    resolved without touching the database. New locations, coordinate and visit updates,
+    and activity-location links are buffered and written in batches by flush(). Locations
+    still missing coordinates are passed to the optional GeocodingPipeline.
+    Changes to the map since savepoint() are journaled so rollback_to_savepoint() can
+    undo them when the database is rolled back to a savepoint.
+    """
+
+    def __init__(self, cursor, geocoding=None):
+        self.cursor = cursor
+        self.geocoding = geocoding
+        self.locations = {}
+        self.pending_inserts = []
+        self.pending_updates = {}
+        self.pending_links = []
+        self.journal = {}
+        self.load()
+
+    def load(self):
+        """
+        (Re)load every location from the database into the map and drop any buffered writes.
+        """
+        self.cursor.execute(
+            f"""
+            SELECT id, locality, street_address, location_name, latitude, longitude, visits
+            FROM {SCHEMA_NAME}.locations
+        """
+        )
+        self.locations = {
+            (locality, street_address, location_name): {
+                "id": location_id,
+                "latitude": latitude,
+                "longitude": longitude,
+                "visits": visits,
+                "geocode_attempted": False,
+            }
+            for (
+                location_id,
+                locality,
+                street_address,
+                location_name,
+                latitude,
+                longitude,
+                visits,
+            ) in self.cursor.fetchall()
+        }
+
+        # Keys of locations merged into another one resolve to the same entry
+        by_id = {location["id"]: location for location in self.locations.values()}
+        self.cursor.execute(
+            f"""
+            SELECT locality, street_address, location_name, location_id
+            FROM {SCHEMA_NAME}.location_aliases
+        """
+        )
+        for locality, street_address, location_name, location_id in self.cursor:
+            key = (locality, street_address, location_name)
+            if key not in self.locations and location_id in by_id:
+                self.locations[key] = by_id[location_id]
+
+        self.pending_inserts = []
+        self.pending_updates = {}
+        self.pending_links = []
+        self.pending_geocodes = []
+        self.journal = {}
+        logging.info(f"Loaded {len(self.locations)} existing locations into cache")
+
+    def savepoint(self):
+        """
+        Start journaling changes to the map from here.
+        """
+        self.journal = {}
+
+    def rollback_to_savepoint(self):
+        """
+        Undo changes to the map since savepoint() and drop any buffered writes.
+        """
+        for key, saved in self.journal.items():
+            if saved is None:
+                del self.locations[key]
+            else:
+                self.locations[key].update(saved)
+        self.pending_inserts = []
+        self.pending_updates = {}
+        self.pending_links = []
+        self.pending_geocodes = []
+        self.journal = {}
+
+    def get_or_create(
+        self,
+        locality,
+        street_address,
+        location_name,
+        location_type,
+        location_notes,
+        latitude=None,
+        longitude=None,
+        visits=None,
+    ):
+        """
+        Resolve a location from the map, or create it if it is not known yet.
+        Coordinates are only filled in where the location has none; if they are still
+        missing and a geocoding pipeline is attached, the location is handed to it
+        (once per run) when it is flushed.
+        Returns tuple of (location, created); the location's "id" is set once it has
+        been flushed.
+        """
+        key = (locality or None, street_address or None, location_name or None)
+        location = self.locations.get(key)
+        created = location is None
+        increment("locations.misses" if created else "locations.hits")
+        if key not in self.journal:
+            self.journal[key] = None if created else dict(location)
+
+        if created:
+            location = {
+                "id": None,
+                "latitude": None,
+                "longitude": None,
+                "visits": None,
+                "geocode_attempted": False,
+            }
+            self.locations[key] = location
+            self.pending_inserts.append(
+                (location, key, location_type or None, location_notes or None)
+            )
+        # Locations created since the last flush are written whole by their insert
+        stored = location["id"] is not None
+
+        changed = False
+        if latitude is not None and longitude is not None:
+            if location["latitude"] is None and location["longitude"] is None:
+                location["latitude"] = latitude
+                location["longitude"] = longitude
+                changed = True
+                if stored:
+                    logging.info(
+                        "Location %s: Added coordinates (%s, %s)",
+                        location["id"],
+                        latitude,
+                        longitude,
+                        extra={"event": "location_coordinates_added"},
+                    )
+
+        if visits is not None and visits != location["visits"]:
+            location["visits"] = visits
+            changed = True
+            if stored:
+                logging.info(
+                    "Location %s: Set visits to %s",
+                    location["id"],
+                    visits,
+                    extra={"event": "location_visits_set"},
+                )
+
+        if (
+            self.geocoding
+            and location["latitude"] is None
+            and location["longitude"] is None
+            and not location["geocode_attempted"]
+        ):
+            location["geocode_attempted"] = True
+            self.pending_geocodes.append((location, key))
+
+        if changed and stored:
+            self.pending_updates[location["id"]] = location
+
+        return location, created
+
+    def link(self, activity_id, location):
+        """
+        Buffer an activity-location link until the next flush.
+        """
+        self.pending_links.append((activity_id, location))
+
+    @timer("sql.locations_flush")
+    def flush(self):
+        """
+        Write buffered locations, updates and links in batched statements.
+        Returns the number of activity-location links created.
+        """
+        if self.pending_inserts:
+            rows = execute_values(
+                self.cursor,
+                f"""
+                INSERT INTO {SCHEMA_NAME}.locations (locality, street_address, location_name, location_type, location_notes, latitude, longitude, visits)
+                VALUES %s
+                RETURNING id
+            """,
+                [
+                    (
+                        *key,
+                        location_type,
+                        location_notes,
+                        location["latitude"],
+                        location["longitude"],
+                        location["visits"],
+                    )
+                    for location, key, location_type, location_notes in self.pending_inserts
+                ],
+                fetch=True,
+            )
+            for (location, key, _, _), (location_id,) in zip(
+                self.pending_inserts, rows
+            ):
+                location["id"] = location_id
+                locality, _, location_name = key
+                if location["latitude"] and location["longitude"]:
+                    logging.info(
+                        "New location created: %s / %s (ID: %s) at (%s, %s)",
+                        locality,
+                        location_name,
+                        location_id,
+                        location["latitude"],
+                        location["longitude"],
+                        extra={"event": "location_created"},
+                    )
+                else:
+                    logging.info(
+                        "New location created: %s / %s (ID: %s)",
+                        locality,
+                        location_name,
+                        location_id,
+                        extra={"event": "location_created"},
+                    )
+
+        if self.pending_updates:
+            execute_values(
+                self.cursor,
+                f"""
+                UPDATE {SCHEMA_NAME}.locations l
+                SET latitude = u.latitude, longitude = u.longitude, visits = u.visits
+                FROM (VALUES %s) AS u (id, latitude, longitude, visits)
+                WHERE l.id = u.id
+            """,
+                [
+                    (
+                        location_id,
+                        location["latitude"],
+                        location["longitude"],
+                        location["visits"],
+                    )
+                    for location_id, location in self.pending_updates.items()
+                ],
+                template="(%s, %s::numeric, %s::numeric, %s::integer)",
+            )
+
+        links_created = 0
+        if self.pending_links:
+            links = {
+                (activity_id, location["id"])
+                for activity_id, location in self.pending_links
+            }
+            links_created = len(
+                execute_values(
+                    self.cursor,
+                    f"""
+                    INSERT INTO {SCHEMA_NAME}.activity_locations (activity_id, location_id)
+                    VALUES %s
+                    ON CONFLICT DO NOTHING
+                    RETURNING activity_id
+                """,
+                    list(links),
+                    fetch=True,
+                )
+            )
+
+        # Locations are only handed to the geocoder once they have an id
+        for location, key in self.pending_geocodes:
+            if location["latitude"] is None and location["longitude"] is None:
+                self.geocoding.submit(location["id"], *key)
+
+        self.pending_inserts = []
+        self.pending_updates = {}
+        self.pending_links = []
+        self.pending_geocodes = []
+        return links_created
+
+
+@lru_cache(maxsize=None)
+def split_name(full_name):
+    """
+    Split a full name into (first_name, last_name).
+    The last word is the last name and everything before it the first name.
+    Returns None if the name has fewer than two words.
+    """
+    name_parts = full_name.split()
+    if len(name_parts) < 2:
+        return None
+    return " ".join(name_parts[:-1]), name_parts[-1]
+
+
+@lru_cache(maxsize=None)
+def invalid_names(names_str):
+    """
+    Names in a subjects or operatives string that split_name can't split.
+    """
+    return tuple(
+        name for name in parse_operatives(names_str) if split_name(name) is None
+    )
+
+
+class NameResolver:
+    """
+    Resolves full names to ids in the people or operatives table.
+    Names are queued with add() and resolved in batches with a single
+    unnest-based upsert, and the name -> id map is kept for the rest of the
+    import so each name is looked up at most once. A resolver can start from the
+    committed names of another one (known).
+    """
+
+    def __init__(self, cursor, table, label, known=None):
+        self.cursor = cursor
+        self.table = table
+        self.label = label
+        self.ids = dict(known.ids) if known else {}
+        self.invalid = set(known.invalid) if known else set()
+        self.queued = set()
+        self.uncommitted = set()
+
+    def add(self, names):
+        """
+        Queue names to be resolved by the next resolve() call.
+        """
+        self.queued.update(names)
+
+    @timer("sql.names_resolve")
+    def resolve(self, names=()):
+        """
+        Resolve the queued names and any names given that haven't been seen yet,
+        creating missing rows. Returns the number of rows created.
+        """
+        names = self.queued.union(names)
+        self.queued = set()
+
+        pending = {}
+        for full_name in names:
+            if full_name in self.ids or full_name in self.invalid:
+                continue
+            parts = split_name(full_name)
+            if parts is None:
+                logging.warning(
+                    "Invalid name format: '%s'",
+                    full_name,
+                    extra={"event": "invalid_name"},
+                )
+                self.invalid.add(full_name)
+                continue
+            pending[full_name] = parts
+
+        if not pending:
+            return 0
+
+        wanted = set(pending.values())
+        first_names, last_names = zip(*wanted)
+        self.cursor.execute(
+            f"""
+            WITH input (first_name, last_name) AS (
+                SELECT * FROM unnest(%s::text[], %s::text[])
+            ),
+            inserted AS (
+                INSERT INTO {SCHEMA_NAME}.{self.table} (first_name, last_name)
+                SELECT first_name, last_name FROM input
+                ON CONFLICT (first_name, last_name) DO NOTHING
+                RETURNING id, first_name, last_name
+            )
+            SELECT id, first_name, last_name, TRUE FROM inserted
+            UNION ALL
+            SELECT t.id, t.first_name, t.last_name, FALSE
+            FROM {SCHEMA_NAME}.{self.table} t
+            JOIN input USING (first_name, last_name)
+        """,
+            (list(first_names), list(last_names)),
+        )
+        rows = self.cursor.fetchall()
+
+        # Rows committed by another import after this statement's snapshot was
+        # taken are neither inserted nor visible above; look them up directly
+        missing = wanted - {
+            (first_name, last_name) for _, first_name, last_name, _ in rows
+        }
+        if missing:
+            first_names, last_names = zip(*missing)
+            self.cursor.execute(
+                f"""
+                SELECT t.id, t.first_name, t.last_name, FALSE
+                FROM {SCHEMA_NAME}.{self.table} t
+                JOIN unnest(%s::text[], %s::text[]) AS input (first_name, last_name)
+                USING (first_name, last_name)
+            """,
+                (list(first_names), list(last_names)),
+            )
+            rows += self.cursor.fetchall()
+
+        ids = {}
+        created = 0
+        for row_id, first_name, last_name, inserted in rows:
+            ids[(first_name, last_name)] = row_id
+            if inserted:
+                created += 1
+                logging.info(
+                    "New %s created: %s %s (ID: %s)",
+                    self.label,
+                    first_name,
+                    last_name,
+                    row_id,
+                    extra={"event": f"{self.label}_created"},
+                )
+
+        for full_name, parts in pending.items():
+            self.ids[full_name] = ids[parts]
+            self.uncommitted.add(full_name)
+
+        return created
+
+    def commit(self):
+        """
+        Mark every name resolved so far as committed.
+        """
+        self.uncommitted.clear()
+
+    def rollback(self):
+        """
+        Forget names queued or resolved since the last commit, since their rows may be gone.
+        """
+        for full_name in self.uncommitted:
+            del self.ids[full_name]
+        self.uncommitted.clear()
+        self.queued.clear()
+
+
+def get_or_create_subjects(cursor, people_list):
+    """
+    Get existing people IDs or create new people and return their IDs. Names come as
+    First Name Last Name and need to be parsed into first_name and last_name fields.
+    """
+    resolver = NameResolver(cursor, "people", "person")
+    resolver.resolve(people_list)
+    return [resolver.ids[name] for name in people_list if name in resolver.ids]
+
+
+def get_or_create_operatives(cursor, operative_list):
+    """
+    Get existing operative IDs or create new operatives and return their IDs. Names come as
+    First Name Last Name and need to be parsed into first_name and last_name fields.
+    """
+    resolver = NameResolver(cursor, "operatives", "operative")
+    resolver.resolve(operative_list)
+    return [resolver.ids[name] for name in operative_list if name in resolver.ids]
+
+
+def create_staging_tables(cursor):
+    """
+    Create the temp staging tables used by the bulk loader.
+    Rows are cleared automatically at every commit, so each batch starts empty.
+    """
+    cursor.execute(
+        f"""
+        CREATE TEMP TABLE IF NOT EXISTS staging_activities (
+            row_num INTEGER,
+            LIKE {SCHEMA_NAME}.activities
+        ) ON COMMIT DELETE ROWS
+    """
+    )
+    cursor.execute(
+        """
+        CREATE TEMP TABLE IF NOT EXISTS staging_locations (
+            row_num INTEGER,
+            activity_id INTEGER,
+            locality TEXT,
+            street_address TEXT,
+            location_name TEXT,
+            location_type TEXT,
+            location_notes TEXT,
+            latitude NUMERIC(10, 8),
+            longitude NUMERIC(11, 8),
+            visits INTEGER,
+            location_id INTEGER
+        ) ON COMMIT DELETE ROWS
+    """
+    )
+
+
+@timer("sql.copy")
+def copy_rows(cursor, table, columns, rows):
+    """
+    Stream rows into a table with COPY FROM STDIN.
+    None values are written as unquoted empty fields, which COPY reads as NULL.
+    """
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+    cursor.copy_expert(
+        f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer
+    )
+
+
+@timer("sql.bulk_batch")
+def flush_bulk_batch(cursor, activity_rows, location_rows, geocoding, stats):
+    """
+    Resolve one staged batch into activities, locations and activity_locations.
+    Within a batch the last row wins for an activity, a new location takes its
+    type and notes from the first row that mentions it, coordinates come from the
+    first row that has them and visits from the last row that has them - the same
+    outcome as loading the rows one at a time.
+    """
+    copy_rows(
+        cursor, "staging_activities", ["row_num"] + ACTIVITY_COLUMNS, activity_rows
+    )
+    copy_rows(cursor, "staging_locations", STAGING_LOCATION_COLUMNS, location_rows)
+
+    columns = ", ".join(ACTIVITY_COLUMNS)
+    updates = ",\n            ".join(
+        f"{col} = EXCLUDED.{col}" for col in ACTIVITY_COLUMNS if col != "id"
+    )
+    cursor.execute(
+        f"""
+        INSERT INTO {SCHEMA_NAME}.activities ({columns})
+        SELECT DISTINCT ON (id) {columns}
+        FROM staging_activities
+        ORDER BY id, row_num DESC
+        ON CONFLICT (id) DO UPDATE SET
+            {updates}
+    """
+    )
+    stats["activities_inserted"] += cursor.rowcount
+
+    if not location_rows:
+        return
+
+    # Match keys NULL-safely with plain equalities rather than IS NOT DISTINCT FROM,
+    # which can't be hashed and turns the join into a nested loop over locations
+    def key_matches(table):
+        return "\n        AND ".join(
+            f"COALESCE({table}.{col}, '') = COALESCE(s.{col}, '') "
+            f"AND ({table}.{col} IS NULL) = (s.{col} IS NULL)"
+            for col in ("locality", "street_address", "location_name")
+        )
+
+    resolve_staged_locations = f"""
+        UPDATE staging_locations s
+        SET location_id = l.id
+        FROM {SCHEMA_NAME}.locations l
+        WHERE s.location_id IS NULL
+        AND {key_matches("l")}
+    """
+    cursor.execute(resolve_staged_locations)
+
+    # Keys of locations merged into another one resolve to that one
+    cursor.execute(
+        f"""
+        UPDATE staging_locations s
+        SET location_id = a.location_id
+        FROM {SCHEMA_NAME}.location_aliases a
+        WHERE s.location_id IS NULL
+        AND {key_matches("a")}
+    """
+    )
+
+    # Create locations that don't exist yet, one per distinct key
+    cursor.execute(
+        f"""
+        INSERT INTO {SCHEMA_NAME}.locations (locality, street_address, location_name, location_type, location_notes, visits)
+        SELECT DISTINCT ON (locality, street_address, location_name)
+            locality, street_address, location_name, location_type, location_notes, NULL::integer
+        FROM staging_locations
+        WHERE location_id IS NULL
+        ORDER BY locality, street_address, location_name, row_num
+    """
+    )
+    stats["locations_created"] += cursor.rowcount
+    if cursor.rowcount > 0:
+        cursor.execute(resolve_staged_locations)
+        # Refresh statistics so the updates below don't plan for a table that
+        # autovacuum still thinks is empty (nested loops on a first large load)
+        cursor.execute(f"ANALYZE {SCHEMA_NAME}.locations")
+
+    # Fill in coordinates only where the location has none yet
+    cursor.execute(
+        f"""
+        UPDATE {SCHEMA_NAME}.locations l
+        SET latitude = c.latitude, longitude = c.longitude
+        FROM (
+            SELECT DISTINCT ON (location_id) location_id, latitude, longitude
+            FROM staging_locations
+            WHERE latitude IS NOT NULL AND longitude IS NOT NULL
+            ORDER BY location_id, row_num
+        ) c
+        WHERE l.id = c.location_id
+        AND l.latitude IS NULL AND l.longitude IS NULL
+    """
+    )
+
+    cursor.execute(
+        f"""
+        UPDATE {SCHEMA_NAME}.locations l
+        SET visits = v.visits
+        FROM (
+            SELECT DISTINCT ON (location_id) location_id, visits
+            FROM staging_locations
+            WHERE visits IS NOT NULL
+            ORDER BY location_id, row_num DESC
+        ) v
+        WHERE l.id = v.location_id
+        AND l.visits IS DISTINCT FROM v.visits
+    """
+    )
+
+    cursor.execute(
+        f"""
+        INSERT INTO {SCHEMA_NAME}.activity_locations (activity_id, location_id)
+        SELECT DISTINCT activity_id, location_id FROM staging_locations
+        ON CONFLICT DO NOTHING
+    """
+    )
+    stats["activity_locations_created"] += cursor.rowcount
+
+    if geocoding:
+        cursor.execute(
+            f"""
+            SELECT DISTINCT l.id, l.locality, l.street_address, l.location_name
+            FROM {SCHEMA_NAME}.locations l
+            JOIN staging_locations s ON s.location_id = l.id
+            WHERE l.latitude IS NULL AND l.longitude IS NULL
+        """
+        )
+        for location_id, locality, street_address, location_name in cursor.fetchall():
+            geocoding.submit(location_id, locality, street_address, location_name)
+
+
+def load_rows_bulk(
+    conn,
+    records,
+    geocoding,
+    stats,
+    batch_size,
+    fingerprints=None,
+    names=None,
+    run=None,
+):
+    """
+    Load parsed records in batches through COPY-fed staging tables.
+    Each batch costs a handful of round trips no matter how many rows it holds,
+    and is committed on its own, together with its rows' fingerprints if a
+    FingerprintStore is given and a checkpoint if an ImportRun is. Rows that fail
+    are isolated by write_with_savepoints.
+    names is an optional (people, operatives) pair of NameResolvers to start from.
+    """
+    cursor = conn.cursor()
+    create_staging_tables(cursor)
+    conn.commit()
+    known_people, known_operatives = names or (None, None)
+    people = NameResolver(cursor, "people", "person", known_people)
+    operatives = NameResolver(cursor, "operatives", "operative", known_operatives)
+    batch = []
+
+    def write(records, batch_stats):
+        # Rows staged by an earlier part of a batch that is being retried in parts
+        # are still there, since the staging tables are only cleared at commit
+        cursor.execute("DELETE FROM staging_activities; DELETE FROM staging_locations")
+
+        activity_rows = []
+        location_rows = []
+        for record in records:
+            row_num = record["row_num"]
+            activity_data = record["activity"]
+            activity_rows.append(
+                [row_num] + [activity_data[col] for col in ACTIVITY_COLUMNS]
+            )
+            people.add(record["subjects"])
+            operatives.add(record["operatives"])
+
+            location = record["location"]
+            if location:
+                location_rows.append(
+                    [row_num, activity_data["id"]]
+                    + [location[col] for col in STAGING_LOCATION_COLUMNS[2:]]
+                )
+
+        if fingerprints:
+            clear_activity_links(
+                cursor,
+                [
+                    record["activity_id"]
+                    for record in records
+                    if record["status"] == "changed"
+                ],
+            )
+        flush_bulk_batch(cursor, activity_rows, location_rows, geocoding, batch_stats)
+        batch_stats["people_created"] += people.resolve()
+        batch_stats["operatives_created"] += operatives.resolve()
+        if fingerprints:
+            for record in records:
+                fingerprints.add(
+                    "activity", record["activity_id"], record["fingerprint"]
+                )
+            fingerprints.flush()
+
+    def rollback():
+        people.rollback()
+        operatives.rollback()
+        if fingerprints:
+            fingerprints.rollback()
+
+    @timer("write.batch")
+    def flush():
+        if not batch:
+            return
+        write_with_savepoints(cursor, batch, write, rollback, stats)
+        if run:
+            run.checkpoint(last_row)
+        conn.commit()
+        people.commit()
+        operatives.commit()
+        batch.clear()
+        logging.info(
+            f"Progress: Processed {stats['activities_processed']} activities..."
+        )
+
+    last_row = None
+    for record in records:
+        last_row = record["row_num"]
+        if not count_record(record, stats):
+            continue
+        batch.append(record)
+        if len(batch) >= batch_size:
+            flush()
+
+    flush()
+    cursor.close()
+
+
+def write_with_savepoints(cursor, records, write, rollback, stats):
+    """
+    Write records with write(records, batch_stats) under a savepoint.
+    If that fails, the savepoint is rolled back, rollback() resets whatever state
+    write() built up, and the records are retried in halves down to single rows,
+    so a bad row is the only one lost and the rest of its transaction is kept.
+    Counts added to batch_stats are merged into stats only once their records
+    are written; every row that can't be written counts as one error.
+    """
+    batch_stats = Counter()
+    cursor.execute("SAVEPOINT write_batch")
+    try:
+        write(records, batch_stats)
+    except psycopg2.Error as e:
+        cursor.execute("ROLLBACK TO SAVEPOINT write_batch")
+        cursor.execute("RELEASE SAVEPOINT write_batch")
+        rollback()
+        if len(records) == 1:
+            record = records[0]
+            logging.error(
+                "Row %s: Activity %s: Database error, row not loaded: %s",
+                record["row_num"],
+                record["activity_id"],
+                e,
+            )
+            stats["errors"] += 1
+            return
+        logging.debug(
+            "Rows %s-%s: Database error, retrying in smaller batches: %s",
+            records[0]["row_num"],
+            records[-1]["row_num"],
+            e,
+        )
+        middle = len(records) // 2
+        write_with_savepoints(cursor, records[:middle], write, rollback, stats)
+        write_with_savepoints(cursor, records[middle:], write, rollback, stats)
+        return
+
+    cursor.execute("RELEASE SAVEPOINT write_batch")
+    for key, value in batch_stats.items():
+        stats[key] += value
+
+
+def clear_activity_links(cursor, activity_ids):
+    """
+    Remove the location links of changed activities so they are relinked from
+    their new rows rather than keeping links to locations they no longer name.
+    """
+    if activity_ids:
+        cursor.execute(
+            f"DELETE FROM {SCHEMA_NAME}.activity_locations WHERE activity_id = ANY(%s)",
+            (list(activity_ids),),
+        )
+
+
+class IncrementalImport:
+    """
+    State of an incremental import of one source file: the fingerprints of the
+    previous import, the activities seen in this one, and the crosswalk diff.
+    Rows are classified in the parse stage through self.diff; the writers record
+    new fingerprints through self.store; finish() removes what the file no longer has.
+    """
+
+    def __init__(self, conn, source_file, crosswalk, stats):
+        self.conn = conn
+        self.stats = stats
+        self.store = FingerprintStore(conn.cursor(), source_file)
+        self.seen = set()
+        self.duplicates = set()
+        self.invalid_rows = 0
+
+        self.known = {
+            int(key): fingerprint
+            for key, fingerprint in self.store.load("activity").items()
+        }
+        stored_crosswalk = self.store.load("crosswalk")
+        self.crosswalk_fingerprints, dirty, counts = diff_crosswalk(
+            stored_crosswalk, crosswalk
+        )
+        self.stale_crosswalk = [
+            key for key in stored_crosswalk if key not in self.crosswalk_fingerprints
+        ]
+        for change, count in counts.items():
+            stats[f"crosswalk_{change}"] = count
+        self.diff = RowDiff(
+            self.known, CrosswalkIndex.from_keys(dirty, crosswalk.threshold)
+        )
+
+        logging.info(
+            f"Incremental import of {source_file}: {len(self.known)} activities "
+            f"from the previous import; crosswalk entries added: {counts['added']}, "
+            f"changed: {counts['changed']}, removed: {counts['removed']}"
+        )
+
+    def track(self, records):
+        """
+        Pass records through, noting the activity ids they carry.
+        """
+        for record in records:
+            if record["error"]:
+                self.invalid_rows += 1
+            activity_id = record.get("activity_id")
+            if activity_id is not None:
+                if activity_id in self.seen and activity_id not in self.duplicates:
+                    logging.warning(
+                        f"Activity {activity_id}: ID appears more than once; "
+                        f"it will be reloaded on every incremental import"
+                    )
+                    self.duplicates.add(activity_id)
+                self.seen.add(activity_id)
+            yield record
+
+    def finish(self):
+        """
+        Delete activities that are no longer in the file and store the crosswalk
+        fingerprints. Rows with a duplicated ID keep no fingerprint, so all of their
+        occurrences are applied again, in order, next time.
+        """
+        cursor = self.store.cursor
+        removed = [key for key in self.known if key not in self.seen]
+        if removed:
+            cursor.execute(
+                f"DELETE FROM {SCHEMA_NAME}.activities WHERE id = ANY(%s)", (removed,)
+            )
+            self.stats["activities_deleted"] += cursor.rowcount
+            logging.info(
+                f"Deleted {cursor.rowcount} activities no longer in the source file"
+            )
+        self.store.delete("activity", removed + sorted(self.duplicates))
+
+        # Rows affected by a crosswalk change must be applied before the change is
+        # recorded, or a failed row would be skipped as unchanged next time
+        if self.stats["errors"] > self.invalid_rows:
+            logging.warning(
+                "Crosswalk fingerprints not updated because of database errors; "
+                "rows using changed crosswalk entries will be reloaded next time"
+            )
+        else:
+            self.store.delete("crosswalk", self.stale_crosswalk)
+            for key, fingerprint in self.crosswalk_fingerprints.items():
+                self.store.add("crosswalk", key, fingerprint)
+            self.store.flush()
+
+        self.conn.commit()
+        cursor.close()
+
+
+class ImportRun:
+    """
+    An import of one source file, recorded in the import_runs table with its
+    file's hash. checkpoint() stores the last row read and the statistics so far
+    inside the caller's transaction, so a checkpoint is committed together with the
+    rows it covers. With resume, the latest run of the file is continued if it
+    didn't finish and the file hasn't changed since; start_row is then the row
+    after its checkpoint and stats start from the ones it stored.
+    """
+
+    def __init__(self, conn, csv_file, stats, resume=False):
+        self.conn = conn
+        self.stats = stats
+        self.source_file = Path(csv_file).name
+        self.start_row = 2
+        self.last_row = 1
+        self.cursor = conn.cursor()
+        file_hash = file_fingerprint(csv_file)
+
+        previous = None
+        if resume:
+            self.cursor.execute(
+                f"""
+                SELECT id, file_hash, status, last_row, stats
+                FROM {SCHEMA_NAME}.import_runs
+                WHERE source_file = %s
+                ORDER BY id DESC
+                LIMIT 1
+            """,
+                (self.source_file,),
+            )
+            previous = self.cursor.fetchone()
+            if previous is None or previous[2] == "completed":
+                logging.info(
+                    f"No interrupted import of {self.source_file} to resume; "
+                    f"starting from the first row"
+                )
+                previous = None
+            elif previous[1] != file_hash:
+                logging.warning(
+                    f"{self.source_file} has changed since import run {previous[0]} "
+                    f"was interrupted; starting from the first row"
+                )
+                previous = None
+
+        if previous:
+            self.id, _, _, self.last_row, stored_stats = previous
+            self.start_row = self.last_row + 1
+            for key, value in stored_stats.items():
+                stats[key] = value
+            self.cursor.execute(
+                f"""
+                UPDATE {SCHEMA_NAME}.import_runs
+                SET status = 'running', updated_at = CURRENT_TIMESTAMP
+                WHERE id = %s
+            """,
+                (self.id,),
+            )
+            logging.info(
+                f"Resuming import run {self.id} of {self.source_file} after row "
+                f"{self.last_row} ({stats['activities_processed']} activities loaded)"
+            )
+        else:
+            self.cursor.execute(
+                f"""
+                INSERT INTO {SCHEMA_NAME}.import_runs (source_file, file_hash)
+                VALUES (%s, %s)
+                RETURNING id
+            """,
+                (self.source_file, file_hash),
+            )
+            self.id = self.cursor.fetchone()[0]
+        conn.commit()
+
+    def _save(self, status=None):
+        self.cursor.execute(
+            f"""
+            UPDATE {SCHEMA_NAME}.import_runs
+            SET last_row = %s, stats = %s, status = COALESCE(%s, status),
+                updated_at = CURRENT_TIMESTAMP,
+                finished_at = CASE WHEN %s = 'completed' THEN CURRENT_TIMESTAMP END
+            WHERE id = %s
+        """,
+            (self.last_row, json.dumps(self.stats), status, status, self.id),
+        )
+
+    def checkpoint(self, last_row):
+        """
+        Record that every row up to last_row is loaded, in the caller's transaction.
+        """
+        self.last_row = last_row
+        self._save()
+
+    def finish(self):
+        """
+        Mark the run completed, with its final statistics.
+        """
+        self._save("completed")
+        self.conn.commit()
+        self.cursor.close()
+
+    def fail(self):
+        """
+        Roll back the transaction in progress and mark the run failed, keeping its
+        last checkpoint. Does nothing if the connection is gone.
+        """
+        try:
+            self.conn.rollback()
+            self.cursor.execute(
+                f"""
+                UPDATE {SCHEMA_NAME}.import_runs
+                SET status = 'failed', updated_at = CURRENT_TIMESTAMP
+                WHERE id = %s
+            """,
+                (self.id,),
+            )
+            self.conn.commit()
+            logging.info(
+                f"Import run {self.id} of {self.source_file} stopped after row "
+                f"{self.last_row}; run again with --resume to continue from there"
+            )
+        except psycopg2.Error:
+            pass
+
+
+def submit_missing_coordinates(conn, geocoding):
+    """
+    Hand every location without coordinates to the geocoding pipeline. A resumed
+    import doesn't read the rows before its checkpoint, so the locations they
+    named would otherwise not be geocoded if the interrupted run never wrote
+    their coordinates back. Lookups done before come from the geocode cache.
+    Returns the number of locations submitted.
+    """
+    cursor = conn.cursor()
+    cursor.execute(
+        f"""
+        SELECT id, locality, street_address, location_name
+        FROM {SCHEMA_NAME}.locations
+        WHERE latitude IS NULL AND longitude IS NULL
+        ORDER BY id
+    """
+    )
+    locations = cursor.fetchall()
+    cursor.close()
+    for location in locations:
+        geocoding.submit(*location)
+    logging.info(
+        f"Resubmitted {len(locations)} locations without coordinates for geocoding"
+    )
+    return len(locations)
+
+
+# Activity count tables, with their key columns and the query that counts
+# activities per key. They are created by migration 000008, whose triggers record
+# the keys each change to activities or activity_locations touches.
+AGGREGATES = {
+    "activity_counts_by_hour": (
+        ("hour",),
+        """
+        SELECT EXTRACT(HOUR FROM time)::smallint AS hour, COUNT(*) AS activity_count
+        FROM {schema}.activities
+        WHERE time IS NOT NULL
+        GROUP BY 1
+        """,
+    ),
+    "activity_counts_by_date": (
+        ("date",),
+        """
+        SELECT date, COUNT(*) AS activity_count
+        FROM {schema}.activities
+        WHERE date IS NOT NULL
+        GROUP BY 1
+        """,
+    ),
+    "activity_counts_by_location": (
+        ("location_id",),
+        """
+        SELECT location_id, COUNT(*) AS activity_count
+        FROM {schema}.activity_locations
+        GROUP BY 1
+        """,
+    ),
+    "activity_counts_by_operative": (
+        ("operative", "activity"),
+        """
+        SELECT COALESCE(operative, '') AS operative, COALESCE(activity, '') AS activity,
+               COUNT(*) AS activity_count
+        FROM {schema}.activities
+        GROUP BY 1, 2
+        """,
+    ),
+}
+
+
+@timer("sql.aggregates_refresh")
+def refresh_aggregates(conn):
+    """
+    Recompute the activity count tables for only the keys recorded as changed
+    since the last refresh, and commit. Keys recorded by transactions that have
+    not committed yet are left for the next refresh.
+    Returns the number of keys refreshed per table.
+    """
+    cursor = conn.cursor()
+    # One refresh at a time, so concurrent imports never rewrite the same key at once
+    cursor.execute(
+        "SELECT pg_advisory_xact_lock(hashtext(%s))",
+        (f"{SCHEMA_NAME}.activity_aggregates",),
+    )
+    cursor.execute(
+        f"""
+        CREATE TEMP TABLE aggregate_changes ON COMMIT DROP AS
+        WITH changes AS (
+            DELETE FROM {SCHEMA_NAME}.activity_aggregate_changes RETURNING *
+        )
+        SELECT DISTINCT * FROM changes
+    """
+    )
+
+    refreshed = {}
+    for table, (keys, counts) in AGGREGATES.items():
+        key_list = ", ".join(keys)
+        cursor.execute(
+            f"""
+            CREATE TEMP TABLE changed_keys ON COMMIT DROP AS
+            SELECT DISTINCT {key_list} FROM aggregate_changes
+            WHERE {" AND ".join(f"{key} IS NOT NULL" for key in keys)}
+        """
+        )
+        refreshed[table] = cursor.rowcount
+        if cursor.rowcount:
+            cursor.execute(
+                f"""
+                DELETE FROM {SCHEMA_NAME}.{table}
+                WHERE ({key_list}) IN (SELECT {key_list} FROM changed_keys)
+            """
+            )
+            # Keys whose activities are all gone get no row back
+            cursor.execute(
+                f"""
+                INSERT INTO {SCHEMA_NAME}.{table} ({key_list}, activity_count)
+                SELECT * FROM ({counts.format(schema=SCHEMA_NAME)}) counts
+                WHERE ({key_list}) IN (SELECT {key_list} FROM changed_keys)
+            """
+            )
+        cursor.execute("DROP TABLE changed_keys")
+
+    conn.commit()
+    cursor.close()
+    return refreshed
+
+
+@timer("sql.geocode_write_back")
+def write_geocoded_locations(conn, results):
+    """
+    Write coordinates found by the geocoding pipeline back to locations in one batch.
+    Locations that got coordinates from another source in the meantime are left alone.
+    Returns the number of locations updated.
+    """
+    if not results:
+        return 0
+
+    cursor = conn.cursor()
+    updated = execute_values(
+        cursor,
+        f"""
+        UPDATE {SCHEMA_NAME}.locations l
+        SET latitude = g.latitude, longitude = g.longitude
+        FROM (VALUES %s) AS g (id, latitude, longitude)
+        WHERE l.id = g.id
+        AND l.latitude IS NULL AND l.longitude IS NULL
+        RETURNING l.id, l.latitude, l.longitude
+    """,
+        results,
+        fetch=True,
+    )
+    conn.commit()
+    cursor.close()
+
+    for location_id, latitude, longitude in updated:
+        logging.info(
+            "Location %s: Geocoded to (%s, %s)",
+            location_id,
+            latitude,
+            longitude,
+            extra={"event": "location_geocoded"},
+        )
+    return len(updated)
+
+
+def load_rows(
+    conn,
+    records,
+    geocoding,
+    stats,
+    fingerprints=None,
+    commit_size=COMMIT_SIZE,
+    names=None,
+    pipeline_depth=PIPELINE_DEPTH,
+    run=None,
+):
+    """
+    Load parsed records one at a time, committing every commit_size activities.
+    Each activity is upserted by its own statement, but the statements are sent
+    pipeline_depth at a time, so a load over a slow link isn't bound by one round
+    trip per row. Locations are resolved through a LocationCache and written at
+    each commit, as are the rows' fingerprints if a FingerprintStore is given and
+    a checkpoint if an ImportRun is. Rows that fail are isolated by write_with_savepoints.
+    names is an optional (people, operatives) pair of NameResolvers to start from.
+    """
+    cursor = conn.cursor()
+    location_cache = LocationCache(cursor, geocoding)
+    known_people, known_operatives = names or (None, None)
+    people = NameResolver(cursor, "people", "person", known_people)
+    operatives = NameResolver(cursor, "operatives", "operative", known_operatives)
+    batch = []
+
+    def write(records, batch_stats):
+        location_cache.savepoint()
+
+        # Insert or update the activities, pipeline_depth statements per round
+        # trip. Statements run in order, so a later row with the same ID wins,
+        # and if one fails the whole batch is retried in halves
+        with timer("sql.activity_upsert"):
+            execute_batch(
+                cursor,
+                f"""
+                INSERT INTO {SCHEMA_NAME}.activities (
+                    id, source, operative, date, time, duration, activity, mode,
+                    activity_notes, subject, information, information_type, edited, edit_type
+                ) VALUES (
+                    %(id)s, %(source)s, %(operative)s, %(date)s, %(time)s, %(duration)s,
+                    %(activity)s, %(mode)s, %(activity_notes)s, %(subject)s, %(information)s,
+                    %(information_type)s, %(edited)s, %(edit_type)s
+                )
+                ON CONFLICT (id) DO UPDATE SET
+                    source = EXCLUDED.source,
+                    operative = EXCLUDED.operative,
+                    date = EXCLUDED.date,
+                    time = EXCLUDED.time,
+                    duration = EXCLUDED.duration,
+                    activity = EXCLUDED.activity,
+                    mode = EXCLUDED.mode,
+                    activity_notes = EXCLUDED.activity_notes,
+                    subject = EXCLUDED.subject,
+                    information = EXCLUDED.information,
+                    information_type = EXCLUDED.information_type,
+                    edited = EXCLUDED.edited,
+                    edit_type = EXCLUDED.edit_type
+            """,
+                [record["activity"] for record in records],
+                page_size=pipeline_depth,
+            )
+        # An upsert always writes its row
+        batch_stats["activities_inserted"] += len(records)
+        logging.debug(
+            "Rows %s-%s: Inserted or updated %s activities",
+            records[0]["row_num"],
+            records[-1]["row_num"],
+            len(records),
+        )
+
+        if fingerprints:
+            changed = [
+                record["activity_id"]
+                for record in records
+                if record["status"] == "changed"
+            ]
+            if changed:
+                clear_activity_links(cursor, changed)
+
+        for record in records:
+            activity_id = record["activity_id"]
+            if fingerprints:
+                fingerprints.add("activity", activity_id, record["fingerprint"])
+
+            people.add(record["subjects"])
+            operatives.add(record["operatives"])
+
+            location = record["location"]
+            if location:
+                location, created = location_cache.get_or_create(
+                    location["locality"],
+                    location["street_address"],
+                    location["location_name"],
+                    location["location_type"],
+                    location["location_notes"],
+                    location["latitude"],
+                    location["longitude"],
+                    location["visits"],
+                )
+                if created:
+                    batch_stats["locations_created"] += 1
+
+                # Link activity to location
+                location_cache.link(activity_id, location)
+
+        batch_stats["activity_locations_created"] += location_cache.flush()
+        batch_stats["people_created"] += people.resolve()
+        batch_stats["operatives_created"] += operatives.resolve()
+        if fingerprints:
+            fingerprints.flush()
+
+    def rollback():
+        location_cache.rollback_to_savepoint()
+        people.rollback()
+        operatives.rollback()
+        if fingerprints:
+            fingerprints.rollback()
+
+    @timer("write.commit")
+    def commit():
+        if batch:
+            write_with_savepoints(cursor, batch, write, rollback, stats)
+        if run and last_row is not None:
+            run.checkpoint(last_row)
+        conn.commit()
+        location_cache.savepoint()
+        people.commit()
+        operatives.commit()
+        batch.clear()
+
+    last_row = None
+    for record in records:
+        last_row = record["row_num"]
+        if not count_record(record, stats):
+            continue
+        batch.append(record)
+
+        if len(batch) >= commit_size:
+            commit()
+            logging.info(
+                f"Progress: Processed {stats['activities_processed']} activities..."
+            )
+
+    commit()
+    cursor.close()
+
+
+def collect_csv_files(paths):
+    """
+    Expand directories into the CSV files they hold, in name order.
+    Returns the list of files, each listed once.
+    """
+    files = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            files.extend(sorted(path.glob("*.csv")))
+        else:
+            files.append(path)
+    return list(dict.fromkeys(files))
+
+
+def new_stats():
+    """
+    Return zeroed import statistics.
+    """
+    return {
+        "activities_processed": 0,
+        "activities_inserted": 0,
+        "locations_created": 0,
+        "locations_geocoded": 0,
+        "locations_enriched_from_crosswalk": 0,
+        "activity_locations_created": 0,
+        "people_created": 0,
+        "operatives_created": 0,
+        "rows_skipped": 0,
+        "rows_new": 0,
+        "rows_changed": 0,
+        "rows_unchanged": 0,
+        "activities_deleted": 0,
+        "aggregate_keys_refreshed": 0,
+        "errors": 0,
+        "warnings": 0,
+    }
+
+
+def merge_stats(total, stats):
+    """
+    Add one file's stats to the import's totals. Crosswalk changes are counted
+    per file against that file's previous import, so the largest count is kept
+    rather than their sum.
+    """
+    for key, value in stats.items():
+        if key.startswith("crosswalk_"):
+            total[key] = max(total.get(key, 0), value)
+        else:
+            total[key] = total.get(key, 0) + value
+
+
+@timer("import.shared_entities")
+def resolve_shared_entities(conn, csv_files, crosswalk, geocoding, stats):
+    """
+    Create the locations, people and operatives named anywhere in csv_files up
+    front, in file order, so that files loaded at the same time never race to
+    create the same row or wait on each other to update a shared location.
+    Locations get the type, notes, coordinates and visits that loading the files
+    one after another would give them. Returns the (people, operatives)
+    NameResolvers, to start each file's resolvers from.
+    """
+    cursor = conn.cursor()
+    location_cache = LocationCache(cursor, geocoding)
+    people = NameResolver(cursor, "people", "person")
+    operatives = NameResolver(cursor, "operatives", "operative")
+
+    for csv_file in csv_files:
+        with open(csv_file, "r", encoding="utf-8-sig") as f:
+            for row in csv.DictReader(f):
+                # Rows the loader skips or rejects name nothing
+                try:
+                    int(row["ID"])
+                except (TypeError, ValueError):
+                    continue
+                people.add(parse_subjects(row["Subject"]))
+                operatives.add(parse_operatives(row["Operative"]))
+
+                if any([row["Locality"], row["Street Address"], row["Location Name"]]):
+                    (latitude, longitude), _ = coordinates_value(row["Location Notes"])
+                    location, _ = row_location(row, crosswalk, latitude, longitude)
+                    _, created = location_cache.get_or_create(
+                        location["locality"],
+                        location["street_address"],
+                        location["location_name"],
+                        location["location_type"],
+                        location["location_notes"],
+                        location["latitude"],
+                        location["longitude"],
+                        location["visits"],
+                    )
+                    if created:
+                        stats["locations_created"] += 1
+
+    location_cache.flush()
+    stats["people_created"] += people.resolve()
+    stats["operatives_created"] += operatives.resolve()
+    conn.commit()
+    people.commit()
+    operatives.commit()
+    cursor.close()
+    logging.info(
+        f"Resolved {len(location_cache.locations)} locations, {len(people.ids)} people "
+        f"and {len(operatives.ids)} operatives across {len(csv_files)} files"
+    )
+    return people, operatives
+
+
+def load_file(
+    conn,
+    csv_file,
+    crosswalk,
+    geocoding,
+    stats,
+    bulk=False,
+    batch_size=BULK_BATCH_SIZE,
+    workers=1,
+    incremental=False,
+    commit_size=COMMIT_SIZE,
+    names=None,
+    pipeline_depth=PIPELINE_DEPTH,
+    resume=False,
+):
+    """
+    Load one CSV file over conn, counting into stats. See load_data for the options;
+    names is passed on to the row loader.
+    """
+    if resume and incremental:
+        # Rows committed before the interruption have their fingerprints stored,
+        # so they are skipped as unchanged without being written again
+        logging.info(
+            f"Resuming {csv_file} as an incremental import, which skips the rows "
+            f"already committed as unchanged"
+        )
+    run = ImportRun(conn, csv_file, stats, resume and not incremental)
+    try:
+        if run.start_row > 2 and geocoding:
+            submit_missing_coordinates(conn, geocoding)
+
+        # The row index lets a resumed import seek to its first row and parse
+        # workers read their own rows
+        index = None
+        if workers > 1 or run.start_row > 2:
+            with timer("parse.index"):
+                index = RowIndex.open(csv_file)
+
+        with open(csv_file, "r", encoding="utf-8-sig") as f:
+            if incremental:
+                delta = IncrementalImport(conn, Path(csv_file).name, crosswalk, stats)
+                records = delta.track(
+                    parse_records(f, crosswalk, workers, diff=delta.diff, index=index)
+                )
+                fingerprints = delta.store
+            else:
+                records = parse_records(
+                    f, crosswalk, workers, start_row=run.start_row, index=index
+                )
+                fingerprints = None
+
+            if bulk:
+                load_rows_bulk(
+                    conn,
+                    records,
+                    geocoding,
+                    stats,
+                    batch_size,
+                    fingerprints,
+                    names,
+                    run,
+                )
+            else:
+                load_rows(
+                    conn,
+                    records,
+                    geocoding,
+                    stats,
+                    fingerprints,
+                    commit_size,
+                    names,
+                    pipeline_depth,
+                    run,
+                )
+
+        # Final commit
+        conn.commit()
+
+        if incremental:
+            delta.finish()
+    except BaseException:
+        run.fail()
+        raise
+    run.finish()
+
+
+def load_data(
+    csv_files,
+    crosswalk_file=None,
+    enable_geocoding=False,
+    bulk=False,
+    batch_size=BULK_BATCH_SIZE,
+    workers=1,
+    incremental=False,
+    metrics_textfile=METRICS_TEXTFILE,
+    commit_size=COMMIT_SIZE,
+    jobs=1,
+    crosswalk_threshold=CROSSWALK_MATCH_THRESHOLD,
+    pipeline_depth=PIPELINE_DEPTH,
+    resume=False,
+    log_level=LOG_LEVEL,
+):
+    """
+    Load data from CSV files into Postgres database.
+    Optionally uses a crosswalk file to enrich location data with coordinates and visits;
+    location names spelled differently from an entry's match it if their similarity
+    is at least crosswalk_threshold.
+    Geocoding is disabled by default and can be enabled with enable_geocoding parameter;
+    it runs on a background thread and coordinates are written once the load has committed.
+    With bulk=True, rows are loaded in batches of batch_size through COPY-fed
+    staging tables instead of one statement per row; otherwise rows are committed
+    every commit_size rows, with pipeline_depth activity statements sent per round
+    trip. A row that fails to load is rolled back on its own
+    without losing the rest of its batch.
+    With workers > 1, rows are parsed and validated in that many processes while
+    the main process writes them.
+    With incremental=True, only rows added, changed or removed since the last
+    incremental import of a file with the same name are applied.
+    With jobs > 1, that many files are loaded at the same time, each over its own
+    connection from a pool, after their shared locations and names have been created.
+    Each file's import is checkpointed in import_runs at every commit; with
+    resume=True, a file whose last import was interrupted continues after its
+    checkpoint instead of starting over.
+    Stage timings, counters and cache hit rates are written as a JSON report next
+    to the log file, and also to metrics_textfile in Prometheus format if given.
+    Below log_level DEBUG, only the first LOG_SAMPLE_SIZE messages of each kind of
+    per-row event are logged and the rest are counted.
+    """
+    if isinstance(csv_files, (str, Path)):
+        csv_files = [csv_files]
+    jobs = max(1, min(jobs, len(csv_files)))
+
+    metrics.reset()
+    log_path = setup_logging(log_level)
+    logging.info(f"Starting data import from {', '.join(map(str, csv_files))}")
+    logging.info(f"Log file: {log_path}")
+    logging.info(
+        f"Database: {DB_CONFIG['dbname']}@{DB_CONFIG['host']}:{DB_CONFIG['port']}"
+    )
+    logging.info(f"Geocoding enabled: {enable_geocoding}")
+    if bulk:
+        logging.info(f"Bulk mode enabled: batches of {batch_size} rows")
+    if workers > 1:
+        logging.info(f"Parsing with {workers} worker processes")
+    if jobs > 1:
+        logging.info(f"Loading {jobs} files at a time")
+    if enable_geocoding and ALLOWED_STATES:
+        logging.info(f"Geocoding restricted to states: {', '.join(ALLOWED_STATES)}")
+
+    # Load crosswalk data if provided
+    crosswalk = load_crosswalk_data(crosswalk_file, crosswalk_threshold)
+
+    geocoding = GeocodingPipeline(ALLOWED_STATES) if enable_geocoding else None
+
+    conn = None
+    pool = None
+    stats = new_stats()
+    options = {
+        "bulk": bulk,
+        "batch_size": batch_size,
+        "workers": workers,
+        "incremental": incremental,
+        "commit_size": commit_size,
+        "pipeline_depth": pipeline_depth,
+        "resume": resume,
+    }
+
+    def run(csv_file, conn, names=None):
+        if len(csv_files) > 1:
+            _current_file.name = Path(csv_file).name
+        file_stats = new_stats()
+        try:
+            load_file(
+                conn, csv_file, crosswalk, geocoding, file_stats, names=names, **options
+            )
+        finally:
+            _current_file.name = None
+        if len(csv_files) > 1:
+            logging.info(
+                f"Loaded {csv_file}: {file_stats['activities_processed']} activities, "
+                f"{file_stats['errors']} errors"
+            )
+        return file_stats
+
+    try:
+        # Connect to database
+        conn = psycopg2.connect(**DB_CONFIG)
+        cursor = conn.cursor()
+
+        logging.info("Connected to database successfully")
+
+        if jobs == 1:
+            for csv_file in csv_files:
+                merge_stats(stats, run(csv_file, conn))
+        else:
+            names = resolve_shared_entities(
+                conn, csv_files, crosswalk, geocoding, stats
+            )
+            pool = ThreadedConnectionPool(1, jobs, **DB_CONFIG)
+
+            def run_pooled(csv_file):
+                file_conn = pool.getconn()
+                try:
+                    return run(csv_file, file_conn, names)
+                finally:
+                    pool.putconn(file_conn)
+
+            with ThreadPoolExecutor(max_workers=jobs) as executor:
+                futures = [executor.submit(run_pooled, f) for f in csv_files]
+                try:
+                    for future in as_completed(futures):
+                        merge_stats(stats, future.result())
+                except BaseException:
+                    for future in futures:
+                        future.cancel()
+                    raise
+
+        # Write back coordinates from the background geocoder now that the core load is committed
+        if geocoding:
+            stats["locations_geocoded"] += write_geocoded_locations(
+                conn, geocoding.close()
+            )
+
+        # Bring the activity count tables up to date with what this import changed
+        refreshed = refresh_aggregates(conn)
+        stats["aggregate_keys_refreshed"] += sum(refreshed.values())
+
+        # Log summary
+        logging.info("=" * 60)
+        logging.info("Import completed successfully!")
+        logging.info("=" * 60)
+        logging.info(f"Activities processed: {stats['activities_processed']}")
+        logging.info(f"Activities inserted: {stats['activities_inserted']}")
+        logging.info(f"Locations created: {stats['locations_created']}")
+        logging.info(f"People created: {stats['people_created']}")
+        logging.info(f"Operatives created: {stats['operatives_created']}")
+        logging.info(
+            f"Activity-location links created: {stats['activity_locations_created']}"
+        )
+        logging.info(f"Rows skipped (empty ID): {stats['rows_skipped']}")
+        if incremental:
+            logging.info(f"Rows new: {stats['rows_new']}")
+            logging.info(f"Rows changed: {stats['rows_changed']}")
+            logging.info(f"Rows unchanged: {stats['rows_unchanged']}")
+            logging.info(f"Activities deleted: {stats['activities_deleted']}")
+            if crosswalk:
+                logging.info(
+                    f"Crosswalk entries added: {stats['crosswalk_added']}, "
+                    f"changed: {stats['crosswalk_changed']}, "
+                    f"removed: {stats['crosswalk_removed']}"
+                )
+        logging.info(
+            "Aggregate keys refreshed: "
+            + ", ".join(f"{table} {n}" for table, n in refreshed.items())
+        )
+        logging.info(f"Errors encountered: {stats['errors']}")
+        if crosswalk:
+            logging.info(
+                f"Locations enriched from crosswalk: {stats['locations_enriched_from_crosswalk']}"
+            )
+        if enable_geocoding:
+            logging.info(f"Locations geocoded: {stats['locations_geocoded']}")
+
+        # Get unique locations count
+        cursor.execute(f"SELECT COUNT(DISTINCT id) FROM {SCHEMA_NAME}.locations")
+        unique_locations = cursor.fetchone()[0]
+        logging.info(f"Unique locations in database: {unique_locations}")
+
+        # Get count of locations with coordinates
+        cursor.execute(
+            f"""
+            SELECT COUNT(*) FROM {SCHEMA_NAME}.locations
+            WHERE latitude IS NOT NULL AND longitude IS NOT NULL
+        """
+        )
+        locations_with_coords = cursor.fetchone()[0]
+        logging.info(f"Locations with coordinates: {locations_with_coords}")
+        log_sampled_events()
+
+        cursor.close()
+
+        metrics_path = log_path.with_suffix(".metrics.json")
+        metrics.write_report(metrics_path, stats, metrics_textfile)
+        logging.info(f"Metrics report: {metrics_path}")
+        if metrics_textfile:
+            logging.info(f"Prometheus metrics: {metrics_textfile}")
+
+        flush_logging()
+        print(f"\nImport complete! See {log_path} for details.")
 
     except psycopg2.Error as e:
         logging.error(f"Database error: {e}")
         if conn:
             conn.rollback()
         sys.exit(1)
-    except FileNotFoundError:
-        logging.error(f"CSV file not found: {csv_file}")
+    except FileNotFoundError as e:
+        logging.error(f"CSV file not found: {e.filename}")
         sys.exit(1)
     except Exception as e:
         logging.error(f"Unexpected error: {e}", exc_info=True)
@@ -823,6 +2959,8 @@ def load_data(csv_file, crosswalk_file=None, enable_geocoding=False):
             conn.rollback()
         sys.exit(1)
     finally:
+        if pool:
+            pool.closeall()
         if conn:
             conn.close()
             logging.info("Database connection closed.")
@@ -837,11 +2975,25 @@ Examples:
   %(prog)s data/el_paso.csv
   %(prog)s data/el_paso.csv --crosswalk data/el_paso_update.csv
   %(prog)s data/el_paso.csv --crosswalk data/el_paso_update.csv --geocode
+  %(prog)s data/el_paso.csv --crosswalk data/el_paso_update.csv --bulk
+  %(prog)s data/el_paso.csv --commit-size 5000
+  %(prog)s data/el_paso.csv --pipeline-depth 500
+  %(prog)s data/el_paso.csv --bulk --workers 4
+  %(prog)s data/transcriptions/ --jobs 4
+  %(prog)s data/el_paso.csv --crosswalk data/el_paso_update.csv --incremental
+  %(prog)s data/el_paso.csv --crosswalk data/el_paso_update.csv --geocode --resume
+  %(prog)s data/el_paso.csv --crosswalk data/el_paso_update.csv --crosswalk-threshold 0.9
+  %(prog)s data/el_paso.csv --crosswalk data/el_paso_update.csv --validate
+  %(prog)s data/transcriptions/ --validate --report validation.json
+  %(prog)s data/el_paso.csv --metrics-textfile /var/lib/node_exporter/pinkertons.prom
+  %(prog)s data/el_paso.csv --log-level DEBUG
         """,
     )
 
     parser.add_argument(
-        "csv_file", help="Path to the CSV file containing activity data"
+        "csv_files",
+        nargs="+",
+        help="CSV files containing activity data, or directories of them",
     )
 
     parser.add_argument(
@@ -850,6 +3002,14 @@ Examples:
         help="Path to crosswalk CSV file with location coordinates and visits data",
     )
 
+    parser.add_argument(
+        "--crosswalk-threshold",
+        type=float,
+        default=CROSSWALK_MATCH_THRESHOLD,
+        help="Similarity from 0 to 1 a location name needs to match a crosswalk entry "
+        f"spelled differently; 1 disables fuzzy matching (default: {CROSSWALK_MATCH_THRESHOLD})",
+    )
+
     parser.add_argument(
         "--geocode",
         action="store_true",
@@ -857,6 +3017,122 @@ Examples:
         help="Enable geocoding for locations without coordinates (default: disabled)",
     )
 
+    parser.add_argument(
+        "--bulk",
+        action="store_true",
+        default=False,
+        help="Load rows in batches through COPY and set-based upserts (default: row by row)",
+    )
+
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=BULK_BATCH_SIZE,
+        help=f"Rows per batch in bulk mode (default: {BULK_BATCH_SIZE})",
+    )
+
+    parser.add_argument(
+        "--commit-size",
+        type=int,
+        default=COMMIT_SIZE,
+        help=f"Rows per transaction when loading row by row (default: {COMMIT_SIZE})",
+    )
+
+    parser.add_argument(
+        "--pipeline-depth",
+        type=int,
+        default=PIPELINE_DEPTH,
+        help="Activity statements sent per round trip when loading row by row; "
+        f"1 waits for each one (default: {PIPELINE_DEPTH})",
+    )
+
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="Processes used to parse and validate rows; 0 uses every CPU "
+        "(default: 1, or every CPU with --validate)",
+    )
+
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Files loaded at the same time, each over its own connection (default: 1)",
+    )
+
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        default=False,
+        help="Only apply rows added, changed or removed since the last incremental import",
+    )
+
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        default=False,
+        help="Continue an interrupted import of the same files after its last commit",
+    )
+
+    parser.add_argument(
+        "--metrics-textfile",
+        default=METRICS_TEXTFILE,
+        help="Also write the import metrics to this file in Prometheus text format",
+    )
+
+    parser.add_argument(
+        "--validate",
+        action="store_true",
+        default=False,
+        help="Only check the files and report problems, without a database connection",
+    )
+
+    parser.add_argument(
+        "--report",
+        dest="report_file",
+        help="Write the --validate report to this JSON file (default: next to the log file)",
+    )
+
+    parser.add_argument(
+        "--log-level",
+        type=str.upper,
+        choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+        default=LOG_LEVEL,
+        help="Least severe messages logged; DEBUG also logs every per-row message "
+        f"instead of the first {LOG_SAMPLE_SIZE} of each kind (default: {LOG_LEVEL})",
+    )
+
     args = parser.parse_args()
 
-    load_data(args.csv_file, args.crosswalk_file, args.geocode)
+    workers = args.workers
+    if workers is None:
+        workers = 0 if args.validate else 1
+    workers = workers or os.cpu_count() or 1
+
+    if args.validate:
+        report = validate_data(
+            collect_csv_files(args.csv_files),
+            args.crosswalk_file,
+            workers,
+            args.report_file,
+            args.crosswalk_threshold,
+            args.log_level,
+        )
+        sys.exit(1 if report["issues"]["error"] else 0)
+
+    load_data(
+        collect_csv_files(args.csv_files),
+        args.crosswalk_file,
+        args.geocode,
+        bulk=args.bulk,
+        batch_size=args.batch_size,
+        workers=workers,
+        incremental=args.incremental,
+        metrics_textfile=args.metrics_textfile,
+        commit_size=args.commit_size,
+        jobs=args.jobs,
+        crosswalk_threshold=args.crosswalk_threshold,
+        pipeline_depth=args.pipeline_depth,
+        resume=args.resume,
+        log_level=args.log_level,
+    )
@@ -0,0 +1,236 @@
+"""
+Timing and counters for the import pipeline.
+Stages are timed with timer() (or observe() for durations measured elsewhere)
+into latency histograms, and counters count events such as cache hits and misses.
+At the end of an import the metrics are written as a JSON report next to the
+import log, and optionally as a Prometheus textfile for node_exporter's textfile
+collector.
+"""
+
+import bisect
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Not available on Windows; peak memory is reported as None
+    resource = None
+
+# Upper bounds of the latency histogram buckets, in seconds
+LATENCY_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+# Prefix of every metric name in the Prometheus textfile
+PROMETHEUS_PREFIX = "pinkertons_import"
+
+
+def peak_memory():
+    """
+    Peak resident set size in bytes, as a dict with "process" for this process
+    and "children" for the largest of its finished child processes (such as
+    parse workers). Returns None where it can't be measured.
+    """
+    if resource is None:
+        return None
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    unit = 1 if sys.platform == "darwin" else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * unit
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * unit
+    return {"process": own, "children": children}
+
+
+class Metrics:
+    """
+    Collects stage latencies and counters. Safe to use from several threads.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """
+        Forget everything collected so far and restart the wall clock.
+        """
+        with self._lock:
+            self.stages = {}
+            self.counters = {}
+            self.started_at = datetime.now()
+            self._started = time.perf_counter()
+
+    def observe(self, stage, seconds):
+        """
+        Record one call of a stage that took the given number of seconds.
+        """
+        with self._lock:
+            entry = self.stages.get(stage)
+            if entry is None:
+                entry = self.stages[stage] = {
+                    "count": 0,
+                    "total": 0.0,
+                    "min": seconds,
+                    "max": seconds,
+                    "buckets": [0] * (len(LATENCY_BUCKETS) + 1),
+                }
+            entry["count"] += 1
+            entry["total"] += seconds
+            entry["min"] = min(entry["min"], seconds)
+            entry["max"] = max(entry["max"], seconds)
+            entry["buckets"][bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+
+    @contextmanager
+    def timer(self, stage):
+        """
+        Time the body of a with block as one call of stage.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def increment(self, counter, value=1):
+        with self._lock:
+            self.counters[counter] = self.counters.get(counter, 0) + value
+
+    def report(self, stats=None):
+        """
+        Build the report as a dict: wall time, per-stage latencies, counters,
+        hit rates of every "<name>.hits"/"<name>.misses" counter pair, peak
+        memory, and the import's stats if given.
+        """
+        with self._lock:
+            stages = {name: dict(entry) for name, entry in self.stages.items()}
+            counters = dict(self.counters)
+            wall = time.perf_counter() - self._started
+
+        report_stages = {}
+        for name, entry in sorted(stages.items()):
+            cumulative = 0
+            histogram = {}
+            for bound, count in zip(LATENCY_BUCKETS + ("+Inf",), entry["buckets"]):
+                cumulative += count
+                histogram[str(bound)] = cumulative
+            report_stages[name] = {
+                "count": entry["count"],
+                "total_seconds": round(entry["total"], 6),
+                "mean_seconds": round(entry["total"] / entry["count"], 6),
+                "min_seconds": round(entry["min"], 6),
+                "max_seconds": round(entry["max"], 6),
+                "histogram": histogram,
+            }
+
+        hit_rates = {}
+        for name in counters:
+            if name.endswith(".hits"):
+                prefix = name[: -len(".hits")]
+                hits = counters[name]
+                lookups = hits + counters.get(f"{prefix}.misses", 0)
+                hit_rates[prefix] = round(hits / lookups, 4) if lookups else None
+
+        return {
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "wall_seconds": round(wall, 3),
+            "peak_memory_bytes": peak_memory(),
+            "stages": report_stages,
+            "counters": dict(sorted(counters.items())),
+            "cache_hit_rates": dict(sorted(hit_rates.items())),
+            "stats": stats or {},
+        }
+
+    def write_report(self, path, stats=None, textfile=None):
+        """
+        Write the JSON report to path and, if textfile is given, the same metrics
+        in Prometheus text format. Returns the report.
+        """
+        report = self.report(stats)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        if textfile:
+            write_prometheus_textfile(report, textfile)
+        return report
+
+
+def _metric_name(name):
+    return "".join(c if c.isalnum() else "_" for c in name)
+
+
+def write_prometheus_textfile(report, path):
+    """
+    Write a report in Prometheus text exposition format. The file is replaced
+    atomically so the textfile collector never reads a partial file.
+    """
+    p = PROMETHEUS_PREFIX
+    lines = [
+        f"# HELP {p}_stage_seconds Time spent per import stage.",
+        f"# TYPE {p}_stage_seconds histogram",
+    ]
+    for stage, entry in report["stages"].items():
+        for bound, count in entry["histogram"].items():
+            lines.append(
+                f'{p}_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {count}'
+            )
+        lines.append(
+            f'{p}_stage_seconds_sum{{stage="{stage}"}} {entry["total_seconds"]}'
+        )
+        lines.append(f'{p}_stage_seconds_count{{stage="{stage}"}} {entry["count"]}')
+
+    for counter, value in report["counters"].items():
+        name = f"{p}_{_metric_name(counter)}_total"
+        lines.append(f"# TYPE {name} counter")
+        lines.append(f"{name} {value}")
+
+    lines.append(f"# TYPE {p}_cache_hit_ratio gauge")
+    for cache, rate in report["cache_hit_rates"].items():
+        if rate is not None:
+            lines.append(f'{p}_cache_hit_ratio{{cache="{cache}"}} {rate}')
+
+    lines.append(f"# TYPE {p}_stat gauge")
+    for stat, value in report["stats"].items():
+        lines.append(f'{p}_stat{{name="{stat}"}} {value}')
+
+    memory = report["peak_memory_bytes"]
+    if memory:
+        lines.append(f"# TYPE {p}_peak_memory_bytes gauge")
+        for kind, value in memory.items():
+            lines.append(f'{p}_peak_memory_bytes{{process="{kind}"}} {value}')
+
+    lines.append(f"# TYPE {p}_wall_seconds gauge")
+    lines.append(f"{p}_wall_seconds {report['wall_seconds']}")
+    lines.append(f"# TYPE {p}_last_run_timestamp_seconds gauge")
+    lines.append(f"{p}_last_run_timestamp_seconds {int(time.time())}")
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(tmp_path, path)
+
+
+# Metrics of the current import, shared by the loader and the geocoder
+_metrics = Metrics()
+
+reset = _metrics.reset
+observe = _metrics.observe
+timer = _metrics.timer
+increment = _metrics.increment
+report = _metrics.report
+write_report = _metrics.write_report
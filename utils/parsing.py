@@ -0,0 +1,217 @@
+"""
+Field parsers for activity rows, one value at a time or a whole column at once.
+Values are parsed by memoized functions built on precompiled patterns, since
+dates, times and durations repeat heavily across rows. The column functions take
+lists (or NumPy arrays, if NumPy is installed) of strings and report values that
+could not be parsed in a mask instead of logging them, so the caller decides
+when and how to report them.
+"""
+
+import re
+from datetime import datetime, time as dt_time
+from functools import lru_cache
+from typing import NamedTuple
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; columns are plain lists without it
+    np = None
+
+DURATION_BRACKETS_RE = re.compile(r"[\[\]]")
+DURATION_HOURS_RE = re.compile(r"(\d+)h")
+DURATION_MINUTES_RE = re.compile(r"(\d+)m")
+
+# Pattern: optional text, then lat, comma, optional space, lon
+COORDINATES_RE = re.compile(r"(-?\d+\.\d+)\s*,\s*(-?\d+\.\d+)")
+
+# Time of day written out instead of HH:MM; not an error, but not a time either
+TEXT_TIMES = {"evening", "afternoon", "morning"}
+
+# Distinct values remembered per field
+VALUE_CACHE_SIZE = 65536
+
+
+class ParsedColumn(NamedTuple):
+    """
+    Result of parsing a column: the parsed values, a mask that is True where a
+    value could not be parsed, and the error message of each masked row by index.
+    """
+
+    values: list
+    mask: list
+    errors: dict
+
+
+@lru_cache(maxsize=VALUE_CACHE_SIZE)
+def duration_value(duration_str):
+    """
+    Parse a duration like '5h45m', '10h' or '[10h total]' into PostgreSQL interval text.
+    Returns tuple of (value, error); both are None for an empty value.
+    """
+    if not duration_str or duration_str.strip() == "":
+        return None, None
+
+    # Remove brackets and 'total' text
+    cleaned = DURATION_BRACKETS_RE.sub("", duration_str).replace("total", "").strip()
+
+    hour_match = DURATION_HOURS_RE.search(cleaned)
+    minute_match = DURATION_MINUTES_RE.search(cleaned)
+    hours = int(hour_match.group(1)) if hour_match else 0
+    minutes = int(minute_match.group(1)) if minute_match else 0
+
+    if hours == 0 and minutes == 0:
+        return None, f"Could not parse duration '{duration_str}'"
+
+    return f"{hours} hours {minutes} minutes", None
+
+
+@lru_cache(maxsize=VALUE_CACHE_SIZE)
+def time_value(time_str):
+    """
+    Parse an 'HH:MM' time. Text values like 'Evening' parse to None without an error.
+    Returns tuple of (value, error).
+    """
+    if not time_str or time_str.strip() == "":
+        return None, None
+
+    time_str = time_str.strip()
+    if time_str.lower() in TEXT_TIMES:
+        return None, None
+
+    try:
+        parts = time_str.split(":")
+        if len(parts) == 2:
+            hour = int(parts[0])
+            minute = int(parts[1])
+
+            if hour > 23 or minute > 59:
+                return (
+                    None,
+                    f"Invalid time value '{time_str}' (hour > 23 or minute > 59)",
+                )
+
+            return dt_time(hour, minute), None
+    except (ValueError, IndexError) as e:
+        return None, f"Could not parse time '{time_str}': {e}"
+
+    return None, None
+
+
+@lru_cache(maxsize=VALUE_CACHE_SIZE)
+def date_value(date_str):
+    """
+    Parse a 'YYYY-MM-DD' date. Returns tuple of (value, error).
+    """
+    if not date_str or date_str.strip() == "":
+        return None, None
+
+    try:
+        return datetime.strptime(date_str.strip(), "%Y-%m-%d").date(), None
+    except ValueError as e:
+        return None, f"Could not parse date '{date_str}': {e}"
+
+
+@lru_cache(maxsize=VALUE_CACHE_SIZE)
+def coordinates_value(location_notes):
+    """
+    Extract "latitude, longitude" from location notes.
+    Returns tuple of ((latitude, longitude), error); coordinates are
+    (None, None) if the notes hold none.
+    """
+    if not location_notes or location_notes.strip() == "":
+        return (None, None), None
+
+    match = COORDINATES_RE.search(location_notes)
+    if not match:
+        return (None, None), None
+
+    try:
+        lat = float(match.group(1))
+        lon = float(match.group(2))
+    except ValueError as e:
+        return (None, None), f"Could not parse coordinates from '{location_notes}': {e}"
+
+    # Validate coordinate ranges
+    if -90 <= lat <= 90 and -180 <= lon <= 180:
+        return (lat, lon), None
+    return (None, None), f"Coordinates out of valid range: ({lat}, {lon})"
+
+
+def _parse_column(parse, values):
+    """
+    Apply a (value, error) parser to every cell of a column.
+    A NumPy array is parsed once per distinct value and the results are scattered
+    back with the inverse index, giving an object array and a boolean mask.
+    """
+    if np is not None and isinstance(values, np.ndarray):
+        if values.dtype.kind not in "US":
+            values = np.array(["" if v is None else str(v) for v in values], dtype=str)
+        uniques, inverse = np.unique(values, return_inverse=True)
+        inverse = inverse.reshape(-1)
+
+        parsed = np.empty(len(uniques), dtype=object)
+        failed = np.zeros(len(uniques), dtype=bool)
+        messages = []
+        for i, value in enumerate(uniques):
+            parsed[i], error = parse(str(value))
+            failed[i] = error is not None
+            messages.append(error)
+
+        mask = failed[inverse]
+        errors = {int(i): messages[inverse[i]] for i in np.flatnonzero(mask)}
+        return ParsedColumn(parsed[inverse], mask, errors)
+
+    results = []
+    mask = []
+    errors = {}
+    for i, value in enumerate(values):
+        result, error = parse(value)
+        results.append(result)
+        mask.append(error is not None)
+        if error is not None:
+            errors[i] = error
+    return ParsedColumn(results, mask, errors)
+
+
+def parse_durations(values):
+    """
+    Parse a column of durations into interval text (None where empty or invalid).
+    """
+    return _parse_column(duration_value, values)
+
+
+def parse_times(values):
+    """
+    Parse a column of 'HH:MM' times into datetime.time values.
+    """
+    return _parse_column(time_value, values)
+
+
+def parse_dates(values):
+    """
+    Parse a column of 'YYYY-MM-DD' dates into datetime.date values.
+    A NumPy column comes back as datetime64[D], with NaT for missing dates.
+    """
+    column = _parse_column(date_value, values)
+    if np is not None and isinstance(column.values, np.ndarray):
+        return column._replace(values=column.values.astype("datetime64[D]"))
+    return column
+
+
+def parse_coordinate_column(values):
+    """
+    Parse a column of location notes into (latitude, longitude) tuples.
+    A NumPy column comes back as an (n, 2) float array, with NaN where the notes
+    hold no coordinates.
+    """
+    column = _parse_column(coordinates_value, values)
+    if np is not None and isinstance(column.values, np.ndarray):
+        coordinates = np.array(
+            [
+                (np.nan, np.nan) if lat is None else (lat, lon)
+                for lat, lon in column.values
+            ],
+            dtype=float,
+        ).reshape(-1, 2)
+        return column._replace(values=coordinates)
+    return column
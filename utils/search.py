@@ -0,0 +1,165 @@
+#!/usr/bin/env uv run
+# /// script
+# dependencies = [
+#   "psycopg2-binary",
+#   "python-dotenv",
+#   "requests",
+# ]
+# ///
+"""
+Ranked full-text search over activities, with substring filters on names.
+Words are matched through the GIN index on each activity's search_vector
+(migration 000012), which weighs subject and operative over the activity notes
+and the information, and name filters through the trigram indexes on operative
+and subject where pg_trgm is installed.
+"""
+
+import argparse
+import json
+import logging
+import sys
+
+import psycopg2
+from load_data import DB_CONFIG, SCHEMA_NAME
+
+# Text search configuration of the search_vector column; queries must use the same
+TEXT_SEARCH_CONFIG = "english"
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+# Passed to ts_headline for the snippet of the activity notes shown with each result
+HEADLINE_OPTIONS = 'MaxFragments=2, MinWords=5, MaxWords=20, FragmentDelimiter=" … "'
+
+RESULT_COLUMNS = """
+    a.id, a.date::text, a.time::text, a.operative, a.subject, a.activity, a.mode,
+    a.activity_notes, a.information
+"""
+
+
+def like_pattern(text):
+    """
+    ILIKE pattern matching text anywhere in a value, with % and _ in it matched
+    literally.
+    """
+    escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def search_activities(
+    cursor, text=None, operative=None, subject=None, limit=DEFAULT_LIMIT, offset=0
+):
+    """
+    Search activities for text, in web search syntax ("quoted phrases", or,
+    -excluded), and for operative and subject names containing the given ones.
+    Returns dict with the total number of matches and a page of them, best
+    first, each with its rank and a headline of its notes when searching text.
+    Without text, matches are ordered by id.
+    """
+    limit = max(1, min(limit, MAX_LIMIT))
+    conditions = []
+    params = []
+    if text:
+        conditions.append("a.search_vector @@ query")
+        rank = "ts_rank_cd(a.search_vector, query)"
+        source = (
+            f"{SCHEMA_NAME}.activities a, "
+            f"websearch_to_tsquery('{TEXT_SEARCH_CONFIG}', %s) query"
+        )
+        params.append(text)
+        headline = (
+            f"ts_headline('{TEXT_SEARCH_CONFIG}', COALESCE(p.activity_notes, ''), "
+            f"websearch_to_tsquery('{TEXT_SEARCH_CONFIG}', %s), %s)"
+        )
+        headline_params = [text, HEADLINE_OPTIONS]
+    else:
+        rank = "NULL::real"
+        source = f"{SCHEMA_NAME}.activities a"
+        headline = "NULL"
+        headline_params = []
+    for column, value in (("operative", operative), ("subject", subject)):
+        if value:
+            conditions.append(f"a.{column} ILIKE %s")
+            params.append(like_pattern(value))
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    # Every match is ranked to find the best ones, so counting them costs little
+    # more; headlines are only made for the page returned
+    cursor.execute(
+        f"""
+        SELECT p.*, {headline} AS headline
+        FROM (
+            SELECT {RESULT_COLUMNS}, {rank} AS rank, count(*) OVER () AS total
+            FROM {source}
+            {where}
+            ORDER BY rank DESC, a.id
+            LIMIT %s OFFSET %s
+        ) p
+        ORDER BY p.rank DESC, p.id
+    """,
+        headline_params + params + [limit, offset],
+    )
+    columns = [col.name for col in cursor.description]
+    results = [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    if results:
+        total = results[0]["total"]
+    elif offset:
+        # Past the last page, so the window saw no rows to count
+        cursor.execute(f"SELECT count(*) FROM {source} {where}", params)
+        total = cursor.fetchone()[0]
+    else:
+        total = 0
+    for result in results:
+        del result["total"]
+        if result["rank"] is not None:
+            result["rank"] = round(result["rank"], 4)
+        if not text:
+            del result["rank"], result["headline"]
+    return {"total": total, "limit": limit, "offset": offset, "results": results}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Search activities by their text and by operative and subject names.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  %(prog)s "smelter strike"
+  %(prog)s '"union meeting" -saloon' --limit 20 --offset 20
+  %(prog)s --operative siringo --subject mcparland
+        """,
+    )
+    parser.add_argument(
+        "text", nargs="?", help="Words to search for, in web search syntax"
+    )
+    parser.add_argument("--operative", help="Operative names containing this")
+    parser.add_argument("--subject", help="Subject names containing this")
+    parser.add_argument(
+        "--limit",
+        type=int,
+        default=DEFAULT_LIMIT,
+        help=f"Results per page, at most {MAX_LIMIT} (default: {DEFAULT_LIMIT})",
+    )
+    parser.add_argument(
+        "--offset", type=int, default=0, help="Results to skip (default: 0)"
+    )
+    args = parser.parse_args()
+
+    if not (args.text or args.operative or args.subject):
+        parser.error("give text to search for, --operative or --subject")
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s - %(message)s")
+
+    try:
+        conn = psycopg2.connect(**DB_CONFIG)
+        cursor = conn.cursor()
+        found = search_activities(
+            cursor, args.text, args.operative, args.subject, args.limit, args.offset
+        )
+        conn.close()
+    except psycopg2.Error as e:
+        logging.error(f"Database error: {e}")
+        sys.exit(1)
+
+    print(json.dumps(found, ensure_ascii=False, indent=2))
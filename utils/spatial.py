@@ -0,0 +1,207 @@
+#!/usr/bin/env uv run
+# /// script
+# dependencies = [
+#   "psycopg2-binary",
+#   "python-dotenv",
+#   "requests",
+# ]
+# ///
+"""
+Bounding-box, radius and nearest-neighbour lookups over locations with coordinates.
+Every query goes through the GiST index on each location's point (migration
+000009), so map viewports and "what else is near here" lookups stay fast as the
+locations table grows. Distances are great-circle distances in meters.
+"""
+
+import argparse
+import json
+import logging
+import math
+import sys
+
+import psycopg2
+from load_data import DB_CONFIG, SCHEMA_NAME
+
+# Mean radius of the Earth
+EARTH_RADIUS_M = 6_371_008.8
+
+# The indexed expression and the index's condition; queries must repeat both
+POINT = "point(longitude::float8, latitude::float8)"
+HAS_POINT = "latitude IS NOT NULL AND longitude IS NOT NULL"
+
+LOCATION_COLUMNS = """
+    id, locality, street_address, location_name, location_type,
+    latitude::float8, longitude::float8, visits
+"""
+
+
+def distance_m(latitude1, longitude1, latitude2, longitude2):
+    """
+    Great-circle distance in meters between two points, by the haversine formula.
+    """
+    phi1 = math.radians(latitude1)
+    phi2 = math.radians(latitude2)
+    a = (
+        math.sin((phi2 - phi1) / 2) ** 2
+        + math.cos(phi1)
+        * math.cos(phi2)
+        * math.sin(math.radians(longitude2 - longitude1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+def radius_bbox(latitude, longitude, meters):
+    """
+    Smallest (south, west, north, east) box holding every point within meters
+    of the given one. West is greater than east when the box crosses the antimeridian.
+    """
+    angle = meters / EARTH_RADIUS_M
+    south = latitude - math.degrees(angle)
+    north = latitude + math.degrees(angle)
+    if south <= -90 or north >= 90:
+        # The circle holds a pole, so it spans every longitude
+        return max(south, -90.0), -180.0, min(north, 90.0), 180.0
+
+    # Widest longitude difference on the circle, which is reached north or south
+    # of the center's latitude
+    spread = math.sin(angle) / math.cos(math.radians(latitude))
+    if spread >= 1:
+        return south, -180.0, north, 180.0
+    delta = math.degrees(math.asin(spread))
+    west = longitude - delta
+    east = longitude + delta
+    if west < -180:
+        west += 360
+    if east > 180:
+        east -= 360
+    return south, west, north, east
+
+
+def _fetch(cursor, query, params):
+    cursor.execute(query, params)
+    columns = [col.name for col in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def within_bbox(cursor, south, west, north, east, limit=None):
+    """
+    Return the locations inside a box, ordered by id. A box whose west edge is
+    greater than its east edge crosses the antimeridian.
+    """
+    if west <= east:
+        boxes = [(west, south, east, north)]
+    else:
+        boxes = [(west, south, 180.0, north), (-180.0, south, east, north)]
+    where = " OR ".join(f"{POINT} <@ box(point(%s, %s), point(%s, %s))" for _ in boxes)
+    return _fetch(
+        cursor,
+        f"""
+        SELECT {LOCATION_COLUMNS}
+        FROM {SCHEMA_NAME}.locations
+        WHERE {HAS_POINT} AND ({where})
+        ORDER BY id
+        LIMIT %s
+    """,
+        [value for box in boxes for value in box] + [limit],
+    )
+
+
+def within_radius(cursor, latitude, longitude, meters, limit=None):
+    """
+    Return the locations within meters of a point, nearest first, each with its
+    distance_m. The index narrows them down to the enclosing box first.
+    """
+    found = []
+    for location in within_bbox(cursor, *radius_bbox(latitude, longitude, meters)):
+        distance = distance_m(
+            latitude, longitude, location["latitude"], location["longitude"]
+        )
+        if distance <= meters:
+            location["distance_m"] = round(distance, 1)
+            found.append((distance, location["id"], location))
+    found.sort(key=lambda item: item[:2])
+    return [location for _, _, location in found[:limit]]
+
+
+def nearest(cursor, latitude, longitude, k=10):
+    """
+    Return the k locations nearest a point, nearest first, each with its distance_m.
+    """
+    candidates = _fetch(
+        cursor,
+        f"""
+        SELECT latitude::float8, longitude::float8
+        FROM {SCHEMA_NAME}.locations
+        WHERE {HAS_POINT}
+        ORDER BY {POINT} <-> point(%s, %s)
+        LIMIT %s
+    """,
+        (longitude, latitude, k),
+    )
+    if not candidates:
+        return []
+    # The index measures distance in degrees, which stretches east-west distances
+    # compared to north-south ones, so its k nearest may not be the true k nearest.
+    # Those are all within the farthest of its k, though.
+    farthest = max(
+        distance_m(latitude, longitude, c["latitude"], c["longitude"])
+        for c in candidates
+    )
+    return within_radius(cursor, latitude, longitude, farthest, limit=k)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Find locations in a box, within a distance of a point, or nearest to it.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  %(prog)s bbox 31.74 -106.50 31.78 -106.46
+  %(prog)s radius 31.7587 -106.4869 200
+  %(prog)s nearest 31.7587 -106.4869 --k 5
+        """,
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    bbox_parser = commands.add_parser("bbox", help="Locations inside a box")
+    for edge in ("south", "west", "north", "east"):
+        bbox_parser.add_argument(edge, type=float)
+    bbox_parser.add_argument("--limit", type=int, help="Return at most this many")
+
+    radius_parser = commands.add_parser(
+        "radius", help="Locations within a distance of a point"
+    )
+    radius_parser.add_argument("latitude", type=float)
+    radius_parser.add_argument("longitude", type=float)
+    radius_parser.add_argument("meters", type=float)
+    radius_parser.add_argument("--limit", type=int, help="Return at most this many")
+
+    nearest_parser = commands.add_parser("nearest", help="Locations nearest to a point")
+    nearest_parser.add_argument("latitude", type=float)
+    nearest_parser.add_argument("longitude", type=float)
+    nearest_parser.add_argument(
+        "--k", type=int, default=10, help="Number of locations (default: 10)"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s - %(message)s")
+
+    try:
+        conn = psycopg2.connect(**DB_CONFIG)
+        cursor = conn.cursor()
+        if args.command == "bbox":
+            locations = within_bbox(
+                cursor, args.south, args.west, args.north, args.east, args.limit
+            )
+        elif args.command == "radius":
+            locations = within_radius(
+                cursor, args.latitude, args.longitude, args.meters, args.limit
+            )
+        else:
+            locations = nearest(cursor, args.latitude, args.longitude, args.k)
+        conn.close()
+    except psycopg2.Error as e:
+        logging.error(f"Database error: {e}")
+        sys.exit(1)
+
+    print(json.dumps(locations, ensure_ascii=False, indent=2))